@@ -0,0 +1,74 @@
+"""
+Week planning for many users: planner.build_week_plan in a Python loop vs
+batch_planner.build_week_plans (columnar result, and expanded to dicts).
+
+    python bench/bench_batch_planner.py --users 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+
+from services import batch_planner, planner  # noqa: E402
+
+
+def make_inputs(users: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    names = sorted(
+        {b["name"] for blocks in planner.BASE_EXERCISES.values() for b in blocks}
+        | set(planner.DUMBBELL_ALTS.values())
+        | set(planner.BAND_OR_BW_ALTS.values())
+    )
+    rir = rng.integers(0, 4, size=(users, len(names))).astype(float)
+    rir[rng.random(rir.shape) < 0.2] = np.nan
+    muscles = list(batch_planner.DEFAULT_MUSCLES)
+    soreness = rng.integers(0, 6, size=(users, len(muscles)))
+    equipment = rng.integers(0, 3, size=users)
+    days = rng.integers(1, 7, size=users)
+    return names, rir, muscles, soreness, equipment, days
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--scalar-users", type=int, default=10_000, help="users timed through the scalar loop")
+    args = ap.parse_args()
+
+    names, rir, muscles, soreness, equipment, days = make_inputs(args.users)
+
+    n = min(args.scalar_users, args.users)
+    inputs = [
+        (
+            int(days[u]),
+            {nm: [{"rir": rir[u, j]}] for j, nm in enumerate(names) if not np.isnan(rir[u, j])},
+            {m: int(soreness[u, k]) for k, m in enumerate(muscles) if soreness[u, k]},
+            batch_planner.EQUIPMENT_CODES[equipment[u]],
+        )
+        for u in range(n)
+    ]
+    t0 = time.perf_counter()
+    for d, last, sore, eq in inputs:
+        planner.build_week_plan(d, last, sore, eq)
+    scalar_rate = n / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    batch = batch_planner.build_week_plans(days, rir, names, soreness, equipment, muscles)
+    columnar_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    batch.to_plans()
+    expand_s = time.perf_counter() - t0
+
+    print(f"scalar loop:          {scalar_rate:>12,.0f} user-weeks/s "
+          f"({args.users / scalar_rate:.2f}s projected for {args.users:,})")
+    print(f"batch, columnar:      {args.users / columnar_s:>12,.0f} user-weeks/s ({columnar_s:.3f}s)")
+    print(f"batch + dict expand:  {args.users / (columnar_s + expand_s):>12,.0f} user-weeks/s "
+          f"({columnar_s + expand_s:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Bulk log ingestion throughput: POST /logs/bulk (NDJSON and JSON array) vs
+one POST /logs/ per set.
+
+    python bench/bench_bulk_logs.py --rows 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+
+EXERCISES = ["Back Squat", "Romanian Deadlift", "Barbell Bench Press", "Barbell Row", "Lat Pulldown"]
+
+
+def make_rows(n: int):
+    return [
+        {
+            "name": EXERCISES[i % len(EXERCISES)],
+            "reps": 5 + i % 8,
+            "weight_kg": 40 + (i % 60) * 2.5,
+            "rir": i % 4,
+            "focus": "lower" if i % 2 else "upper",
+            "timestamp": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T10:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--single", type=int, default=2_000, help="rows to time through POST /logs/")
+    args = ap.parse_args()
+
+    rows = make_rows(args.rows)
+    with TestClient(app) as client:
+        t0 = time.perf_counter()
+        for row in rows[: args.single]:
+            client.post("/logs/", json={k: v for k, v in row.items() if k != "timestamp"})
+        single_s = time.perf_counter() - t0
+        single_rate = args.single / single_s
+
+        ndjson = "\n".join(json.dumps(r) for r in rows).encode()
+        t0 = time.perf_counter()
+        resp = client.post("/logs/bulk", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+        ndjson_s = time.perf_counter() - t0
+        assert resp.json()["inserted"] == args.rows, resp.text
+
+        t0 = time.perf_counter()
+        resp = client.post("/logs/bulk", json=rows)
+        array_s = time.perf_counter() - t0
+        assert resp.json()["inserted"] == args.rows, resp.text
+
+    print(f"POST /logs/ (one set per request): {single_rate:,.0f} rows/s "
+          f"-> {args.rows / single_rate:.1f}s projected for {args.rows:,} rows")
+    print(f"POST /logs/bulk NDJSON:            {args.rows / ndjson_s:,.0f} rows/s ({ndjson_s:.2f}s)")
+    print(f"POST /logs/bulk JSON array:        {args.rows / array_s:,.0f} rows/s ({array_s:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
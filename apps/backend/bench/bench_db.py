@@ -0,0 +1,91 @@
+"""
+Per-call latency of the hot services/db.py functions, before vs after pooling.
+
+"before" re-creates the original behaviour (a fresh sqlite3.connect plus both
+PRAGMAs on every call); "after" uses the shared ConnectionPool.
+
+    python bench/bench_db.py --calls 2000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+
+from services import db  # noqa: E402
+
+
+@contextmanager
+def _legacy_conn():
+    conn = sqlite3.connect(db.DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    with conn:
+        yield conn
+    # the old code never closed explicitly; CPython refcounting did it here
+    conn.close()
+
+
+def _time_calls(fn, calls: int) -> dict:
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+def run(calls: int) -> dict:
+    db.init_db()
+    seed = db.add_plan("Bench plan", "{}", '{"title": "Bench plan"}')
+    for i in range(200):
+        db.add_plan(f"Plan {i}", "{}", "{}")
+
+    workloads = {
+        "add_log": lambda: db.add_log("Barbell Bench Press", 8, 70.0, 2, "upper"),
+        "get_plan": lambda: db.get_plan(seed["id"]),
+        "list_plans": lambda: db.list_plans(limit=20),
+    }
+
+    results = {}
+    pooled_conn = db._conn
+    for mode in ("before", "after"):
+        db._conn = _legacy_conn if mode == "before" else pooled_conn
+        db.close_pool()
+        for name, fn in workloads.items():
+            fn()  # warm up
+            results[(name, mode)] = _time_calls(fn, calls)
+    db._conn = pooled_conn
+    db.close_pool()
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--calls", type=int, default=2000)
+    args = ap.parse_args()
+
+    results = run(args.calls)
+    print(f"{'function':<12}{'mode':<8}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    for (name, mode), r in results.items():
+        print(f"{name:<12}{mode:<8}{r['mean_us']:>10.1f}{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}")
+    for name in ("add_log", "get_plan", "list_plans"):
+        before, after = results[(name, "before")], results[(name, "after")]
+        print(f"{name}: {before['mean_us'] / after['mean_us']:.1f}x faster per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Planner input lookups over a large `logs` table: the materialized
+latest_sets table vs the original full scan + sort.
+
+    python bench/bench_latest_sets.py --rows 1200000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+
+from services import db  # noqa: E402
+from services.planner import BASE_EXERCISES  # noqa: E402
+
+EXERCISES = sorted({b["name"] for blocks in BASE_EXERCISES.values() for b in blocks}) + [
+    f"Accessory {i}" for i in range(40)
+]
+
+
+def seed(rows: int) -> float:
+    def gen():
+        for i in range(rows):
+            day, sec = divmod(i, 86_400)
+            yield (
+                EXERCISES[i % len(EXERCISES)],
+                5 + i % 8,
+                40 + (i % 60) * 2.5,
+                i % 4,
+                "upper",
+                f"20{10 + day // 365:02d}-01-01 {sec // 3600:02d}:{sec // 60 % 60:02d}:{sec % 60:02d}",
+            )
+
+    t0 = time.perf_counter()
+    db.add_logs_bulk(gen(), chunk_size=50_000)
+    return time.perf_counter() - t0
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=1_200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    db.init_db()
+    seed_s = seed(args.rows)
+    print(f"bulk-loaded {args.rows:,} logs in {seed_s:.1f}s (latest_sets maintained)")
+    snapshot = db.get_latest_by_exercise(db.LATEST_SETS_PER_EXERCISE)
+    t0 = time.perf_counter()
+    kept = db.rebuild_latest_sets()
+    print(f"rebuild-latest (backfill command): {kept} rows in {time.perf_counter() - t0:.2f}s")
+    assert db.get_latest_by_exercise(db.LATEST_SETS_PER_EXERCISE) == snapshot
+
+    # per-insert cost of maintaining the table through the trigger
+    t0 = time.perf_counter()
+    for _ in range(2_000):
+        db.add_log("Back Squat", 5, 100.0, 2, "lower")
+    print(f"add_log with trigger: {(time.perf_counter() - t0) / 2_000 * 1e6:.0f} µs/call")
+
+    plan_names = [b["name"] for b in BASE_EXERCISES["upper"]]
+    assert db.get_latest_by_exercise(3) == db._latest_by_exercise_scan(3)
+    print(f"{'lookup':<44}{'median ms':>10}")
+    for label, fn in [
+        ("full scan (old get_latest_by_exercise)", lambda: db._latest_by_exercise_scan(3)),
+        ("latest_sets, all exercises", lambda: db.get_latest_by_exercise(3)),
+        ("latest_sets, one plan's exercises", lambda: db.get_latest_by_exercise(3, names=plan_names)),
+        ("get_recent_sets_map(14) (timestamp index)", lambda: db.get_recent_sets_map(14)),
+    ]:
+        print(f"{label:<44}{_median_ms(fn, args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Upstream LLM calls under injected faults: plain calls vs the call policy
+(services/resilience.py: deadline, retries, hedging, circuit breaker).
+
+Drives llm.create_chat_completion directly against the fake OpenAI server
+(tests/fake_openai.py) in three scenarios:
+
+- tail:   --slow-rate of calls take --slow-latency extra seconds
+- flaky:  --error-rate of calls answer 500
+- outage: every call answers 500
+
+"plain" is one attempt per call with no breaker (OPENAI_MAX_ATTEMPTS=1,
+hedging off, a breaker that never opens), i.e. the behaviour before the
+policy existed. Reports latency percentiles, failed calls and upstream calls
+made per logical call.
+
+    python bench/bench_llm_resilience.py --calls 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_load import percentile  # noqa: E402  (also puts the backend root on sys.path)
+
+from services import llm  # noqa: E402
+from services.resilience import CallPolicy, CircuitBreaker  # noqa: E402
+from tests.fake_openai import FakeOpenAI  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Explain a 3-day plan."}]
+
+
+def _policy(resilient: bool, args) -> CallPolicy:
+    if not resilient:
+        return CallPolicy(CircuitBreaker("bench", failure_threshold=10**9), max_attempts=1, hedge=False)
+    return CallPolicy(
+        CircuitBreaker("bench", llm.LLM_BREAKER_FAILURES, args.breaker_reset),
+        max_attempts=llm.LLM_MAX_ATTEMPTS,
+        backoff_s=args.backoff,
+        hedge_min_s=llm.LLM_HEDGE_MIN_S,
+    )
+
+
+async def _drive(calls: int, concurrency: int, deadline: float) -> tuple:
+    latencies, failures = [], 0
+    remaining = calls
+
+    async def worker():
+        nonlocal remaining, failures
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            try:
+                await llm.create_chat_completion(timeout=deadline, model="bench", messages=MESSAGES)
+            except Exception:
+                failures += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies), failures
+
+
+def run(fake: FakeOpenAI, scenario: str, resilient: bool, args) -> dict:
+    fake.error_rate = {"flaky": args.error_rate, "outage": 1.0}.get(scenario, 0.0)
+    fake.slow_rate = args.slow_rate if scenario == "tail" else 0.0
+    fake.slow_latency = args.slow_latency
+    llm.policy = _policy(resilient, args)
+    llm._async_state = None
+
+    async def go():
+        if resilient and scenario == "tail":
+            fake.slow_rate = 0.0  # learn the normal latency first, as a running server would have
+            await _drive(50, args.concurrency, args.deadline)
+            fake.slow_rate = args.slow_rate
+        before = fake.calls
+        latencies, failures = await _drive(args.calls, args.concurrency, args.deadline)
+        return latencies, failures, fake.calls - before
+
+    latencies, failures, upstream = asyncio.run(go())
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1],
+        "failed": failures,
+        "upstream_per_call": upstream / args.calls,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--calls", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--latency", type=float, default=0.05, help="normal fake upstream latency")
+    ap.add_argument("--jitter", type=float, default=0.01)
+    ap.add_argument("--slow-rate", type=float, default=0.03)
+    ap.add_argument("--slow-latency", type=float, default=1.0)
+    ap.add_argument("--error-rate", type=float, default=0.1)
+    ap.add_argument("--deadline", type=float, default=3.0, help="per-call deadline in seconds")
+    ap.add_argument("--backoff", type=float, default=0.05, help="base retry backoff in seconds")
+    ap.add_argument("--breaker-reset", type=float, default=30.0)
+    args = ap.parse_args()
+
+    print(f"{args.calls} calls, concurrency {args.concurrency}, deadline {args.deadline:g}s")
+    print(f"{'scenario':<8}  {'mode':<8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'failed':>8}{'upstream/call':>15}")
+    with FakeOpenAI(latency=args.latency, jitter=args.jitter) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        for scenario in ("tail", "flaky", "outage"):
+            for resilient, label in ((False, "plain"), (True, "policy")):
+                r = run(fake, scenario, resilient, args)
+                print(
+                    f"{scenario:<8}  {label:<8}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}"
+                    f"{r['failed']:>8}{r['upstream_per_call']:>15.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+End-to-end load benchmark: the real app under uvicorn against the fake OpenAI server.
+
+Starts tests/fake_openai.FakeOpenAI with the given latency/jitter, serves
+main.app on a local port with a throwaway SQLite database, then drives each
+scenario at each concurrency level over real HTTP and reports throughput and
+p50/p95/p99 latency. Results go to a JSON file (one per commit by default)
+so runs can be diffed with --compare. Client and server share one process
+(and GIL), so absolute numbers are pessimistic; compare runs made on the
+same machine.
+
+Scenarios:
+- generate         POST /plans/generate?cache=bypass (every call hits the fake LLM)
+- generate_cached  POST /plans/generate with one repeated payload (cache hits)
+- list_plans       GET /plans
+- get_plan         GET /plans/{id}
+- add_log          POST /logs/
+- list_logs        GET /logs/
+
+    python bench/bench_load.py --concurrency 1,8,32 --requests 400 --latency 0.3 --jitter 0.1
+    python bench/bench_load.py --compare bench/results/load-abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from tests.fake_openai import FakeOpenAI  # noqa: E402
+
+SCENARIOS = ("generate", "generate_cached", "list_plans", "get_plan", "add_log", "list_logs")
+GENERATE_PAYLOAD = {"goal": "strength", "days_per_week": 3, "equipment": "dumbbells"}
+RESULTS_DIR = os.path.join(BACKEND_ROOT, "bench", "results")
+
+
+def percentile(sorted_samples, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+def _free_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class AppServer:
+    """main.app under uvicorn on a background thread, like FakeOpenAI."""
+
+    def __init__(self):
+        from main import app
+
+        self.port = _free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", ws="none")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "AppServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("app server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def _request_factory(scenario: str, plan_ids, rng: random.Random):
+    """(method, url, kwargs) generator for one scenario."""
+    if scenario == "generate":
+        return lambda: ("POST", "/plans/generate", {"json": GENERATE_PAYLOAD, "params": {"cache": "bypass"}})
+    if scenario == "generate_cached":
+        return lambda: ("POST", "/plans/generate", {"json": GENERATE_PAYLOAD})
+    if scenario == "list_plans":
+        return lambda: ("GET", "/plans", {"params": {"limit": 20}})
+    if scenario == "get_plan":
+        return lambda: ("GET", f"/plans/{rng.choice(plan_ids)}", {})
+    if scenario == "add_log":
+        return lambda: (
+            "POST",
+            "/logs/",
+            {"json": {"name": "Barbell Row", "reps": 8, "weight_kg": 60.0, "rir": rng.randint(0, 3), "focus": "upper"}},
+        )
+    if scenario == "list_logs":
+        return lambda: ("GET", "/logs/", {"params": {"limit": 100}})
+    raise ValueError(f"unknown scenario {scenario!r}")
+
+
+async def _drive(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    latencies = []
+    statuses = {}
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request()
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(method, url, **kwargs)
+                status = str(resp.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - t0) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    ok = sum(n for s, n in statuses.items() if s.startswith("2"))
+    return {
+        "requests": total,
+        "errors": total - ok,
+        "statuses": dict(sorted(statuses.items())),
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+async def run(base_url: str, scenarios, levels, requests: int, seed: int) -> list:
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        # seed a few plans for the read scenarios and warm the connection pool
+        plan_ids = []
+        for _ in range(5):
+            resp = await client.post("/plans/generate", json=GENERATE_PAYLOAD, params={"cache": "bypass"})
+            resp.raise_for_status()
+            plan_ids.append(resp.json()["id"])
+
+        results = []
+        for scenario in scenarios:
+            make_request = _request_factory(scenario, plan_ids, rng)
+            for c in levels:
+                row = {"scenario": scenario, "concurrency": c, **await _drive(client, make_request, requests, c)}
+                results.append(row)
+                print(
+                    f"  {scenario:<16}c={c:<4}{row['throughput_rps']:>9.1f} req/s"
+                    f"  p50 {row['p50_ms']:>8.2f}  p95 {row['p95_ms']:>8.2f}  p99 {row['p99_ms']:>8.2f} ms"
+                    + (f"  errors {row['errors']}" if row["errors"] else "")
+                )
+        return results
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: list, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (positive = slower / less throughput)")
+    for row in current:
+        base = baseline.get((row["scenario"], row["concurrency"]))
+        if base is None:
+            continue
+
+        def pct(a, b):
+            return (a - b) / b * 100 if b else 0.0
+
+        print(
+            f"  {row['scenario']:<16}c={row['concurrency']:<4}"
+            f"throughput {-pct(row['throughput_rps'], base['throughput_rps']):>+7.1f}%"
+            f"  p50 {pct(row['p50_ms'], base['p50_ms']):>+7.1f}%"
+            f"  p99 {pct(row['p99_ms'], base['p99_ms']):>+7.1f}%"
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    ap.add_argument("--requests", type=int, default=400, help="requests per scenario and level")
+    ap.add_argument("--latency", type=float, default=0.3, help="fake OpenAI latency in seconds")
+    ap.add_argument("--jitter", type=float, default=0.1, help="+/- uniform jitter on the fake latency")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="results JSON path (default bench/results/load-<commit>.json)")
+    ap.add_argument("--compare", help="earlier results JSON to diff against")
+    args = ap.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        ap.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    random.seed(args.seed)
+
+    commit = _git_commit()
+    print(
+        f"fake OpenAI latency {args.latency}s ± {args.jitter}s, "
+        f"{args.requests} requests per scenario/level, commit {commit}"
+    )
+    with FakeOpenAI(latency=args.latency, jitter=args.jitter) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        with AppServer() as server:
+            results = asyncio.run(run(server.base_url, scenarios, levels, args.requests, args.seed))
+        upstream_calls = fake.calls
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fake_latency_s": args.latency,
+            "fake_jitter_s": args.jitter,
+            "requests_per_level": args.requests,
+            "seed": args.seed,
+            "upstream_calls": upstream_calls,
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"load-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Soreness parser microbenchmark: the original str.replace + regex + substring
+scan implementation vs the compiled single-pass matcher (cold and cached),
+and parse_soreness_batch over a large batch of notes.
+
+    python bench/bench_nlp.py --notes 20000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+
+from services import nlp  # noqa: E402
+
+
+def legacy_parse_soreness(text: str) -> dict:
+    if not text:
+        return {}
+    t = text.lower()
+    for k, v in nlp.ALIASES.items():
+        t = t.replace(k, v)
+    out = {}
+    for raw_muscle, level in re.findall(r'([a-z_ ]+?)\s*[:=\s]\s*([1-5])', t):
+        m = raw_muscle.strip().replace(" ", "_")
+        if m in nlp.MUSCLES:
+            out[m] = max(1, min(5, int(level)))
+    for m in nlp.MUSCLES:
+        if m in t and m not in out:
+            out[m] = 3
+    return out
+
+
+def make_notes(n: int, unique: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = sorted(nlp.MUSCLES | set(nlp.ALIASES)) + ["legs", "felt", "ok", "after", "deadlifts", "pretty"]
+    pool = []
+    for _ in range(unique):
+        parts = []
+        for _ in range(rng.randint(2, 8)):
+            w = rng.choice(words)
+            parts.append(f"{w} {rng.randint(1, 5)}" if rng.random() < 0.5 else w)
+        pool.append(", ".join(parts))
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def _per_note_us(fn, notes) -> float:
+    t0 = time.perf_counter()
+    fn(notes)
+    return (time.perf_counter() - t0) / len(notes) * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--notes", type=int, default=20_000)
+    ap.add_argument("--unique", type=int, default=2_000)
+    args = ap.parse_args()
+
+    notes = make_notes(args.notes, args.unique)
+    uncached = nlp._parse_normalized.__wrapped__
+
+    rows = [
+        ("legacy (replace + regex + scan)", lambda ns: [legacy_parse_soreness(t) for t in ns]),
+        ("compiled, uncached", lambda ns: [dict(uncached(t.lower())) for t in ns]),
+    ]
+    nlp._parse_normalized.cache_clear()
+    rows.append(("compiled, LRU-cached", lambda ns: [nlp.parse_soreness(t) for t in ns]))
+    rows.append(("parse_soreness_batch (warm)", nlp.parse_soreness_batch))
+
+    print(f"{args.notes:,} notes ({args.unique:,} distinct)")
+    for label, fn in rows:
+        print(f"  {label:<34}{_per_note_us(fn, notes):>8.2f} µs/note")
+    print(f"  cache: {nlp._parse_normalized.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-page latency of GET /plans-style listing at increasing depth, OFFSET vs
+keyset (cursor) pagination, over a synthetic `plans` table.
+
+    python bench/bench_pagination.py --rows 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+
+from services import db  # noqa: E402
+
+PAGE = 20
+
+
+def seed(rows: int) -> None:
+    db.init_db()
+    batch = 50_000
+    with db._conn() as conn:
+        for start in range(0, rows, batch):
+            conn.executemany(
+                "INSERT INTO plans(title, input_json, output_json) VALUES (?,?,?)",
+                ((f"Plan {i}", "{}", "{}") for i in range(start, min(rows, start + batch))),
+            )
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    seed(args.rows)
+    print(f"seeded {args.rows:,} plans in {time.perf_counter() - t0:.1f}s")
+
+    top = db.max_plan_id()
+    depths = [0, 1_000, 10_000, 100_000, args.rows // 2, args.rows - PAGE]
+    print(f"{'depth (rows)':>14}{'offset ms':>12}{'cursor ms':>12}")
+    for depth in depths:
+        if depth >= args.rows:
+            continue
+        offset_ms = _median_ms(lambda: db.list_plans(limit=PAGE, offset=depth), args.repeat)
+        # the cursor for this depth is the id of the last row of the previous page
+        before_id = top - depth + 1
+        cursor_ms = _median_ms(lambda: db.list_plans(limit=PAGE, before_id=before_id), args.repeat)
+        assert db.list_plans(limit=PAGE, offset=depth) == db.list_plans(limit=PAGE, before_id=before_id)
+        print(f"{depth:>14,}{offset_ms:>12.3f}{cursor_ms:>12.3f}")
+    print(f"max_plan_id (ETag version): {_median_ms(db.max_plan_id, args.repeat):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
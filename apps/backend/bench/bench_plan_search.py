@@ -0,0 +1,133 @@
+"""
+/plans/search latency over a large synthetic corpus (plans_fts, FTS5 + bm25).
+
+Seeds `plans` and `plans_fts` directly (batched, in one transaction) with
+generated plans, indexed through the same _plan_search_fields as
+_insert_plan, then times db.search_plans for queries of different selectivity,
+first page and a deep page. For scale, the pre-index way to answer
+"plans with X" (decode every row and scan its JSON) is timed on a sample
+and extrapolated to the whole table.
+
+    python bench/bench_plan_search.py --plans 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+
+from services import db, plan_codec, planner  # noqa: E402
+
+GOALS = ("strength", "hypertrophy", "fat_loss", "endurance")
+EQUIPMENT = ("full_gym", "dumbbells", "bodyweight")
+FOCUSES = ("Upper", "Lower", "Full body", "Push", "Pull", "Legs")
+EXERCISES = sorted(
+    {b["name"] for blocks in planner.BASE_EXERCISES.values() for b in blocks}
+    | set(planner.DUMBBELL_ALTS.values())
+    | set(planner.BAND_OR_BW_ALTS.values())
+)
+# swapped in for ~1 day in 1000, so queries for them are selective
+RARE_EXERCISES = ("Zercher Squat", "Jefferson Curl", "Nordic Curl", "Landmine Press", "Pendlay Row")
+SUMMARY_WORDS = (
+    "build", "strength", "volume", "steady", "progression", "recovery", "weekly", "focus", "compound", "lifts",
+    "accessory", "work", "conditioning", "tempo", "technique", "deload", "knees", "shoulders", "posture", "core",
+)
+
+QUERIES = (
+    ("common term", "squat"),
+    ("two terms", "hypertrophy dumbbells"),
+    ("phrase", '"romanian deadlift"'),
+    ("prefix", "pendl*"),
+    ("rare term", "zercher"),
+    ("no match", "kettlebell snatch"),
+)
+
+
+def _exercises(rng: random.Random, n: int):
+    picks = rng.sample(EXERCISES, min(n, len(EXERCISES)))
+    if rng.random() < 0.001:
+        picks[-1] = rng.choice(RARE_EXERCISES)
+    return picks
+
+
+def seed(plans: int, seed_: int) -> None:
+    rng = random.Random(seed_)
+    db.init_db()
+    batch = 20_000
+    with db._conn() as conn:
+        for start in range(0, plans, batch):
+            rows, fts = [], []
+            for i in range(start, min(plans, start + batch)):
+                request = {"goal": rng.choice(GOALS), "equipment": rng.choice(EQUIPMENT)}
+                days = rng.randint(2, 6)
+                title = f"{days}-Day {request['goal'].replace('_', ' ').title()} Plan"
+                output = {
+                    "title": title,
+                    "summary": " ".join(rng.choice(SUMMARY_WORDS) for _ in range(rng.randint(15, 30))),
+                    "weekly_split": [
+                        {"day": f"Day {d + 1}", "focus": focus, "main": [{"name": n} for n in _exercises(rng, 4)]}
+                        for d, focus in enumerate(rng.sample(FOCUSES, min(days, len(FOCUSES))))
+                    ],
+                }
+                input_json, output_json = json.dumps(request), json.dumps(output)
+                rows.append(
+                    (i + 1, title, plan_codec.encode(input_json), plan_codec.encode(output_json), plan_codec.CURRENT)
+                )
+                fts.append((i + 1, *db._plan_search_fields(title, input_json, output_json)))
+            conn.executemany(
+                "INSERT INTO plans(id, title, input_json, output_json, codec) VALUES (?,?,?,?,?)", rows
+            )
+            conn.executemany(db._PLAN_SEARCH_INSERT, fts)
+        conn.execute("INSERT INTO plans_fts(plans_fts) VALUES ('optimize')")
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def scan_estimate_ms(plans: int, sample: int) -> float:
+    """Time the decode-and-parse scan over `sample` rows, scaled to `plans`."""
+    t0 = time.perf_counter()
+    with db._conn() as conn:
+        for r in conn.execute("SELECT output_json, codec FROM plans LIMIT ?", (sample,)):
+            "Zercher Squat" in json.dumps(json.loads(plan_codec.decode(r["output_json"], r["codec"])))
+    return (time.perf_counter() - t0) * 1000 * plans / sample
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--plans", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=11)
+    ap.add_argument("--window", type=int, default=db.PLAN_SEARCH_WINDOW, help="matches ranked per query")
+    args = ap.parse_args()
+    db.PLAN_SEARCH_WINDOW = args.window
+
+    t0 = time.perf_counter()
+    seed(args.plans, args.seed)
+    print(f"seeded and indexed {args.plans:,} plans in {time.perf_counter() - t0:.1f}s (ranking window {args.window:,})")
+
+    deep = 50
+    print(f"{'query':<14}{'q':<26}{'page 1 ms':>11}{f'page {deep + 1} ms':>13}{'hits on p1':>12}")
+    for label, q in QUERIES:
+        first = _median_ms(lambda: db.search_plans(q, limit=20), args.repeat)
+        deep_ms = _median_ms(lambda: db.search_plans(q, limit=20, offset=20 * deep), args.repeat)
+        hits = len(db.search_plans(q, limit=20))
+        print(f"{label:<14}{q:<26}{first:>11.2f}{deep_ms:>13.2f}{hits:>12}")
+    print(f"JSON scan of every plan (estimated): {scan_estimate_ms(args.plans, min(args.plans, 50_000)):,.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
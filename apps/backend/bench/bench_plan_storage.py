@@ -0,0 +1,124 @@
+"""
+Bytes per plan and get_plan latency, plain TEXT vs services/plan_codec.
+
+Seeds a synthetic corpus as plain rows (codec 0, the pre-compression
+format), measures it, migrates it in place with db.recompress_plans (what
+`manage.py compress-plans` runs) and measures again. The corpus mixes the
+deterministic local plans with LLM-style variation (free-text notes,
+summaries, rep ranges), so it compresses worse than the templates alone.
+
+Reported per format: payload bytes per plan, database file bytes per plan
+(after VACUUM), and warm get_plan p50/p99 over random ids.
+
+    python bench/bench_plan_storage.py --plans 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+os.environ["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+
+from routes.plans import GeneratePlanRequest  # noqa: E402
+from services import db, plan_codec  # noqa: E402
+from services.fallback_plan import build_local_plan  # noqa: E402
+
+GOALS = ("strength", "hypertrophy", "fat_loss", "endurance")
+EXPERIENCE = ("beginner", "intermediate", "advanced")
+EQUIPMENT = ("full_gym", "dumbbells", "bodyweight")
+REPS = ("3-5", "5-8", "6-8", "8-10", "8-12", "10-12", "12-15", "15-20")
+NOTE_WORDS = (
+    "keep", "a", "slow", "eccentric", "pause", "at", "the", "bottom", "brace", "hard", "drive", "through",
+    "heels", "elbows", "tucked", "full", "range", "of", "motion", "stop", "two", "reps", "short", "failure",
+)
+SORENESS = ("", "sore quads", "lower back tight", "shoulders a bit sore", "hamstrings 4/5", "elbows sore")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(NOTE_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_plan(rng: random.Random) -> tuple:
+    req = GeneratePlanRequest(
+        goal=rng.choice(GOALS),
+        experience=rng.choice(EXPERIENCE),
+        days_per_week=rng.randint(2, 6),
+        session_minutes=rng.choice((45, 60, 75, 90)),
+        equipment=rng.choice(EQUIPMENT),
+        soreness_notes=rng.choice(SORENESS),
+    )
+    plan = build_local_plan(req.model_dump())
+    plan.pop("source", None)
+    plan["summary"] = " ".join(_sentence(rng, rng.randint(6, 14)) for _ in range(2))
+    for day in plan["weekly_split"]:
+        for item in day["main"] + day["accessories"]:
+            item["reps"] = rng.choice(REPS)
+            item["rpe"] = rng.choice((None, 7, 8, 9))
+            item["rest_seconds"] = rng.choice((60, 75, 90, 120, 150, 180))
+            if rng.random() < 0.5:
+                item["notes"] = _sentence(rng, rng.randint(3, 10))
+    plan["safety_notes"] = [_sentence(rng, rng.randint(5, 12))]
+    return plan["title"], req.model_dump_json(), json.dumps(plan, separators=(",", ":"))
+
+
+def file_bytes() -> int:
+    with db._conn() as conn:
+        return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+
+def read_latency_us(ids, reads: int, rng: random.Random) -> tuple:
+    samples = []
+    for plan_id in (rng.choice(ids) for _ in range(reads)):
+        t0 = time.perf_counter()
+        db.get_plan(plan_id)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def measure(label: str, plans: int, ids, reads: int) -> None:
+    db.vacuum()
+    stats = db.plan_storage_stats()
+    payload = sum(s["payload_bytes"] for s in stats.values())
+    p50, p99 = read_latency_us(ids, reads, random.Random(1))
+    print(
+        f"{label:<14}{payload / plans:>14,.0f}{file_bytes() / plans:>14,.0f}{p50:>12.1f}{p99:>12.1f}"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--plans", type=int, default=50_000)
+    ap.add_argument("--reads", type=int, default=20_000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    db.init_db()
+    plan_codec.CURRENT = plan_codec.PLAIN  # seed in the pre-compression format
+    t0 = time.perf_counter()
+    ids = []
+    for _ in range(args.plans):
+        title, input_json, output_json = make_plan(rng)
+        ids.append(db.add_plan(title, input_json, output_json)["id"])
+    print(f"seeded {args.plans:,} plain plans in {time.perf_counter() - t0:.1f}s")
+
+    sample = db.get_plan(ids[0])
+    print(f"{'format':<14}{'payload B/plan':>14}{'file B/plan':>14}{'p50 us':>12}{'p99 us':>12}")
+    measure("plain", args.plans, ids, args.reads)
+
+    t0 = time.perf_counter()
+    rewritten = db.recompress_plans(plan_codec.DEFLATE_V1)
+    migrate_s = time.perf_counter() - t0
+    measure(f"codec {plan_codec.DEFLATE_V1}", args.plans, ids, args.reads)
+    assert db.get_plan(ids[0]) == sample
+    print(f"migration: {rewritten:,} rows in {migrate_s:.1f}s ({rewritten / migrate_s:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
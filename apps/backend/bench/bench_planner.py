@@ -0,0 +1,118 @@
+"""
+Planner hot path: the original per-call block scans vs the import-time
+catalog (block templates, exercise->muscles index) and the memoized day.
+
+Cases:
+- adjust_for_soreness over one day's blocks
+- _apply_equipment vs a BLOCK_TEMPLATES lookup
+- build_workout_plan with a small pool of repeated inputs (memo hits)
+- build_workout_plan with all-distinct inputs (memo misses)
+- build_week_plan from stats
+
+    python bench/bench_planner.py --calls 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_ROOT)
+
+from services import planner  # noqa: E402
+
+FOCUSES = ("upper", "lower", "full")
+
+
+def legacy_adjust_for_soreness(blocks, soreness):
+    if not soreness:
+        return blocks
+    out = []
+    for b in blocks:
+        aggravated = any(b["name"] in planner.SORENESS_MAP.get(m, []) and lvl >= 3
+                         for m, lvl in soreness.items())
+        out.append({**b, "name": f"Light {b['name']} (reduce load 20%)"} if aggravated else b)
+    return out
+
+
+def legacy_build_workout_plan(focus, last_log_by_ex=None, soreness=None, equipment="gym"):
+    last_log_by_ex = last_log_by_ex or {}
+    base = planner._apply_equipment(planner.select_blocks(focus), equipment)
+    planned = []
+    for b in base:
+        delta = planner.progressive_overload(last_log_by_ex.get(b["name"], []))
+        planned.append({**b, "weight_delta": delta})
+    planned = legacy_adjust_for_soreness(planned, soreness)
+    return {"date": str(date.today()), "focus": focus, "equipment": equipment, "exercises": planned}
+
+
+def make_inputs(n: int, seed: int = 5):
+    rng = random.Random(seed)
+    names = sorted(
+        {b["name"] for blocks in planner.BASE_EXERCISES.values() for b in blocks}
+        | set(planner.DUMBBELL_ALTS.values())
+        | set(planner.BAND_OR_BW_ALTS.values())
+    )
+    muscles = list(planner.SORENESS_MAP) + ["calves", "biceps"]
+    out = []
+    for _ in range(n):
+        last = {nm: [{"rir": rng.randint(-1, 4)} for _ in range(3)] for nm in rng.sample(names, 8)}
+        sore = {m: rng.randint(1, 5) for m in rng.sample(muscles, rng.randint(0, 3))}
+        out.append((rng.choice(FOCUSES), last, sore, rng.choice(planner.EQUIPMENT_MODES)))
+    return out
+
+
+def _per_call_us(fn, inputs) -> float:
+    t0 = time.perf_counter()
+    for args in inputs:
+        fn(*args)
+    return (time.perf_counter() - t0) / len(inputs) * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--calls", type=int, default=100_000)
+    ap.add_argument("--unique", type=int, default=500, help="distinct inputs in the repeated-input case")
+    args = ap.parse_args()
+
+    rng = random.Random(11)
+    pool = make_inputs(args.unique)
+    repeated = [rng.choice(pool) for _ in range(args.calls)]
+    distinct = make_inputs(min(args.calls, 20_000), seed=9)
+
+    day_blocks = [
+        (planner._apply_equipment(planner.select_blocks(f), e), s) for f, _, s, e in repeated
+    ]
+    equip_args = [(f, e) for f, _, _, e in repeated]
+
+    rows = [
+        ("adjust_for_soreness, legacy", legacy_adjust_for_soreness, day_blocks),
+        ("adjust_for_soreness, inverted index", planner.adjust_for_soreness, day_blocks),
+        ("equipment, _apply_equipment", lambda f, e: planner._apply_equipment(planner.select_blocks(f), e), equip_args),
+        ("equipment, BLOCK_TEMPLATES", lambda f, e: planner.BLOCK_TEMPLATES[(f, planner._equipment_mode(e))], equip_args),
+        ("build_workout_plan, legacy (repeated)", legacy_build_workout_plan, repeated),
+        ("build_workout_plan, memoized (repeated)", planner.build_workout_plan, repeated),
+        ("build_workout_plan, legacy (distinct)", legacy_build_workout_plan, distinct),
+    ]
+
+    print(f"{args.calls:,} calls over {args.unique:,} distinct inputs; {len(distinct):,} distinct-input calls")
+    for label, fn, inputs in rows:
+        print(f"  {label:<44}{_per_call_us(fn, inputs):>8.2f} µs/call")
+
+    planner._compiled_day.cache_clear()
+    cold = _per_call_us(planner.build_workout_plan, distinct)
+    print(f"  {'build_workout_plan, compiled (distinct)':<44}{cold:>8.2f} µs/call")
+    print(f"  cache: {planner._compiled_day.cache_info()}")
+
+    stats = {nm: {"avg_rir": 1.5} for _, last, _, _ in pool[:1] for nm in last}
+    week = [(d, None, s, e) for (_, _, s, e), d in zip(repeated, (rng.randint(1, 6) for _ in repeated))]
+    t0 = time.perf_counter()
+    for d, _, s, e in week:
+        planner.build_week_plan(d, None, s, e, stats)
+    print(f"  {'build_week_plan from stats (memoized)':<44}{(time.perf_counter() - t0) / len(week) * 1e6:>8.2f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Throughput of the server modes over real HTTP: run_server.py (the
+single-process dev server) vs serve.py with 1..N worker processes.
+
+Each mode is started as its own subprocess on a free port with a fresh
+SQLite database and the fake OpenAI server (tests/fake_openai.py) as
+upstream. Load comes from several client processes (so one client's GIL is
+not the ceiling), using bench_load's scenarios and percentile. The client
+processes share the machine with the server, so compare modes on the same
+host, and expect worker counts above the CPU count to stop helping.
+
+    python bench/bench_serve.py --workers 1,2,4 --concurrency 32 --requests 4000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_load  # noqa: E402  (also puts the backend root on sys.path)
+import httpx  # noqa: E402
+
+from tests.fake_openai import FakeOpenAI  # noqa: E402
+
+BACKEND_ROOT = bench_load.BACKEND_ROOT
+SCENARIOS = ("list_plans", "get_plan", "generate_cached", "add_log")
+
+
+class ServerProcess:
+    """One server mode as a subprocess, ready once /health answers."""
+
+    def __init__(self, argv, port: int, upstream: str):
+        self.argv = argv
+        self.port = port
+        self.env = dict(
+            os.environ,
+            GYMGPT_HOST="127.0.0.1",
+            GYMGPT_PORT=str(port),
+            GYMGPT_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db"),
+            GYMGPT_LOG_LEVEL="warning",
+            OPENAI_BASE_URL=upstream,
+            OPENAI_API_KEY="bench-key",
+        )
+        self._proc = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ServerProcess":
+        self._proc = subprocess.Popen(
+            self.argv, cwd=BACKEND_ROOT, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.base_url}/health", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        self._proc.kill()
+        raise RuntimeError(f"{' '.join(self.argv)} did not start")
+
+    def __exit__(self, *exc) -> None:
+        self._proc.terminate()  # SIGTERM: the graceful path serve.py documents
+        try:
+            self._proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+
+
+def _client_process(args) -> tuple:
+    base_url, scenario, plan_ids, total, concurrency, seed = args
+
+    async def go():
+        make_request = bench_load._request_factory(scenario, plan_ids, random.Random(seed))
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        latencies, errors = [], 0
+        remaining = total
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                method, url, kwargs = make_request()
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.request(method, url, **kwargs)
+                    errors += resp.status_code >= 400
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return latencies, errors, time.perf_counter() - t0
+
+    return asyncio.run(go())
+
+
+def drive(pool, base_url: str, scenario: str, plan_ids, total: int, concurrency: int, clients: int) -> dict:
+    jobs = [
+        (base_url, scenario, plan_ids, total // clients, max(1, concurrency // clients), seed)
+        for seed in range(clients)
+    ]
+    latencies, errors, wall = [], 0, 0.0
+    for lat, err, elapsed in pool.map(_client_process, jobs):
+        latencies.extend(lat)
+        errors += err
+        wall = max(wall, elapsed)
+    latencies.sort()
+    return {
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(bench_load.percentile(latencies, 50), 2),
+        "p99_ms": round(bench_load.percentile(latencies, 99), 2),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--workers", default="1,2,4", help="serve.py worker counts to compare")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--concurrency", type=int, default=32, help="total in-flight requests")
+    ap.add_argument("--requests", type=int, default=4000, help="requests per scenario and mode")
+    ap.add_argument("--clients", type=int, default=2, help="load-generating processes")
+    ap.add_argument("--latency", type=float, default=0.05, help="fake OpenAI latency in seconds")
+    args = ap.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    modes = [("run_server.py (dev, reload)", [sys.executable, "run_server.py"])]
+    for n in (int(w) for w in args.workers.split(",") if w):
+        modes.append((f"serve.py --workers {n}", [sys.executable, "serve.py", "--workers", str(n)]))
+
+    print(
+        f"{os.cpu_count()} CPUs, {args.clients} client processes, concurrency {args.concurrency}, "
+        f"{args.requests} requests per scenario"
+    )
+    print(f"{'mode':<30}{'scenario':<17}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    ctx = multiprocessing.get_context("spawn")
+    with FakeOpenAI(latency=args.latency) as fake, ctx.Pool(args.clients) as pool:
+        for label, argv in modes:
+            with ServerProcess(argv, bench_load._free_port(), fake.base_url) as server:
+                plan_ids = [
+                    httpx.post(
+                        f"{server.base_url}/plans/generate",
+                        json=bench_load.GENERATE_PAYLOAD,
+                        params={"cache": "bypass"},
+                        timeout=30,
+                    ).json()["id"]
+                    for _ in range(5)
+                ]
+                for scenario in scenarios:
+                    row = drive(pool, server.base_url, scenario, plan_ids, args.requests, args.concurrency, args.clients)
+                    print(
+                        f"{label:<30}{scenario:<17}{row['throughput_rps']:>9.1f}{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+                        + (f"  errors {row['errors']}" if row["errors"] else "")
+                    )
+
+
+if __name__ == "__main__":
+    main()
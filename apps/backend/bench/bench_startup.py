@@ -0,0 +1,91 @@
+"""
+Cold startup time of the API process, measured in fresh interpreters.
+
+Phases, each timed in its own subprocess:
+- import:   `import main` (what autoscaling and every test run pays first)
+- lifespan: import + lifespan startup (schema creation) + the first /health
+
+Each run gets an empty database so schema creation is included. Before
+startup work moved into the lifespan hook, `import main` took ~1.3 s here
+(openai + httpx imported and a client built at import, init_db run twice);
+the default target leaves headroom under half of that.
+
+    python bench/bench_startup.py --runs 10 --target-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT = """
+import sys, time
+t0 = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t0
+print(elapsed, "openai" in sys.modules)
+"""
+
+_LIFESPAN = """
+import sys, time
+t0 = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+    elapsed = time.perf_counter() - t0
+print(elapsed, "openai" in sys.modules)
+"""
+
+
+def _run(code: str) -> tuple:
+    env = dict(os.environ)
+    env["GYMGPT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "startup.db")
+    env.setdefault("OPENAI_API_KEY", "bench-key")
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    elapsed, openai_loaded = out.stdout.split()
+    return float(elapsed) * 1000, openai_loaded == "True"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--target-ms", type=float, default=800.0, help="fail if the median import exceeds this")
+    ap.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = ap.parse_args()
+
+    results = {}
+    for phase, code in (("import", _IMPORT), ("lifespan", _LIFESPAN)):
+        samples, loaded = [], False
+        for _ in range(args.runs):
+            ms, openai_loaded = _run(code)
+            samples.append(ms)
+            loaded |= openai_loaded
+        results[phase] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1),
+            "max_ms": round(max(samples), 1),
+            "openai_imported": loaded,
+        }
+
+    if args.json:
+        print(json.dumps({"target_ms": args.target_ms, "results": results}, indent=2))
+    else:
+        print(f"{args.runs} fresh interpreters per phase, target {args.target_ms:.0f} ms (import median)")
+        for phase, r in results.items():
+            print(
+                f"  {phase:<9} median {r['median_ms']:>7.1f} ms  min {r['min_ms']:>7.1f}  max {r['max_ms']:>7.1f}"
+                f"  openai imported: {'yes' if r['openai_imported'] else 'no'}"
+            )
+    if results["import"]["median_ms"] > args.target_ms:
+        sys.exit(f"import median {results['import']['median_ms']} ms is over the {args.target_ms:.0f} ms target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Sustained single-row insert throughput: one transaction per row vs group
+commit (services/writer.py), through db.add_log as request handlers call it.
+
+Each mode runs --processes worker processes (like serve.py --workers) with
+--threads threads each (like the request threadpool), all inserting into
+one fresh database for --seconds. Reports rows/s, per-call latency and
+errors ("database is locked" when a writer outwaits busy_timeout).
+
+    python bench/bench_writes.py --processes 1,4 --threads 16 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_load import percentile  # noqa: E402  (also puts the backend root on sys.path)
+
+
+def _worker_process(db_path: str, batching: bool, threads: int, seconds: float, start_at: float, out) -> None:
+    os.environ["GYMGPT_DB_PATH"] = db_path
+    os.environ["GYMGPT_WRITE_BATCHING"] = "1" if batching else "0"
+    from services import db
+
+    db.init_db()
+    latencies, errors = [], []
+    while time.time() < start_at:
+        time.sleep(0.001)
+    deadline = time.perf_counter() + seconds
+
+    def work(i: int) -> None:
+        n = 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                db.add_log(f"Exercise {i % 8}", 8, 60.0 + n % 10, 2, "upper")
+            except Exception as e:
+                errors.append(type(e).__name__)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            n += 1
+
+    pool = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    db.close_pool()
+    out.put((latencies, errors))
+
+
+def run_mode(batching: bool, processes: int, threads: int, seconds: float) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="gymgpt-bench-"), "bench.db")
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    start_at = time.time() + 1.0 + 0.2 * processes  # let every process import and open first
+    procs = [
+        ctx.Process(target=_worker_process, args=(db_path, batching, threads, seconds, start_at, out))
+        for _ in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    latencies, errors = [], []
+    for _ in procs:
+        lat, err = out.get(timeout=seconds + 60)  # a crashed worker raises queue.Empty here
+        latencies.extend(lat)
+        errors.extend(err)
+    for p in procs:
+        p.join()
+    latencies.sort()
+    return {
+        "rows_per_s": (len(latencies) - len(errors)) / seconds,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--processes", default="1,4", help="comma-separated process counts")
+    ap.add_argument("--threads", type=int, default=16, help="writer threads per process")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    print(f"{args.threads} threads per process, {args.seconds:g}s per run")
+    print(f"{'processes':>9}  {'mode':<22}{'rows/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for processes in (int(p) for p in args.processes.split(",") if p):
+        for batching, label in ((False, "transaction per row"), (True, "group commit")):
+            r = run_mode(batching, processes, args.threads, args.seconds)
+            print(
+                f"{processes:>9}  {label:<22}{r['rows_per_s']:>10,.0f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,79 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import os
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
-from services.db import init_db
 
-init_db()
+# before importing anything that reads its settings from the environment
 load_dotenv()
 
-app = FastAPI()
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from services.db import init_db, close_pool
+from services import llm, metrics, profiler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # importing this module has no side effects; the schema is created or
+    # migrated here, once per process (services.db also does it lazily on
+    # first use for code that never runs the lifespan)
+    await run_in_threadpool(init_db)
+    # pick up jobs queued before a restart
+    job_workers.ensure_started()
+    yield
+    await job_workers.stop()
+    # hand pooled SQLite connections and upstream HTTP sockets back on exit
+    await llm.aclose()
+    close_pool()
+
 
-# ✅ CORS (THIS FIXES THE UI ERROR)
+app = FastAPI(lifespan=lifespan)
+
+# CORS: comma-separated origins, defaulting to the local frontend dev ports;
+# "*" allows any origin, but then without credentials (cookies/auth headers)
+DEFAULT_CORS_ORIGINS = (
+    "http://localhost:3000,http://127.0.0.1:3000,http://localhost:3001,http://127.0.0.1:3001"
+)
+CORS_ORIGINS = [
+    o.strip().rstrip("/") for o in os.getenv("GYMGPT_CORS_ORIGINS", DEFAULT_CORS_ORIGINS).split(",") if o.strip()
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:3001",
-        "http://127.0.0.1:3001",
-    ],
-    allow_credentials=True,
+    allow_origins=CORS_ORIGINS,
+    allow_credentials="*" not in CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# request latency / in-flight metrics (outermost, so CORS handling is timed too)
+app.add_middleware(metrics.MetricsMiddleware, router=app.router)
+
 # health
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+# per-request profiles (GYMGPT_PROFILING=1 and an `X-Profile: 1` request header)
+@app.get("/debug/profiles", include_in_schema=False)
+def list_profiles():
+    return profiler.list_profiles()
+
+@app.get("/debug/profiles/{profile_id}", include_in_schema=False)
+def get_profile(profile_id: str):
+    profile = profiler.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile["folded"])
+
 # routers
-from routes.plans import router as plans_router
+from routes.plans import router as plans_router, job_workers
+from routes.logs import router as logs_router
 app.include_router(plans_router)
+app.include_router(logs_router, prefix="/logs", tags=["logs"])
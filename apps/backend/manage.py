@@ -0,0 +1,117 @@
+"""
+Maintenance commands for the GymGPT backend.
+
+    python manage.py rebuild-latest
+    python manage.py prewarm-explanations [--concurrency 4] [--limit N] [--dry-run]
+    python manage.py compress-plans [--codec N] [--batch-size 500] [--vacuum]
+    python manage.py rebuild-search
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+
+def cmd_rebuild_latest(args) -> None:
+    from services import db
+
+    db.init_db()
+    t0 = time.perf_counter()
+    kept = db.rebuild_latest_sets()
+    print(f"latest_sets rebuilt: {kept} rows in {time.perf_counter() - t0:.2f}s")
+
+
+def cmd_rebuild_search(args) -> None:
+    from services import db
+
+    db.init_db()
+    t0 = time.perf_counter()
+    indexed = db.rebuild_search_index()
+    print(f"plans_fts rebuilt: {indexed} plans in {time.perf_counter() - t0:.2f}s")
+
+
+def cmd_prewarm_explanations(args) -> None:
+    from services import db, explanations, llm
+
+    db.init_db()
+    if args.dry_run:
+        namespace = llm.explain_cache_namespace()
+        stored = db.explanation_fingerprints()
+        plans = list(explanations.reachable_plans())
+        missing = sum(explanations.fingerprint(p, namespace) not in stored for p in plans)
+        print(f"{len(plans)} reachable plans, {len(plans) - missing} stored, {missing} to generate")
+        return
+
+    def progress(done: int, total: int) -> None:
+        if done % 50 == 0 or done == total:
+            print(f"  {done}/{total}", flush=True)
+
+    t0 = time.perf_counter()
+    result = explanations.prewarm(
+        llm.explain_workout,
+        llm.explain_cache_namespace(),
+        concurrency=args.concurrency,
+        limit=args.limit,
+        on_progress=progress,
+    )
+    print(
+        f"{result['reachable']} reachable plans: {result['already_stored']} already stored, "
+        f"{result['generated']} generated, {result['failed']} failed, {result['remaining']} remaining "
+        f"({time.perf_counter() - t0:.1f}s)"
+    )
+
+
+def cmd_compress_plans(args) -> None:
+    from services import db, plan_codec
+
+    db.init_db()
+    codec = plan_codec.CURRENT if args.codec is None else args.codec
+
+    def report(label: str) -> None:
+        for c, s in sorted(db.plan_storage_stats().items()):
+            per_plan = s["payload_bytes"] / s["plans"] if s["plans"] else 0
+            print(f"  {label:<7} codec {c}: {s['plans']} plans, {s['payload_bytes']} payload bytes ({per_plan:.0f}/plan)")
+
+    report("before")
+    t0 = time.perf_counter()
+    rewritten = db.recompress_plans(codec, batch_size=args.batch_size)
+    print(f"re-encoded {rewritten} plans as codec {codec} in {time.perf_counter() - t0:.2f}s")
+    report("after")
+    if args.vacuum:
+        t0 = time.perf_counter()
+        db.vacuum()
+        print(f"vacuumed in {time.perf_counter() - t0:.2f}s")
+
+
+def main() -> None:
+    load_dotenv()
+    ap = argparse.ArgumentParser(description="GymGPT maintenance commands")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-latest", help="backfill/repair the latest-sets-per-exercise table")
+    p.set_defaults(func=cmd_rebuild_latest)
+
+    p = sub.add_parser("rebuild-search", help="re-index every plan in the plans_fts full-text index")
+    p.set_defaults(func=cmd_rebuild_search)
+
+    p = sub.add_parser(
+        "prewarm-explanations",
+        help="generate and store explanations for every plan the planner can produce",
+    )
+    p.add_argument("--concurrency", type=int, default=4, help="parallel upstream calls")
+    p.add_argument("--limit", type=int, help="generate at most this many (resume later)")
+    p.add_argument("--dry-run", action="store_true", help="only count what is missing")
+    p.set_defaults(func=cmd_prewarm_explanations)
+
+    p = sub.add_parser("compress-plans", help="re-encode stored plans with the current (or given) codec")
+    p.add_argument("--codec", type=int, help="target codec (default: GYMGPT_PLAN_CODEC; 0 = plain text)")
+    p.add_argument("--batch-size", type=int, default=500, help="rows per transaction")
+    p.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to shrink the file")
+    p.set_defaults(func=cmd_compress_plans)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 # apps/backend/routes/logs.py
-from fastapi import APIRouter, Query
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional, List, Dict, Any, Literal, Tuple
 
-from services.db import init_db, add_log, get_logs
+from routes.pagination import encode_cursor, decode_cursor
+from services.db import add_log, add_logs_bulk, get_logs, iter_logs
 
 router = APIRouter()
-init_db()  # ensure table + index exist once on import
 
 # Request model (what clients send)
 class Log(BaseModel):
@@ -16,6 +23,10 @@ class Log(BaseModel):
     rir: int
     focus: Optional[str] = None
 
+# Bulk import row: same as Log, plus the original time of the set
+class BulkLog(Log):
+    timestamp: Optional[datetime] = None
+
 # Response model (what we return from DB)
 class LogRow(BaseModel):
     id: int
@@ -33,8 +44,187 @@ def add(log: Log):
     # 'added' is a dict from services.db; validate to LogRow on the way out
     return {"added": LogRow(**added)}
 
-@router.get("/", response_model=List[LogRow])
-def all_logs(focus: Optional[str] = Query(None, description="Filter by focus (upper/lower/full)")):
-    """Return logs, newest first. Optional focus filter."""
-    rows = get_logs(focus)
-    return [LogRow(**r) for r in rows]
+# One page of logs plus the cursor for the next one
+class LogPage(BaseModel):
+    items: List[LogRow]
+    limit: int
+    next_cursor: Optional[str] = None
+
+@router.get("/", response_model=LogPage)
+def all_logs(
+    focus: Optional[str] = Query(None, description="Filter by focus (upper/lower/full)"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque `next_cursor` from the previous page"),
+):
+    """Return one page of logs, newest first. Optional focus filter."""
+    before_id = decode_cursor("l", cursor) if cursor else None
+    rows = get_logs(focus, limit=limit, before_id=before_id)
+    next_cursor = encode_cursor("l", rows[-1]["id"]) if len(rows) == limit else None
+    return {"items": rows, "limit": limit, "next_cursor": next_cursor}
+
+_CSV_COLUMNS = ["id", "name", "reps", "weight_kg", "rir", "focus", "timestamp"]
+
+def _ndjson_lines(focus: Optional[str]):
+    for row in iter_logs(focus):
+        yield json.dumps(row) + "\n"
+
+def _csv_chunks(focus: Optional[str], rows_per_chunk: int = 1000):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=_CSV_COLUMNS)
+    writer.writeheader()
+    for i, row in enumerate(iter_logs(focus), start=1):
+        writer.writerow(row)
+        if i % rows_per_chunk == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+@router.get("/export")
+def export_logs(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    focus: Optional[str] = Query(None, description="Filter by focus (upper/lower/full)"),
+):
+    """
+    Stream the full log history, newest first. Rows are read with fetchmany
+    and written out as they arrive, so memory stays flat however long the
+    history is.
+    """
+    if format == "csv":
+        body, media_type = _csv_chunks(focus), "text/csv"
+    else:
+        body, media_type = _ndjson_lines(focus), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="logs.{format}"'},
+    )
+
+# ---------- bulk ingestion ----------
+
+# one import is one write transaction: every other writer waits on it, and
+# gives up with "database is locked" after busy_timeout (5 s). 50k rows
+# commit in well under a second; split bigger imports into several requests.
+BULK_MAX_ROWS = int(os.getenv("LOGS_BULK_MAX_ROWS", "50000"))
+BULK_MAX_REPORTED_ERRORS = 100
+# rows are validated off the event loop in batches of this size
+_VALIDATE_BATCH = 5000
+
+
+def _sqlite_timestamp(ts: Optional[datetime]) -> Optional[str]:
+    """Match SQLite's CURRENT_TIMESTAMP format (UTC, no offset)."""
+    if ts is None:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _error_text(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+        )
+    return str(e)
+
+
+def _validate_rows(items: List[Tuple[int, Any]], raw_json: bool) -> Tuple[List[tuple], List[Dict]]:
+    """Validate (position, row) pairs; returns (insertable tuples, per-row errors)."""
+    rows: List[tuple] = []
+    errors: List[Dict] = []
+    for pos, item in items:
+        try:
+            log = BulkLog.model_validate_json(item) if raw_json else BulkLog.model_validate(item)
+        except (ValidationError, ValueError) as e:
+            errors.append({"row": pos, "error": _error_text(e)})
+            continue
+        rows.append((log.name, log.reps, log.weight_kg, log.rir, log.focus, _sqlite_timestamp(log.timestamp)))
+    return rows, errors
+
+
+class _Ingest:
+    def __init__(self):
+        self.received = 0
+        self.rows: List[tuple] = []
+        self.rejected = 0
+        self.errors: List[Dict] = []
+
+    def take(self, rows: List[tuple], errors: List[Dict]) -> None:
+        self.received += len(rows) + len(errors)
+        if self.received > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per request")
+        self.rows.extend(rows)
+        self.rejected += len(errors)
+        room = BULK_MAX_REPORTED_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+
+async def _ingest_ndjson(request: Request) -> _Ingest:
+    ingest = _Ingest()
+    pending: List[Tuple[int, bytes]] = []
+    line_no = 0
+    tail = b""
+    async for chunk in request.stream():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()  # possibly incomplete; wait for the next chunk
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                pending.append((line_no, line))
+        if len(pending) >= _VALIDATE_BATCH:
+            ingest.take(*await run_in_threadpool(_validate_rows, pending, True))
+            pending = []
+    if tail.strip():
+        pending.append((line_no + 1, tail))
+    if pending:
+        ingest.take(*await run_in_threadpool(_validate_rows, pending, True))
+    return ingest
+
+
+def _ingest_array(body: bytes) -> _Ingest:
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Body is not valid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of log rows")
+    ingest = _Ingest()
+    for start in range(0, len(items), _VALIDATE_BATCH):
+        batch = list(enumerate(items[start : start + _VALIDATE_BATCH], start=start + 1))
+        ingest.take(*_validate_rows(batch, False))
+    return ingest
+
+
+@router.post("/bulk")
+async def add_bulk(
+    request: Request,
+    all_or_nothing: bool = Query(False, description="Reject the whole upload if any row is invalid"),
+):
+    """
+    Import many sets at once.
+
+    Send either a JSON array of rows, or newline-delimited JSON
+    (Content-Type: application/x-ndjson), which is read and validated as it
+    streams in. Valid rows are inserted in one transaction; invalid rows
+    are skipped and reported by 1-based position (first 100 only). More
+    than LOGS_BULK_MAX_ROWS rows (default 50000) is a 413.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        ingest = await _ingest_ndjson(request)
+    else:
+        ingest = await run_in_threadpool(_ingest_array, await request.body())
+
+    if all_or_nothing and ingest.rejected:
+        raise HTTPException(
+            status_code=422,
+            detail={"received": ingest.received, "rejected": ingest.rejected, "errors": ingest.errors},
+        )
+    inserted = await run_in_threadpool(add_logs_bulk, ingest.rows) if ingest.rows else 0
+    return {
+        "received": ingest.received,
+        "inserted": inserted,
+        "rejected": ingest.rejected,
+        "errors": ingest.errors,
+    }
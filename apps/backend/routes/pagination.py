@@ -0,0 +1,22 @@
+# apps/backend/routes/pagination.py
+"""Opaque keyset cursors shared by the list endpoints."""
+import base64
+import binascii
+
+from fastapi import HTTPException
+
+
+def encode_cursor(kind: str, last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{kind}:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(kind: str, cursor: str) -> int:
+    """Return the id stored in `cursor`; 400 if it is malformed or for another listing."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, last_id = raw.split(":", 1)
+        if prefix != kind:
+            raise ValueError(prefix)
+        return int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
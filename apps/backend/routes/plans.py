@@ -1,16 +1,47 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import math
 import os
+import time
 from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, conint, ConfigDict
-from services.db import add_plan, list_plans, get_plan
-from openai import OpenAI
+from services import llm, metrics
+from routes.pagination import encode_cursor, decode_cursor
+from services.db import (
+    active_job_counts,
+    add_plan,
+    claim_job,
+    complete_job,
+    create_job,
+    fail_job,
+    get_exercise_stats,
+    get_job,
+    get_plan,
+    list_plans,
+    max_plan_id,
+    oldest_queued_job_at,
+    plan_search_truncated,
+    release_job,
+    retry_job,
+    search_plans,
+)
+from services.fallback_plan import build_local_plan, fallback_stats
+from services.jobs import WorkerPool
+from services.json_stream import ArrayItemStream
+from services.plan_cache import plan_cache, make_key
+from services.resilience import is_upstream_fault
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/plans", tags=["plans"])
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 # ---------- Request / Response Schemas ----------
@@ -89,84 +120,559 @@ Rules:
 """.strip()
 
 
-@router.post("/generate")
-def generate_plan(req: GeneratePlanRequest):
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
+def normalize_openai_json_schema(node):
+    if isinstance(node, dict):
+        if node.get("type") == "object" and "properties" in node:
+            props = node["properties"]
+            node["additionalProperties"] = False
+            node["required"] = list(props.keys())
+        for v in node.values():
+            normalize_openai_json_schema(v)
+    elif isinstance(node, list):
+        for item in node:
+            normalize_openai_json_schema(item)
+
 
+def build_plan_schema() -> dict:
     # Use JSON schema guidance via response_format with strict JSON
     schema = GeneratePlanResponse.model_json_schema()
     schema["additionalProperties"] = False
+    normalize_openai_json_schema(schema)
+    return schema
 
-    def normalize_openai_json_schema(node):
-        if isinstance(node, dict):
-            if node.get("type") == "object" and "properties" in node:
-                props = node["properties"]
-                node["additionalProperties"] = False
-                node["required"] = list(props.keys())
-            for v in node.values():
-                normalize_openai_json_schema(v)
-        elif isinstance(node, list):
-            for item in node:
-                normalize_openai_json_schema(item)
 
-    normalize_openai_json_schema(schema)
+# the schema never changes at runtime; build it once instead of per request
+PLAN_SCHEMA = build_plan_schema()
 
-    
 
+CacheMode = Literal["use", "bypass", "refresh"]
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": build_user_prompt(req)},
-            ],
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "GeneratePlanResponse",
-                    "schema": schema,
-                    "strict": True,
-                },
+# identical in-flight generations share one upstream call
+inflight_generations = SingleFlight()
+
+# how long /plans/generate waits for the LLM before answering with a local plan
+LATENCY_BUDGET_S = float(os.getenv("PLAN_LATENCY_BUDGET_SECONDS", "10"))
+
+# upstream calls left running after a fallback so they can fill the cache
+_background_upgrades: set = set()
+
+
+def _chat_kwargs(req: GeneratePlanRequest, model: str) -> dict:
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_user_prompt(req)},
+        ],
+        response_format={
+            "type": "json_schema",
+            "json_schema": {
+                "name": "GeneratePlanResponse",
+                "schema": PLAN_SCHEMA,
+                "strict": True,
             },
-            temperature=0.4,
-        )
-        content = resp.choices[0].message.content
-        data = json.loads(content)
+        },
+        temperature=0.4,
+    )
+
+
+async def _generate_upstream(req: GeneratePlanRequest, model: str) -> tuple[GeneratePlanResponse, str]:
+    resp = await llm.create_chat_completion(**_chat_kwargs(req, model))
+    content = resp.choices[0].message.content
+
+    # validate straight from the raw string; no intermediate dict
+    plan = GeneratePlanResponse.model_validate_json(content)
+    return plan, plan.model_dump_json()
+
+
+async def _generate_and_cache(req: GeneratePlanRequest, model: str, key: str):
+    plan, output_json = await _generate_upstream(req, model)
+    await run_in_threadpool(plan_cache.put, key, output_json)
+    return plan, output_json
+
+
+_CACHE_EVENTS = (
+    "memory_hits", "persistent_hits", "misses", "bypasses", "stores", "evictions", "expirations", "invalidations",
+)
+
+
+@metrics.REGISTRY.collector
+def _plan_metrics():
+    cache = plan_cache.stats()
+    coalescing = inflight_generations.stats()
+    fallback = fallback_stats.stats()
+    return [
+        (
+            "gymgpt_plan_cache_events_total",
+            "counter",
+            "Plan cache lookups and maintenance by event.",
+            [({"event": e}, cache[e]) for e in _CACHE_EVENTS],
+        ),
+        ("gymgpt_plan_cache_entries", "gauge", "Plans held in the in-memory cache tier.", [({}, cache["memory_entries"])]),
+        (
+            "gymgpt_plan_generation_callers_total",
+            "counter",
+            "Finished plan generations by whether the caller shared another caller's upstream call.",
+            [
+                ({"coalesced": "false"}, coalescing["upstream_calls"]),
+                ({"coalesced": "true"}, coalescing["coalesced_callers"]),
+            ],
+        ),
+        (
+            "gymgpt_plan_generations_in_flight",
+            "gauge",
+            "Distinct upstream plan generations running now.",
+            [({}, coalescing["in_flight"])],
+        ),
+        (
+            "gymgpt_plan_fallbacks_total",
+            "counter",
+            "Plans served from the local planner, by reason.",
+            [({"reason": r}, n) for r, n in fallback["by_reason"].items()],
+        ),
+        (
+            "gymgpt_plan_fallback_upgrades_total",
+            "counter",
+            "Upstream generations that finished in the background after a fallback.",
+            [({}, fallback["background_upgrades"])],
+        ),
+    ]
+
+
+@metrics.REGISTRY.collector
+def _job_metrics():
+    counts = active_job_counts()
+    oldest = oldest_queued_job_at()
+    return [
+        (
+            "gymgpt_plan_jobs",
+            "gauge",
+            "Plan generation jobs waiting or running (all processes).",
+            [({"status": status}, n) for status, n in counts.items()],
+        ),
+        (
+            "gymgpt_plan_jobs_oldest_queued_age_seconds",
+            "gauge",
+            "Age of the oldest job still waiting for a worker.",
+            [({}, round(time.time() - oldest, 3) if oldest else 0)],
+        ),
+        ("gymgpt_plan_job_workers_busy", "gauge", "Workers in this process running a job.", [({}, job_workers.busy)]),
+    ]
+
+
+def _local_plan(req: GeneratePlanRequest, reason: str) -> tuple[GeneratePlanResponse, str]:
+    plan = GeneratePlanResponse.model_validate(build_local_plan(req.model_dump(), get_exercise_stats(), reason))
+    return plan, plan.model_dump_json()
+
+
+async def _serve_fallback(req: GeneratePlanRequest, response: Response, reason: str):
+    plan, output_json = await run_in_threadpool(_local_plan, req, reason)
+    saved = await run_in_threadpool(
+        add_plan,
+        title=plan.title,
+        input_json=req.model_dump_json(),
+        output_json=output_json,
+    )
+    fallback_stats.served(reason)
+    response.headers["X-Plan-Source"] = "fallback"
+    response.headers["X-Plan-Fallback-Reason"] = reason
+    return {"id": saved["id"], "created_at": saved["created_at"], "source": "fallback", **plan.model_dump()}
+
+
+def _upgrade_finished(task: asyncio.Task) -> None:
+    _background_upgrades.discard(task)
+    if not task.cancelled() and task.exception() is None:
+        fallback_stats.upgraded()
 
-        plan = GeneratePlanResponse(**data)
 
-        saved = add_plan(
-            title=plan.title,
-            input_json=req.model_dump_json(),
-            output_json=plan.model_dump_json(),
+@router.post("/generate")
+async def generate_plan(
+    req: GeneratePlanRequest,
+    response: Response,
+    cache: CacheMode = Query(
+        "use",
+        description="use: serve identical requests from cache; bypass: skip the cache; "
+        "refresh: regenerate and replace the cached plan",
+    ),
+    fallback: bool = Query(
+        True,
+        description="Answer with a locally built plan (source=fallback) when the LLM misses the "
+        "latency budget, fails, or is not configured; false waits for the LLM and surfaces its errors",
+    ),
+):
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    if not os.getenv("OPENAI_API_KEY"):
+        if fallback:
+            return await _serve_fallback(req, response, "no_api_key")
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
+
+    key = make_key(req.model_dump(), namespace=model)
+    if cache == "use":
+        cached = plan_cache.get_local(key) or await run_in_threadpool(plan_cache.get_persistent, key)
+        if cached is not None:
+            data = json.loads(cached)
+            # every caller still gets its own saved plan row
+            saved = await run_in_threadpool(
+                add_plan,
+                title=data["title"],
+                input_json=req.model_dump_json(),
+                output_json=cached,
+            )
+            response.headers["X-Plan-Cache"] = "hit"
+            response.headers["X-Plan-Source"] = "llm"
+            return {"id": saved["id"], "created_at": saved["created_at"], "source": "llm", **data}
+    else:
+        plan_cache.note_bypass()
+
+    if cache == "bypass":
+        upstream = asyncio.ensure_future(_generate_upstream(req, model))
+    else:
+        upstream = asyncio.ensure_future(
+            inflight_generations.do(key, lambda: _generate_and_cache(req, model, key))
         )
 
-        return {"id": saved["id"], "created_at": saved["created_at"], **plan.model_dump()}
+    # asyncio.wait neither raises nor cancels: past the budget the upstream
+    # call is still running and, unless bypassed, lands in the plan cache
+    try:
+        await asyncio.wait({upstream}, timeout=LATENCY_BUDGET_S if fallback else None)
+    except asyncio.CancelledError:
+        if cache == "bypass":
+            upstream.cancel()
+        raise
+
+    if not upstream.done():
+        if cache == "bypass":
+            upstream.cancel()
+        else:
+            _background_upgrades.add(upstream)
+            upstream.add_done_callback(_upgrade_finished)
+            response.headers["X-Plan-Upgrade"] = "pending"
+        return await _serve_fallback(req, response, "budget")
 
+    try:
+        (plan, output_json), shared = (upstream.result(), False) if cache == "bypass" else upstream.result()
+    except asyncio.TimeoutError:
+        if fallback:
+            return await _serve_fallback(req, response, "timeout")
+        raise HTTPException(status_code=504, detail="Plan generation timed out")
+    except llm.CircuitOpenError as e:
+        if fallback:
+            return await _serve_fallback(req, response, "circuit_open")
+        raise HTTPException(
+            status_code=503,
+            detail="Plan generation is unavailable while the LLM upstream is failing",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after_s)))},
+        )
     except Exception as e:
+        if fallback:
+            return await _serve_fallback(req, response, "error")
         raise HTTPException(status_code=500, detail=f"Plan generation failed: {e}")
-    
+
+    # SQLite work goes to the threadpool so the event loop stays free;
+    # coalesced callers each still get their own plan row
+    saved = await run_in_threadpool(
+        add_plan,
+        title=plan.title,
+        input_json=req.model_dump_json(),
+        output_json=output_json,
+    )
+
+    response.headers["X-Plan-Cache"] = "miss" if cache == "use" else cache
+    response.headers["X-Plan-Source"] = "llm"
+    if shared:
+        response.headers["X-Plan-Coalesced"] = "true"
+    return {"id": saved["id"], "created_at": saved["created_at"], "source": "llm", **plan.model_dump()}
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post("/generate/stream", summary="Generate a plan, streaming each day as Server-Sent Events")
+async def generate_plan_stream(
+    req: GeneratePlanRequest,
+    cache: CacheMode = Query("use", description="Same semantics as POST /plans/generate"),
+):
+    """
+    Emits `day` events (one validated DayPlan each) as soon as the model has
+    finished writing that day, then a `done` event with the saved plan id.
+    Failures after the stream has started arrive as an `error` event.
+    """
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    if not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
+
+    key = make_key(req.model_dump(), namespace=model)
+    cached = None
+    if cache == "use":
+        cached = plan_cache.get_local(key) or await run_in_threadpool(plan_cache.get_persistent, key)
+    else:
+        plan_cache.note_bypass()
+
+    async def cached_events(output_json: str):
+        data = json.loads(output_json)
+        for day in data["weekly_split"]:
+            yield _sse("day", json.dumps(day))
+        saved = await run_in_threadpool(
+            add_plan, title=data["title"], input_json=req.model_dump_json(), output_json=output_json
+        )
+        yield _sse("done", json.dumps({"id": saved["id"], "created_at": saved["created_at"], "title": data["title"]}))
+
+    async def llm_events():
+        days = ArrayItemStream("weekly_split")
+        try:
+            async for delta in llm.stream_chat_completion(**_chat_kwargs(req, model)):
+                for raw_day in days.feed(delta):
+                    yield _sse("day", DayPlan.model_validate_json(raw_day).model_dump_json())
+
+            plan = GeneratePlanResponse.model_validate_json(days.text)
+            output_json = plan.model_dump_json()
+            saved = await run_in_threadpool(
+                add_plan, title=plan.title, input_json=req.model_dump_json(), output_json=output_json
+            )
+            if cache != "bypass":
+                await run_in_threadpool(plan_cache.put, key, output_json)
+            yield _sse("done", json.dumps({"id": saved["id"], "created_at": saved["created_at"], "title": plan.title}))
+        except asyncio.TimeoutError:
+            yield _sse("error", json.dumps({"detail": "Plan generation timed out"}))
+        except Exception as e:
+            yield _sse("error", json.dumps({"detail": f"Plan generation failed: {e}"}))
+
+    return StreamingResponse(
+        cached_events(cached) if cached is not None else llm_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # don't let a proxy buffer the stream
+            "X-Plan-Cache": "hit" if cached is not None else ("miss" if cache == "use" else cache),
+        },
+    )
+
+
+@router.get("/stats", summary="Plan generation cache and coalescing statistics")
+def plan_stats():
+    return {
+        "cache": plan_cache.stats(),
+        "coalescing": inflight_generations.stats(),
+        "fallback": fallback_stats.stats(),
+        "jobs": {**active_job_counts(), **job_workers.stats()},
+        "upstream": llm.policy.stats(),
+    }
+
+
+@router.delete("/cache", summary="Invalidate cached plan outputs")
+def invalidate_plan_cache():
+    plan_cache.invalidate()
+    return {"invalidated": True}
+
+# ---------- background generation jobs ----------
+
+JOB_CONCURRENCY = int(os.getenv("PLAN_JOBS_CONCURRENCY", "4"))
+JOB_MAX_QUEUED = int(os.getenv("PLAN_JOBS_MAX_QUEUED", "500"))
+# a running job whose worker vanished becomes claimable again after this
+JOB_LEASE_S = float(os.getenv("PLAN_JOBS_LEASE_SECONDS", "300"))
+JOB_MAX_WAIT_S = 30.0
+# upstream faults put a job back in the queue (with backoff) this many times
+# before it fails; an open circuit breaker always puts it back
+JOB_MAX_ATTEMPTS = int(os.getenv("PLAN_JOBS_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BACKOFF_MAX_S = 60.0
+
+
+async def _run_plan_job(job: dict) -> None:
+    req = GeneratePlanRequest.model_validate_json(job["request_json"])
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    key = make_key(req.model_dump(), namespace=model)
+    output_json = plan_cache.get_local(key) or await run_in_threadpool(plan_cache.get_persistent, key)
+    if output_json is not None:
+        title = json.loads(output_json)["title"]
+    else:
+        (plan, output_json), _ = await inflight_generations.do(key, lambda: _generate_and_cache(req, model, key))
+        title = plan.title
+    saved = await run_in_threadpool(
+        complete_job, job["id"], job["attempts"], title, job["request_json"], output_json
+    )
+    if saved is None:
+        logger.warning("plan job %s: lease lost to another worker, result discarded", job["id"])
+
+
+def _fail_plan_job(job: dict, exc: BaseException) -> None:
+    if isinstance(exc, asyncio.TimeoutError):
+        error = "Plan generation timed out"
+    else:
+        error = f"Plan generation failed: {exc}"
+    # the queue exists so work outlives upstream outages (and local
+    # congestion): retry those later
+    if isinstance(exc, llm.CircuitOpenError):
+        retry_job(job["id"], job["attempts"], exc.retry_after_s, error)
+    elif (is_upstream_fault(exc) or isinstance(exc, llm.SlotTimeoutError)) and job["attempts"] < JOB_MAX_ATTEMPTS:
+        retry_job(job["id"], job["attempts"], min(JOB_RETRY_BACKOFF_MAX_S, 2.0 ** job["attempts"]), error)
+    else:
+        fail_job(job["id"], error, job["attempts"])
+
+
+job_workers = WorkerPool(
+    "plans",
+    claim=lambda: claim_job(JOB_LEASE_S),
+    run=_run_plan_job,
+    fail=_fail_plan_job,
+    release=lambda job: release_job(job["id"], job["attempts"]),
+    concurrency=JOB_CONCURRENCY,
+)
+
+
+def _job_body(job: dict, plan: Optional[dict] = None) -> dict:
+    body = {
+        k: job[k]
+        for k in ("id", "status", "attempts", "created_at", "started_at", "finished_at", "not_before", "plan_id", "error")
+    }
+    if plan is not None:
+        body["plan"] = {"id": plan["id"], "created_at": plan["created_at"], **json.loads(plan["output_json"])}
+    return body
+
+
+@router.post("/jobs", status_code=202, summary="Queue a plan generation and return at once")
+async def create_plan_job(req: GeneratePlanRequest, response: Response):
+    """
+    The plan is generated by a background worker, so a client that goes away
+    doesn't cancel (and waste) the upstream call. Poll or long-poll
+    GET /plans/jobs/{id}; a finished job links to a normal saved plan. If the
+    LLM upstream is failing, the job goes back in the queue until `not_before`
+    (its `error` says why) instead of failing. Returns 429 with Retry-After when PLAN_JOBS_MAX_QUEUED jobs are waiting.
+    """
+    if not os.getenv("OPENAI_API_KEY"):
+        raise HTTPException(status_code=500, detail="OPENAI_API_KEY is not set")
+
+    queued = (await run_in_threadpool(active_job_counts))["queued"]
+    if queued >= JOB_MAX_QUEUED:
+        job_workers.reject()
+        raise HTTPException(
+            status_code=429,
+            detail="Plan generation queue is full",
+            headers={"Retry-After": str(job_workers.estimated_wait_s(queued))},
+        )
+
+    job = await run_in_threadpool(create_job, req.model_dump_json())
+    job_workers.ensure_started()
+    job_workers.notify()
+    response.headers["Location"] = f"/plans/jobs/{job['id']}"
+    return _job_body(job)
+
+
+@router.get("/jobs/{job_id}", summary="Get a generation job; `wait` long-polls until it finishes")
+async def get_plan_job(
+    job_id: int,
+    response: Response,
+    wait: float = Query(0, ge=0, le=JOB_MAX_WAIT_S, description="Seconds to wait for the job to finish"),
+):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        job = await run_in_threadpool(get_job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        remaining = deadline - loop.time()
+        if job["status"] in ("succeeded", "failed") or remaining <= 0:
+            break
+        # woken as soon as a worker here finishes it; re-checked every second
+        # in case a worker in another process does
+        await job_workers.wait_for(job_id, min(remaining, 1.0))
+
+    if job["status"] == "succeeded":
+        return _job_body(job, await run_in_threadpool(get_plan, job["plan_id"]))
+    if job["status"] != "failed":
+        response.headers["Retry-After"] = "1"
+    return _job_body(job)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison per RFC 9110 (W/ prefixes are ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+@router.get("/search", summary="Full-text search over saved plans, best match first")
+def search_saved_plans(
+    q: str = Query(..., min_length=1, max_length=200, description='Words to match; "quoted phrase", prefix*'),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque `next_cursor` from the previous page"),
+):
+    """
+    Matches plan titles, summaries, day focuses, exercise names and the
+    request (goal, experience, equipment, notes). Every word must match;
+    words are stemmed, so "squats" finds "Back Squat". Very broad queries
+    rank only the newest GYMGPT_SEARCH_WINDOW matching plans: `truncated`
+    is then true, and paging stops at the end of that window.
+    """
+    # rank order has no stable key to seek on, so the cursor carries an offset
+    offset = decode_cursor("s", cursor) if cursor else 0
+    try:
+        # one extra row says whether another page exists within the window
+        items = search_plans(q, limit=limit + 1, offset=offset)
+        truncated = plan_search_truncated(q)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Search query has no searchable words")
+    next_cursor = encode_cursor("s", offset + limit) if len(items) > limit else None
+    return {"items": items[:limit], "query": q, "limit": limit, "next_cursor": next_cursor, "truncated": truncated}
+
+
 @router.get("", summary="List saved plans")
 def list_saved_plans(
+    request: Request,
+    response: Response,
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Deprecated: prefer `cursor`. Ignored when a cursor is given."),
+    cursor: Optional[str] = Query(None, description="Opaque `next_cursor` from the previous page"),
 ):
-    return {"items": list_plans(limit=limit, offset=offset), "limit": limit, "offset": offset}
+    # a malformed cursor is a 400 even when If-None-Match would match
+    before_id = decode_cursor("p", cursor) if cursor else None
+    # read the version before the rows: a concurrent insert can then only
+    # make the ETag look older than the body, never newer
+    version = max_plan_id()
+    etag = f'"plans-{version}-{limit}-{cursor or offset}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if before_id is not None:
+        items = list_plans(limit=limit, before_id=before_id)
+    else:
+        items = list_plans(limit=limit, offset=offset)
+    next_cursor = encode_cursor("p", items[-1]["id"]) if len(items) == limit else None
+
+    response.headers.update(headers)
+    return {"items": items, "limit": limit, "offset": offset, "next_cursor": next_cursor}
+
+
+# plans never change after add_plan, so a response can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 @router.get("/{plan_id}", summary="Get a saved plan by id")
-def get_saved_plan(plan_id: int):
+def get_saved_plan(plan_id: int, request: Request):
     row = get_plan(plan_id)
     if not row:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    return {
-        "id": row["id"],
-        "created_at": row["created_at"],
-        "title": row["title"],
-        "input": json.loads(row["input_json"]),
-        "output": json.loads(row["output_json"]),
-    }
+    # bump the "v1" if the response layout below ever changes
+    etag = '"plan-v1-{}-{}"'.format(row["id"], "".join(c for c in str(row["created_at"]) if c.isdigit()))
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # input_json/output_json are already serialized JSON: splice them into
+    # the body as-is instead of json.loads + re-encoding
+    body = (
+        '{"id":%d,"created_at":%s,"title":%s,"input":%s,"output":%s}'
+        % (
+            row["id"],
+            json.dumps(row["created_at"]),
+            json.dumps(row["title"]),
+            row["input_json"],
+            row["output_json"],
+        )
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
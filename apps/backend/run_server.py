@@ -1,4 +1,16 @@
+"""
+Development server with auto-reload. For production use serve.py.
+"""
+import os
+
 import uvicorn
+from dotenv import load_dotenv
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8002, reload=True)
\ No newline at end of file
+    load_dotenv()
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("GYMGPT_HOST", "127.0.0.1"),
+        port=int(os.getenv("GYMGPT_PORT", "8000")),
+        reload=True,
+    )
@@ -0,0 +1,81 @@
+"""
+Production entry point: uvicorn with N worker processes, uvloop and httptools.
+
+    python serve.py                      # settings from the environment / .env
+    python serve.py --workers 4 --port 8000
+
+Settings (flags override the environment):
+    GYMGPT_HOST               bind address (default 127.0.0.1; 0.0.0.0 to expose)
+    GYMGPT_PORT               port (default 8000, what the frontend expects)
+    GYMGPT_WORKERS            worker processes (default: one per CPU)
+    GYMGPT_GRACEFUL_TIMEOUT   seconds in-flight requests get after SIGTERM/SIGINT (default 30)
+    GYMGPT_KEEPALIVE_TIMEOUT  idle keep-alive seconds (default 5)
+    GYMGPT_FORWARDED_ALLOW_IPS  trust X-Forwarded-* from these proxies (off when unset)
+    GYMGPT_LOG_LEVEL          uvicorn log level (default info)
+    GYMGPT_ACCESS_LOG         1 to log every request (default 0)
+CORS origins are read by main.py (GYMGPT_CORS_ORIGINS).
+
+Each worker is a separate process with its own DB pool, OpenAI clients, plan
+cache and metrics; /metrics shows the worker that answered. Background plan
+jobs are claimed atomically from SQLite, so every worker can run them.
+
+On SIGTERM the server stops accepting connections, lets in-flight requests
+finish for up to the graceful timeout, then runs the lifespan shutdown
+(queued jobs handed back, upstream and SQLite connections closed).
+
+For development with auto-reload use run_server.py.
+"""
+import argparse
+import importlib.util
+import os
+from typing import Any, Dict, Mapping
+
+from dotenv import load_dotenv
+
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def build_config(env: Mapping[str, str]) -> Dict[str, Any]:
+    """uvicorn.run() keyword arguments for the given environment."""
+    forwarded = env.get("GYMGPT_FORWARDED_ALLOW_IPS", "")
+    return {
+        "host": env.get("GYMGPT_HOST", "127.0.0.1"),
+        "port": int(env.get("GYMGPT_PORT", "8000")),
+        "workers": max(1, int(env.get("GYMGPT_WORKERS") or os.cpu_count() or 1)),
+        # uvloop/httptools have no Windows builds; fall back rather than fail
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        "ws": "none",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": int(env.get("GYMGPT_GRACEFUL_TIMEOUT", "30")),
+        "timeout_keep_alive": int(env.get("GYMGPT_KEEPALIVE_TIMEOUT", "5")),
+        "proxy_headers": bool(forwarded),
+        "forwarded_allow_ips": forwarded or None,
+        "server_header": False,
+        "log_level": env.get("GYMGPT_LOG_LEVEL", "info"),
+        "access_log": _flag(env.get("GYMGPT_ACCESS_LOG", "0")),
+    }
+
+
+def main() -> None:
+    load_dotenv()
+    config = build_config(os.environ)
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--host", default=config["host"])
+    ap.add_argument("--port", type=int, default=config["port"])
+    ap.add_argument("--workers", type=int, default=config["workers"])
+    ap.add_argument("--log-level", default=config["log_level"])
+    args = ap.parse_args()
+    config.update(host=args.host, port=args.port, workers=max(1, args.workers), log_level=args.log_level)
+
+    import uvicorn
+
+    # an import string, so each worker process imports the app itself
+    uvicorn.run("main:app", **config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# apps/backend/services/batch_planner.py
+"""
+Vectorized week planning for many users at once.
+
+The nightly job used to call planner.build_week_plan once per user. This
+module takes columnar inputs instead and computes weight deltas and soreness
+flags for every user with NumPy array operations:
+
+- rir:       (users x exercises) average RIR per exercise, NaN = no history
+- soreness:  (users x muscles) soreness levels 0-5
+- equipment: (users,) codes, see EQUIPMENT_CODES
+- days_per_week: (users,)
+
+Results come back columnar (BatchWeekPlans) and can be expanded into the
+exact dicts the scalar planner returns.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.planner import (
+    BLOCK_TEMPLATES,
+    EQUIPMENT_MODES,
+    EXERCISE_MUSCLES,
+    SORENESS_MAP,
+    focus_sequence_for_days,
+    select_blocks,
+)
+
+# index == code used in the `equipment` column
+EQUIPMENT_CODES = EQUIPMENT_MODES
+FOCUSES = ("upper", "lower", "full")
+DEFAULT_MUSCLES = tuple(SORENESS_MAP)
+
+
+def overload_for_avg_rir(avg_rir: np.ndarray) -> np.ndarray:
+    """Vectorized planner.overload_for_avg_rir (NaN -> 0.0)."""
+    avg = np.asarray(avg_rir, dtype=np.float64)
+    delta = np.where(avg >= 2, 2.5, np.where(avg <= 0, 0.0, 1.0))
+    return np.where(np.isnan(avg), 0.0, delta)
+
+
+@dataclass
+class BatchWeekPlans:
+    days_per_week: np.ndarray            # (U,)
+    equipment: np.ndarray                # (U,) codes
+    names: Dict[str, List[List[str]]]    # focus -> [equipment code] -> block names
+    blocks: Dict[str, List[dict]]        # focus -> base blocks (name is replaced per user)
+    weight_delta: Dict[str, np.ndarray]  # focus -> (U, blocks) float
+    light: Dict[str, np.ndarray]         # focus -> (U, blocks) bool
+
+    def __len__(self) -> int:
+        return len(self.days_per_week)
+
+    def _expand(self, users, today: str) -> List[dict]:
+        # pull every array into Python lists once; per-element numpy access
+        # would dominate the cost of building millions of small dicts
+        days_col = self.days_per_week[users].tolist()
+        eq_col = self.equipment[users].tolist()
+        deltas = {f: self.weight_delta[f][users].tolist() for f in FOCUSES}
+        light = {f: self.light[f][users].tolist() for f in FOCUSES}
+        light_names = {
+            f: [[f"Light {n} (reduce load 20%)" for n in row] for row in self.names[f]] for f in FOCUSES
+        }
+        sequences = {d: focus_sequence_for_days(d) for d in set(days_col)}
+
+        out = []
+        for i, (days, eq) in enumerate(zip(days_col, eq_col)):
+            seq = sequences[days]
+            week = []
+            for day_idx, focus in enumerate(seq, start=1):
+                names, lights = self.names[focus][eq], light_names[focus][eq]
+                exercises = [
+                    {**b, "name": lights[k] if is_light else names[k], "weight_delta": delta}
+                    for k, (b, delta, is_light) in enumerate(
+                        zip(self.blocks[focus], deltas[focus][i], light[focus][i])
+                    )
+                ]
+                week.append(
+                    {
+                        "date": today,
+                        "focus": focus,
+                        "equipment": EQUIPMENT_CODES[eq],
+                        "exercises": exercises,
+                        "day": day_idx,
+                    }
+                )
+            out.append({"days": days, "schedule": list(seq), "plans": week})
+        return out
+
+    def plan(self, u: int, today: Optional[str] = None) -> dict:
+        """User `u`'s week, identical to planner.build_week_plan's output."""
+        return self._expand([u], today or str(date.today()))[0]
+
+    def to_plans(self) -> List[dict]:
+        return self._expand(slice(None), str(date.today()))
+
+
+def build_week_plans(
+    days_per_week: Sequence[int],
+    rir: np.ndarray,
+    exercise_names: Sequence[str],
+    soreness: Optional[np.ndarray] = None,
+    equipment: Optional[Sequence[int]] = None,
+    muscle_names: Sequence[str] = DEFAULT_MUSCLES,
+) -> BatchWeekPlans:
+    """
+    Plan a week for every row of the inputs in one shot.
+
+    `exercise_names` labels the columns of `rir` and must use the names the
+    plan will contain after equipment substitution (e.g. "DB Row"), exactly
+    like the keys of last_log_by_ex in the scalar planner.
+    """
+    days = np.asarray(days_per_week, dtype=np.int64)
+    users = len(days)
+    rir = np.asarray(rir, dtype=np.float64).reshape(users, len(exercise_names))
+    eq = np.zeros(users, dtype=np.int64) if equipment is None else np.asarray(equipment, dtype=np.int64)
+    if soreness is None:
+        sore = np.zeros((users, len(muscle_names)), dtype=bool)
+    else:
+        sore = np.asarray(soreness).reshape(users, len(muscle_names)) >= 3
+
+    # one extra all-zero column so "exercise not in the matrix" indexes to 0.0
+    deltas = np.concatenate([overload_for_avg_rir(rir), np.zeros((users, 1))], axis=1)
+    missing = deltas.shape[1] - 1
+    col = {n: i for i, n in enumerate(exercise_names)}
+
+    names: Dict[str, List[List[str]]] = {}
+    blocks: Dict[str, List[dict]] = {}
+    weight_delta: Dict[str, np.ndarray] = {}
+    light: Dict[str, np.ndarray] = {}
+    for focus in FOCUSES:
+        base = select_blocks(focus)
+        blocks[focus] = [dict(b) for b in base]
+        names[focus] = [[n for n, _, _ in BLOCK_TEMPLATES[(focus, code)]] for code in EQUIPMENT_CODES]
+        n_blocks = len(base)
+
+        # per equipment code: which delta column each block reads, and which
+        # muscles aggravate it -> (codes x blocks) and (codes x blocks x muscles)
+        cols = np.array([[col.get(n, missing) for n in row] for row in names[focus]], dtype=np.int64)
+        hits = np.array(
+            [
+                [[m in EXERCISE_MUSCLES.get(n, ()) for m in muscle_names] for n in row]
+                for row in names[focus]
+            ],
+            dtype=bool,
+        ).reshape(len(EQUIPMENT_CODES), n_blocks, len(muscle_names))
+
+        user_cols = cols[eq]                                   # (U, B)
+        weight_delta[focus] = np.take_along_axis(deltas, user_cols, axis=1)
+        # a block is light if any sore (>= 3) muscle maps to it
+        light[focus] = np.einsum("um,ubm->ub", sore.astype(np.int8), hits[eq].astype(np.int8)) > 0
+
+    return BatchWeekPlans(days, eq, names, blocks, weight_delta, light)
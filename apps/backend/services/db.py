@@ -1,56 +1,559 @@
 # apps/backend/services/db.py
 from __future__ import annotations
+import json
+import os
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterable, Iterator
 from datetime import datetime, timedelta
 
+from services import metrics, plan_codec
+from services.writer import GroupCommitWriter
+
+# per-function latency/error metrics for the public query functions below
+_timed = metrics.timed(metrics.DB_CALL_SECONDS, metrics.DB_ERRORS)
+
 # .../apps/backend/services/db.py -> data/gymgpt.db
 DB_DIR = (Path(__file__).resolve().parent / ".." / ".." / "data").resolve()
-DB_DIR.mkdir(parents=True, exist_ok=True)
-DB_PATH = DB_DIR / "gymgpt.db"
+DB_PATH = Path(os.getenv("GYMGPT_DB_PATH") or DB_DIR / "gymgpt.db")
+
+# Pool tuning (env overridable)
+POOL_SIZE = int(os.getenv("GYMGPT_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT_S = float(os.getenv("GYMGPT_DB_POOL_TIMEOUT", "10"))
+# connections idle longer than this get a cheap liveness probe on checkout
+HEALTHCHECK_AFTER_S = float(os.getenv("GYMGPT_DB_HEALTHCHECK_AFTER", "30"))
+# sqlite3 keeps an LRU of prepared statements per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = int(os.getenv("GYMGPT_DB_STATEMENT_CACHE", "256"))
+# rolling windows (in sets) that exercise_stats is maintained over
+STATS_WINDOWS = tuple(sorted({int(w) for w in os.getenv("GYMGPT_STATS_WINDOWS", "3,10").split(",")}))
+# how many recent sets per exercise the latest_sets table keeps (never fewer
+# than the largest stats window); after raising it or changing the windows,
+# run `python manage.py rebuild-latest` to refill older rows
+LATEST_SETS_PER_EXERCISE = max(int(os.getenv("GYMGPT_LATEST_SETS", "5")), *STATS_WINDOWS)
+# single-row inserts (add_log, add_plan, complete_job) go through one writer
+# thread per process and are committed in groups (services/writer.py)
+WRITE_BATCHING = os.getenv("GYMGPT_WRITE_BATCHING", "1").lower() in ("1", "true", "yes")
+WRITE_BATCH_MAX = int(os.getenv("GYMGPT_WRITE_BATCH_MAX", "64"))
+WRITE_BATCH_WAIT_S = float(os.getenv("GYMGPT_WRITE_BATCH_WAIT_MS", "1")) / 1000
+
 
-def _conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+def _open_connection(path: Path = None) -> sqlite3.Connection:
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
     conn.row_factory = sqlite3.Row
-    # light concurrency safety + durability for dev
+    # light concurrency safety + durability for dev; runs once per connection
     conn.execute("PRAGMA journal_mode = WAL;")
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA busy_timeout = 5000;")
     return conn
 
+
+class ConnectionPool:
+    """
+    Small bounded pool of SQLite connections.
+
+    A worker thread checks a connection out for the duration of one call and
+    hands it back afterwards, so at most `size` connections ever exist and a
+    busy threadpool keeps reusing the same warm connections (PRAGMAs already
+    applied, prepared statements cached). Idle connections are kept LIFO so the
+    hottest one is handed out first.
+    """
+
+    def __init__(self, path: Path, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT_S):
+        if size < 1:
+            raise ValueError("pool size must be >= 1")
+        self.path = Path(path)
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[tuple] = []  # (conn, last_used_monotonic)
+        self._all: set = set()
+        self._closed = False
+
+    def _checkout(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            entry = self._idle.pop() if self._idle else None
+        if entry is not None:
+            conn, last_used = entry
+            if time.monotonic() - last_used < HEALTHCHECK_AFTER_S or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+        conn = _open_connection(self.path)
+        with self._lock:
+            self._all.add(conn)
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection; commit on success, roll back on error."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"no SQLite connection available within {self.timeout}s")
+        try:
+            conn = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        broken = False
+        try:
+            with conn:
+                yield conn
+        except sqlite3.DatabaseError:
+            broken = not self._is_healthy(conn)
+            raise
+        finally:
+            if broken or conn.in_transaction:
+                # a caller left a transaction open (e.g. an exception escaped
+                # mid-iteration); never hand that state to the next thread
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    broken = True
+            with self._lock:
+                keep = not broken and not self._closed
+                if keep:
+                    self._idle.append((conn, time.monotonic()))
+            if not keep:
+                self._discard(conn)
+            self._slots.release()
+
+    def health(self) -> Dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": len(self._all),
+                "idle": len(self._idle),
+                "closed": self._closed,
+            }
+
+    def close(self) -> None:
+        """Close every idle connection and refuse new checkouts."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None or _pool._closed:
+        with _pool_lock:
+            if _pool is None or _pool._closed:
+                _pool = ConnectionPool(DB_PATH, POOL_SIZE)
+    return _pool
+
+
+def close_pool() -> None:
+    """Release all pooled connections and stop the writer (called on app shutdown)."""
+    global _pool, _writer
+    with _pool_lock:
+        writer, _writer = _writer, None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+    if writer is not None:
+        writer.close()
+
+
+_writer: Optional[GroupCommitWriter] = None
+
+
+def _write(fn):
+    """Run fn(conn) in a write transaction: grouped by the writer thread, or alone on a pooled connection."""
+    global _writer
+    if not WRITE_BATCHING:
+        with _conn() as conn:
+            return fn(conn)
+    if not _schema_ready:
+        init_db()
+    writer = _writer
+    if writer is None:
+        with _pool_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter(
+                    lambda: _open_connection(DB_PATH), max_batch=WRITE_BATCH_MAX, max_wait_s=WRITE_BATCH_WAIT_S
+                )
+            writer = _writer
+    return writer.run(fn)
+
+
+# connections inherited through fork() belong to the parent: the child
+# starts a pool of its own and never closes (or garbage-collects) the
+# inherited ones, since SQLite must not touch a handle opened in another process
+_inherited_pools: List[object] = []
+
+
+def _reset_after_fork() -> None:
+    global _pool, _pool_lock, _schema_lock, _writer
+    if _pool is not None:
+        _inherited_pools.append(_pool)
+    # the writer thread did not survive the fork; its connection is the parent's
+    if _writer is not None:
+        _inherited_pools.append(_writer)
+    _pool, _writer = None, None
+    _pool_lock = threading.Lock()
+    _schema_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _conn():
+    if not _schema_ready:
+        init_db()
+    return get_pool().connection()
+
+
+@metrics.REGISTRY.collector
+def _pool_metrics():
+    pool = _pool
+    if pool is None:
+        return []
+    health = pool.health()
+    return [
+        ("gymgpt_db_pool_size", "gauge", "Maximum pooled SQLite connections.", [({}, health["size"])]),
+        (
+            "gymgpt_db_pool_connections",
+            "gauge",
+            "Open pooled SQLite connections by state.",
+            [({"state": "idle"}, health["idle"]), ({"state": "in_use"}, health["open"] - health["idle"])],
+        ),
+    ]
+
+# schema creation/migration runs once per process; _conn() triggers it
+# lazily for code paths that never went through the app's lifespan
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+@_timed
 def init_db() -> None:
-    with _conn() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS logs(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                reps INTEGER NOT NULL,
-                weight_kg REAL NOT NULL,
-                rir INTEGER NOT NULL,
-                focus TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_logs_name_time ON logs(name, timestamp);"
+    """Create or migrate the schema. Only the first call per process does any work."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            with get_pool().connection() as conn:
+                # one write transaction, so worker processes starting together
+                # don't race on the DROP/CREATE TRIGGER pairs
+                conn.execute("BEGIN IMMEDIATE")
+                _create_schema(conn)
+            _schema_ready = True
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS logs(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            reps INTEGER NOT NULL,
+            weight_kg REAL NOT NULL,
+            rir INTEGER NOT NULL,
+            focus TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logs_name_time ON logs(name, timestamp);"
+    )
+    # serves "WHERE focus = ? [AND id < ?] ORDER BY id DESC" without a scan
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logs_focus_id ON logs(focus, id);"
+    )
+    # get_recent_sets_map filters on a time window
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);"
+    )
+    _init_latest_sets(conn)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plans(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            title TEXT NOT NULL,
+            input_json TEXT NOT NULL,
+            output_json TEXT NOT NULL,
+            codec INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    # input_json/output_json hold services.plan_codec payloads (BLOBs) and
+    # `codec` says how to read them; rows from before the column existed are
+    # plain TEXT (codec 0) until `manage.py compress-plans` rewrites them
+    plan_columns = {r["name"] for r in conn.execute("PRAGMA table_info(plans)")}
+    if "codec" not in plan_columns:
+        conn.execute("ALTER TABLE plans ADD COLUMN codec INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plans_created_at ON plans(created_at);"
+    )
+    _init_plan_search(conn)
+    # generated plan outputs keyed by a hash of the normalized request;
+    # created_at is epoch seconds so TTL checks are plain arithmetic
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plan_cache(
+            key TEXT PRIMARY KEY,
+            output_json TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        """
+    )
+    # background plan generations (services/jobs.py); a running job whose
+    # lease has expired (its worker died) is claimable again
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plan_jobs(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            request_json TEXT NOT NULL,
+            plan_id INTEGER REFERENCES plans(id),
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            lease_until REAL,
+            not_before REAL
+        );
+        """
+    )
+    # not_before: a queued job put back after an upstream fault waits until then
+    job_columns = {r["name"] for r in conn.execute("PRAGMA table_info(plan_jobs)")}
+    if "not_before" not in job_columns:
+        conn.execute("ALTER TABLE plan_jobs ADD COLUMN not_before REAL")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_plan_jobs_status_id ON plan_jobs(status, id);"
+    )
+    # LLM workout explanations keyed by a fingerprint of the plan's content
+    # (see services/explanations.py); filled on demand and by prewarming
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS explanations(
+            fingerprint TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            explanation TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        """
+    )
+
+# ---------- latest N sets + rolling stats per exercise (materialized) ----------
+
+def _stats_refresh_sql(name_expr: str, window: int) -> str:
+    """Recompute one (exercise, window) row of exercise_stats from latest_sets."""
+    recent = (
+        f"SELECT reps, weight_kg, rir, timestamp FROM latest_sets WHERE name = {name_expr} "
+        f"ORDER BY timestamp DESC, log_id DESC LIMIT {int(window)}"
+    )
+    top = f"FROM ({recent}) ORDER BY weight_kg DESC, reps DESC LIMIT 1"
+    return f"""
+    INSERT OR REPLACE INTO exercise_stats(
+        name, window_size, sets, avg_rir, avg_volume, avg_e1rm,
+        top_weight_kg, top_reps, last_timestamp
+    )
+    SELECT {name_expr}, {int(window)}, COUNT(*),
+           AVG(MAX(rir, 0)),
+           AVG(reps * weight_kg),
+           AVG(weight_kg * (1 + reps / 30.0)),
+           (SELECT weight_kg {top}),
+           (SELECT reps {top}),
+           MAX(timestamp)
+    FROM ({recent})
+    """
+
+def _latest_sets_trigger_sql() -> str:
+    stats = ";\n".join(_stats_refresh_sql("NEW.name", w) for w in STATS_WINDOWS)
+    # add_logs_bulk suspends the trigger with a row in bulk_load_guard
+    # rather than dropping it: DDL on the write path would invalidate every
+    # connection's prepared statements
+    return f"""CREATE TRIGGER trg_logs_latest_sets AFTER INSERT ON logs
+    WHEN NOT EXISTS (SELECT 1 FROM bulk_load_guard)
+    BEGIN
+        INSERT INTO latest_sets(log_id, name, reps, weight_kg, rir, timestamp)
+        VALUES (NEW.id, NEW.name, NEW.reps, NEW.weight_kg, NEW.rir, NEW.timestamp);
+        DELETE FROM latest_sets
+        WHERE log_id IN (
+            SELECT log_id FROM latest_sets
+            WHERE name = NEW.name
+            ORDER BY timestamp DESC, log_id DESC
+            LIMIT -1 OFFSET {int(LATEST_SETS_PER_EXERCISE)}
+        );
+        {stats};
+    END;
+    """
+
+def _init_latest_sets(conn: sqlite3.Connection) -> None:
+    """
+    latest_sets holds the newest LATEST_SETS_PER_EXERCISE sets of every
+    exercise, and exercise_stats the rolling aggregates over each of
+    STATS_WINDOWS. A trigger on logs keeps both current for every insert
+    path (add_log, bulk imports, manual SQL); each insert touches a bounded
+    number of rows, independent of history length.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS latest_sets(
+            log_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            reps INTEGER NOT NULL,
+            weight_kg REAL NOT NULL,
+            rir INTEGER NOT NULL,
+            timestamp DATETIME
+        );
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_latest_sets_name_time "
+        "ON latest_sets(name, timestamp DESC, log_id DESC);"
+    )
+    # avg_rir clamps negatives to 0 like planner.progressive_overload;
+    # avg_e1rm uses Epley; top_* is the heaviest set in the window
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS exercise_stats(
+            name TEXT NOT NULL,
+            window_size INTEGER NOT NULL,
+            sets INTEGER NOT NULL,
+            avg_rir REAL,
+            avg_volume REAL,
+            avg_e1rm REAL,
+            top_weight_kg REAL,
+            top_reps INTEGER,
+            last_timestamp DATETIME,
+            PRIMARY KEY (name, window_size)
+        );
+        """
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS bulk_load_guard(active INTEGER PRIMARY KEY);")
+    # recreate when LATEST_SETS_PER_EXERCISE / STATS_WINDOWS changed (only
+    # then: a schema change makes every connection re-prepare)
+    trigger_sql = _latest_sets_trigger_sql()
+    existing = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_logs_latest_sets'"
+    ).fetchone()
+    if existing is None or existing[0] != trigger_sql.strip().rstrip(";"):
+        conn.execute("DROP TRIGGER IF EXISTS trg_logs_latest_sets;")
+        conn.execute(trigger_sql)
+    # first run against an existing database: backfill once
+    if conn.execute("SELECT 1 FROM latest_sets LIMIT 1").fetchone() is None and \
+            conn.execute("SELECT 1 FROM logs LIMIT 1").fetchone() is not None:
+        _rebuild_latest_sets(conn)
+    elif conn.execute("SELECT 1 FROM exercise_stats LIMIT 1").fetchone() is None and \
+            conn.execute("SELECT 1 FROM latest_sets LIMIT 1").fetchone() is not None:
+        _refresh_stats(conn, [r[0] for r in conn.execute("SELECT DISTINCT name FROM latest_sets")])
+
+def _refresh_stats(conn: sqlite3.Connection, names: Iterable[str]) -> None:
+    statements = [_stats_refresh_sql(":name", w) for w in STATS_WINDOWS]
+    for name in names:
+        for sql in statements:
+            conn.execute(sql, {"name": name})
+
+def _rebuild_latest_sets(conn: sqlite3.Connection) -> int:
+    conn.execute("DELETE FROM latest_sets;")
+    cur = conn.execute(
+        """
+        INSERT INTO latest_sets(log_id, name, reps, weight_kg, rir, timestamp)
+        SELECT id, name, reps, weight_kg, rir, timestamp
+        FROM (
+            SELECT id, name, reps, weight_kg, rir, timestamp,
+                   ROW_NUMBER() OVER (PARTITION BY name ORDER BY timestamp DESC, id DESC) AS rn
+            FROM logs
         )
+        WHERE rn <= ?
+        """,
+        (LATEST_SETS_PER_EXERCISE,),
+    )
+    kept = cur.rowcount
+    conn.execute("DELETE FROM exercise_stats;")
+    _refresh_stats(conn, [r[0] for r in conn.execute("SELECT DISTINCT name FROM latest_sets")])
+    return kept
+
+def _refresh_latest_sets(conn: sqlite3.Connection, names: Iterable[str]) -> None:
+    names = list(names)
+    for name in names:
+        conn.execute("DELETE FROM latest_sets WHERE name = ?", (name,))
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS plans(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                title TEXT NOT NULL,
-                input_json TEXT NOT NULL,
-                output_json TEXT NOT NULL
-            );
-            """
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_plans_created_at ON plans(created_at);"
+            INSERT INTO latest_sets(log_id, name, reps, weight_kg, rir, timestamp)
+            SELECT id, name, reps, weight_kg, rir, timestamp
+            FROM logs
+            WHERE name = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+            """,
+            (name, LATEST_SETS_PER_EXERCISE),
         )
+    _refresh_stats(conn, names)
+
+@_timed
+def rebuild_latest_sets() -> int:
+    """Recompute latest_sets and exercise_stats from logs (backfill / repair). Returns sets kept."""
+    with _conn() as conn:
+        return _rebuild_latest_sets(conn)
+
+@_timed
+def get_exercise_stats(window: int = 3, names: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """
+    Precomputed rolling aggregates over each exercise's last `window` sets:
+    { name: {sets, avg_rir, avg_volume, avg_e1rm, top_weight_kg, top_reps, last_timestamp} }
+    """
+    if window not in STATS_WINDOWS:
+        raise ValueError(f"window {window} is not maintained; configured windows: {STATS_WINDOWS}")
+    sql = (
+        "SELECT name, sets, avg_rir, avg_volume, avg_e1rm, top_weight_kg, top_reps, last_timestamp "
+        "FROM exercise_stats WHERE window_size = ?"
+    )
+    params: List = [window]
+    if names is not None:
+        names = list(names)
+        if not names:
+            return {}
+        sql += f" AND name IN ({','.join('?' * len(names))})"
+        params.extend(names)
+    with _conn() as conn:
+        out = {}
+        for r in conn.execute(sql, params):
+            d = dict(r)
+            out[d.pop("name")] = d
+        return out
 
+@_timed
 def add_log(
     name: str,
     reps: int,
@@ -58,40 +561,112 @@ def add_log(
     rir: int,
     focus: Optional[str] = None,
 ) -> Dict:
-    with _conn() as conn:
-        cur = conn.execute(
-            "INSERT INTO logs(name, reps, weight_kg, rir, focus) VALUES (?,?,?,?,?)",
-            (name, reps, weight_kg, rir, focus),
-        )
-        log_id = cur.lastrowid
+    def insert(conn: sqlite3.Connection) -> Dict:
         row = conn.execute(
-            "SELECT id, name, reps, weight_kg, rir, focus, timestamp FROM logs WHERE id = ?",
-            (log_id,),
+            "INSERT INTO logs(name, reps, weight_kg, rir, focus) VALUES (?,?,?,?,?) "
+            "RETURNING id, name, reps, weight_kg, rir, focus, timestamp",
+            (name, reps, weight_kg, rir, focus),
         ).fetchone()
         return dict(row)
 
-def get_logs(focus: Optional[str] = None) -> List[Dict]:
+    return _write(insert)
+
+# timestamp may be NULL in bulk rows; fall back to the column default then
+_BULK_LOG_INSERT = (
+    "INSERT INTO logs(name, reps, weight_kg, rir, focus, timestamp) "
+    "VALUES (?,?,?,?,?,COALESCE(?, CURRENT_TIMESTAMP))"
+)
+
+@_timed
+def add_logs_bulk(rows: Iterable[tuple], chunk_size: int = 5000) -> int:
+    """
+    Insert many (name, reps, weight_kg, rir, focus, timestamp) tuples.
+
+    Rows go in with chunked executemany calls inside ONE transaction, so
+    either every row lands or none do, and the WAL is synced once. That
+    transaction holds the write lock throughout: callers must bound `rows`
+    so it commits well inside busy_timeout (routes/logs.py BULK_MAX_ROWS).
+    """
+    inserted = 0
+    names = set()
+    chunk: List[tuple] = []
     with _conn() as conn:
-        if focus:
-            cur = conn.execute(
-                """
-                SELECT id, name, reps, weight_kg, rir, focus, timestamp
-                FROM logs
-                WHERE focus = ?
-                ORDER BY id DESC
-                """,
-                (focus,),
-            )
-        else:
-            cur = conn.execute(
-                """
-                SELECT id, name, reps, weight_kg, rir, focus, timestamp
-                FROM logs
-                ORDER BY id DESC
-                """
-            )
-        return [dict(r) for r in cur.fetchall()]
+        # The latest_sets trigger would re-trim once per row; the guard row
+        # suspends it. We hold the write lock for the whole transaction, so
+        # no other insert can slip past while it is suspended (and nobody
+        # else ever sees the row); touched exercises are refreshed once.
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO bulk_load_guard(active) VALUES (1)")
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                conn.executemany(_BULK_LOG_INSERT, chunk)
+                inserted += len(chunk)
+                names.update(r[0] for r in chunk)
+                chunk.clear()
+        if chunk:
+            conn.executemany(_BULK_LOG_INSERT, chunk)
+            inserted += len(chunk)
+            names.update(r[0] for r in chunk)
+        _refresh_latest_sets(conn, names)
+        conn.execute("DELETE FROM bulk_load_guard")
+    return inserted
 
+_LOG_COLUMNS = "id, name, reps, weight_kg, rir, focus, timestamp"
+
+def _logs_query(focus: Optional[str], before_id: Optional[int]) -> tuple:
+    where, params = [], []
+    if focus:
+        where.append("focus = ?")
+        params.append(focus)
+    if before_id is not None:
+        where.append("id < ?")
+        params.append(before_id)
+    sql = f"SELECT {_LOG_COLUMNS} FROM logs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY id DESC", params
+
+@_timed
+def get_logs(
+    focus: Optional[str] = None,
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Logs newest first. `before_id` is the keyset cursor (last id of the
+    previous page); leave `limit` as None only for small, bounded reads.
+    """
+    sql, params = _logs_query(focus, before_id)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with _conn() as conn:
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+@_timed
+def iter_logs(focus: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict]:
+    """
+    Stream every matching log, newest first, `batch_size` rows at a time.
+
+    Uses its own connection rather than a pooled one so a slow consumer
+    (e.g. a large export) can't pin a pool slot for the whole download.
+    """
+    sql, params = _logs_query(focus, None)
+    init_db()
+    conn = _open_connection()
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            for r in batch:
+                yield dict(r)
+    finally:
+        conn.close()
+
+@_timed
 def get_recent_sets_map(days: int = 14) -> Dict[str, List[Dict]]:
     """
     Returns: { exercise_name: [ {reps, weight_kg, rir, timestamp}, ... ] }
@@ -121,69 +696,510 @@ def get_recent_sets_map(days: int = 14) -> Dict[str, List[Dict]]:
             )
     return out
 
-def get_latest_by_exercise(limit_per_exercise: int = 3) -> Dict[str, List[Dict]]:
+@_timed
+def get_latest_by_exercise(
+    limit_per_exercise: int = 3,
+    names: Optional[Iterable[str]] = None,
+) -> Dict[str, List[Dict]]:
     """
     Top-N latest sets for each exercise (useful if you don't want a date window).
+
+    Served from the latest_sets table with one indexed read; pass `names` to
+    fetch only the exercises a plan actually uses.
     """
+    if limit_per_exercise > LATEST_SETS_PER_EXERCISE:
+        return _latest_by_exercise_scan(limit_per_exercise, names)
+    sql = "SELECT name, reps, weight_kg, rir, timestamp FROM latest_sets"
+    params: List = []
+    if names is not None:
+        names = list(names)
+        if not names:
+            return {}
+        sql += f" WHERE name IN ({','.join('?' * len(names))})"
+        params.extend(names)
+    sql += " ORDER BY name ASC, timestamp DESC, log_id DESC"
+    with _conn() as conn:
+        return _bucket_latest(conn.execute(sql, params), limit_per_exercise)
+
+def _bucket_latest(cur, limit_per_exercise: int) -> Dict[str, List[Dict]]:
+    tmp: Dict[str, List[Dict]] = {}
+    for r in cur:
+        bucket = tmp.setdefault(r["name"], [])
+        if len(bucket) < limit_per_exercise:
+            bucket.append(
+                {
+                    "reps": r["reps"],
+                    "weight_kg": r["weight_kg"],
+                    "rir": r["rir"],
+                    "timestamp": r["timestamp"],
+                }
+            )
+    return tmp
+
+def _latest_by_exercise_scan(
+    limit_per_exercise: int,
+    names: Optional[Iterable[str]] = None,
+) -> Dict[str, List[Dict]]:
+    """Full scan of logs; only for N beyond what latest_sets keeps."""
     with _conn() as conn:
-        # SQLite doesn't have DISTINCT ON; emulate via window function in newer versions
-        # fallback: simple group in Python
         cur = conn.execute(
             """
             SELECT name, reps, weight_kg, rir, timestamp
             FROM logs
-            ORDER BY name ASC, timestamp DESC
+            ORDER BY name ASC, timestamp DESC, id DESC
             """
         )
-        tmp: Dict[str, List[Dict]] = {}
-        for r in cur.fetchall():
-            d = dict(r)
-            bucket = tmp.setdefault(d["name"], [])
-            if len(bucket) < limit_per_exercise:
-                bucket.append(
-                    {
-                        "reps": d["reps"],
-                        "weight_kg": d["weight_kg"],
-                        "rir": d["rir"],
-                        "timestamp": d["timestamp"],
-                    }
-                )
-        return tmp
+        out = _bucket_latest(cur, limit_per_exercise)
+    if names is not None:
+        wanted = set(names)
+        out = {k: v for k, v in out.items() if k in wanted}
+    return out
+
+@_timed
 def add_plan(title: str, input_json: str, output_json: str) -> Dict:
+    return _write(lambda conn: _insert_plan(conn, title, input_json, output_json))
+
+def _insert_plan(conn: sqlite3.Connection, title: str, input_json: str, output_json: str) -> Dict:
+    codec = plan_codec.CURRENT
+    row = conn.execute(
+        "INSERT INTO plans(title, input_json, output_json, codec) VALUES (?,?,?,?) RETURNING id, created_at",
+        (title, plan_codec.encode(input_json, codec), plan_codec.encode(output_json, codec), codec),
+    ).fetchone()
+    conn.execute(_PLAN_SEARCH_INSERT, (row["id"], *_plan_search_fields(title, input_json, output_json)))
+    return {
+        "id": row["id"],
+        "created_at": row["created_at"],
+        "title": title,
+        "input_json": input_json,
+        "output_json": output_json,
+    }
+
+def _decode_plan(row: sqlite3.Row) -> Dict:
+    plan = dict(row)
+    codec = plan.pop("codec")
+    plan["input_json"] = plan_codec.decode(plan["input_json"], codec)
+    plan["output_json"] = plan_codec.decode(plan["output_json"], codec)
+    return plan
+
+@_timed
+def list_plans(limit: int = 20, offset: int = 0, before_id: Optional[int] = None) -> List[Dict]:
+    """
+    Newest plans first. Pass `before_id` (the last id of the previous page)
+    for keyset pagination: it seeks straight into the primary key instead of
+    walking past `offset` rows, so every page costs the same.
+    """
+    with _conn() as conn:
+        if before_id is not None:
+            cur = conn.execute(
+                """
+                SELECT id, created_at, title
+                FROM plans
+                WHERE id < ?
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (before_id, limit),
+            )
+        else:
+            cur = conn.execute(
+                """
+                SELECT id, created_at, title
+                FROM plans
+                ORDER BY id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (limit, offset),
+            )
+        return [dict(r) for r in cur.fetchall()]
+
+@_timed
+def max_plan_id() -> int:
+    """Highest plan id (0 when empty); plans are append-only, so this versions the listing."""
+    with _conn() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM plans").fetchone()[0]
+
+@_timed
+def get_plan(plan_id: int) -> Optional[Dict]:
     with _conn() as conn:
-        cur = conn.execute(
-            "INSERT INTO plans(title, input_json, output_json) VALUES (?,?,?)",
-            (title, input_json, output_json),
-        )
-        plan_id = cur.lastrowid
         row = conn.execute(
-            "SELECT id, created_at, title, input_json, output_json FROM plans WHERE id = ?",
+            """
+            SELECT id, created_at, title, input_json, output_json, codec
+            FROM plans
+            WHERE id = ?
+            """,
             (plan_id,),
         ).fetchone()
-        return dict(row)
+        return _decode_plan(row) if row else None
+
+@_timed
+def recompress_plans(codec: int = plan_codec.CURRENT, batch_size: int = 500) -> int:
+    """
+    Re-encode every plan not stored with `codec`, in id order and one short
+    transaction per batch so the app keeps writing meanwhile. Returns the
+    number of rows rewritten. Passing plan_codec.PLAIN undoes compression.
+    """
+    rewritten, last_id = 0, 0
+    while True:
+        with _conn() as conn:
+            rows = conn.execute(
+                "SELECT id, input_json, output_json, codec FROM plans WHERE id > ? AND codec != ? ORDER BY id LIMIT ?",
+                (last_id, codec, batch_size),
+            ).fetchall()
+            if not rows:
+                return rewritten
+            conn.executemany(
+                "UPDATE plans SET input_json = ?, output_json = ?, codec = ? WHERE id = ?",
+                (
+                    (
+                        plan_codec.encode(plan_codec.decode(r["input_json"], r["codec"]), codec),
+                        plan_codec.encode(plan_codec.decode(r["output_json"], r["codec"]), codec),
+                        codec,
+                        r["id"],
+                    )
+                    for r in rows
+                ),
+            )
+        rewritten += len(rows)
+        last_id = rows[-1]["id"]
+
+@_timed
+def plan_storage_stats() -> Dict[int, Dict]:
+    """Plans and stored payload bytes per codec."""
+    with _conn() as conn:
+        rows = conn.execute(
+            "SELECT codec, COUNT(*) AS plans, SUM(LENGTH(CAST(input_json AS BLOB)) + LENGTH(CAST(output_json AS BLOB))) "
+            "AS payload_bytes FROM plans GROUP BY codec"
+        ).fetchall()
+        return {r["codec"]: {"plans": r["plans"], "payload_bytes": r["payload_bytes"]} for r in rows}
+
+@_timed
+def vacuum() -> None:
+    """Rebuild the database file so pages freed by recompress_plans go back to the OS."""
+    with _conn() as conn:
+        conn.execute("VACUUM")
+
+
+# ---------- full-text search over plans ----------
 
-def list_plans(limit: int = 20, offset: int = 0) -> List[Dict]:
+# bm25 column weights: a hit in the title counts most, summary prose least
+PLAN_SEARCH_COLUMNS = ("title", "summary", "focus", "exercises", "request")
+PLAN_SEARCH_WEIGHTS = (5.0, 1.0, 2.0, 2.0, 2.0)
+# how many of the newest matching plans search_plans ranks
+PLAN_SEARCH_WINDOW = int(os.getenv("GYMGPT_SEARCH_WINDOW", "2000"))
+_PLAN_SEARCH_INSERT = (
+    f"INSERT INTO plans_fts(rowid, {', '.join(PLAN_SEARCH_COLUMNS)}) "
+    f"VALUES (?, {', '.join('?' * len(PLAN_SEARCH_COLUMNS))})"
+)
+
+def _init_plan_search(conn: sqlite3.Connection) -> None:
+    """
+    plans_fts indexes the searchable text of every plan under its plan id.
+    It is contentless (content=''): the text lives compressed in `plans`, the
+    index keeps only tokens, and search results are joined back to `plans`
+    by rowid. Plans are append-only, so _insert_plan is the only writer.
+    """
+    conn.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS plans_fts USING fts5(
+            {', '.join(PLAN_SEARCH_COLUMNS)},
+            content = '',
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        );
+        """
+    )
+    # first run against an existing database: backfill once
+    if conn.execute("SELECT 1 FROM plans_fts LIMIT 1").fetchone() is None and \
+            conn.execute("SELECT 1 FROM plans LIMIT 1").fetchone() is not None:
+        _rebuild_plan_search(conn)
+
+def _plan_search_fields(title: str, input_json: str, output_json: str) -> tuple:
+    """The plans_fts columns for one plan (parsed once, at write time)."""
+    try:
+        output = json.loads(output_json)
+        request = json.loads(input_json)
+    except ValueError:
+        output, request = {}, {}
+    output = output if isinstance(output, dict) else {}
+    request = request if isinstance(request, dict) else {}
+    days = [d for d in output.get("weekly_split") or [] if isinstance(d, dict)]
+    exercises = dict.fromkeys(
+        item.get("name", "")
+        for day in days
+        for item in (day.get("main") or []) + (day.get("accessories") or [])
+        if isinstance(item, dict)
+    )
+    request_words = (request.get(k) for k in ("goal", "experience", "equipment", "soreness_notes", "constraints"))
+    return (
+        title,
+        output.get("summary") or "",
+        " | ".join(dict.fromkeys(d.get("focus") or "" for d in days)),
+        " | ".join(exercises),
+        " ".join(str(w) for w in request_words if w),
+    )
+
+def _rebuild_plan_search(conn: sqlite3.Connection) -> int:
+    conn.execute("INSERT INTO plans_fts(plans_fts) VALUES ('delete-all')")
+    indexed = 0
+    for r in conn.execute("SELECT id, title, input_json, output_json, codec FROM plans"):
+        fields = _plan_search_fields(
+            r["title"],
+            plan_codec.decode(r["input_json"], r["codec"]),
+            plan_codec.decode(r["output_json"], r["codec"]),
+        )
+        conn.execute(_PLAN_SEARCH_INSERT, (r["id"], *fields))
+        indexed += 1
+    conn.execute("INSERT INTO plans_fts(plans_fts) VALUES ('optimize')")
+    return indexed
+
+_SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+def plan_search_query(text: str) -> str:
+    """
+    Turn user input into a safe FTS5 query: every word must match (stemmed),
+    "quoted words" match as a phrase, and a trailing * makes a prefix term.
+    FTS5 operators and punctuation in the input are matched as plain text.
+    Raises ValueError when nothing searchable is left.
+    """
+    terms = []
+    for phrase, word in _SEARCH_TERM.findall(text):
+        prefix = not phrase and word.endswith("*")
+        token = phrase or word.rstrip("*")
+        if token.strip():
+            terms.append('"' + token.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise ValueError("empty search query")
+    return " ".join(terms)
+
+@_timed
+def search_plans(query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+    """
+    Plans matching `query` (see plan_search_query), best bm25 match first.
+    Reads only the index and the plans table's id/title columns; no plan JSON
+    is decoded. `score` is the negated bm25: higher is better.
+
+    Only the newest PLAN_SEARCH_WINDOW matches are ranked. Scoring is the
+    per-row cost (a term in every plan of a 1M-plan table took ~1.8 s to
+    rank in full), so broad queries rank recent plans and selective ones,
+    which have fewer matches than that anyway, rank everything.
+    """
+    match = plan_search_query(query)
+    weights = ", ".join(str(w) for w in PLAN_SEARCH_WEIGHTS)
     with _conn() as conn:
         cur = conn.execute(
-            """
-            SELECT id, created_at, title
-            FROM plans
-            ORDER BY id DESC
-            LIMIT ? OFFSET ?
+            f"""
+            SELECT p.id, p.created_at, p.title, m.score
+            FROM (
+                SELECT rowid, score FROM (
+                    SELECT rowid, -bm25(plans_fts, {weights}) AS score
+                    FROM plans_fts
+                    WHERE plans_fts MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                )
+                ORDER BY score DESC, rowid DESC
+                LIMIT ? OFFSET ?
+            ) m
+            JOIN plans p ON p.id = m.rowid
+            ORDER BY m.score DESC, p.id DESC
             """,
-            (limit, offset),
+            (match, PLAN_SEARCH_WINDOW, limit, offset),
         )
         return [dict(r) for r in cur.fetchall()]
 
-def get_plan(plan_id: int) -> Optional[Dict]:
+@_timed
+def plan_search_truncated(query: str) -> bool:
+    """True when `query` matches more plans than search_plans ranks (PLAN_SEARCH_WINDOW)."""
+    match = plan_search_query(query)
     with _conn() as conn:
+        # walks the doclist in rowid order; nothing is scored
         row = conn.execute(
-            """
-            SELECT id, created_at, title, input_json, output_json
-            FROM plans
-            WHERE id = ?
+            "SELECT 1 FROM plans_fts WHERE plans_fts MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (match, PLAN_SEARCH_WINDOW),
+        ).fetchone()
+        return row is not None
+
+@_timed
+def rebuild_search_index() -> int:
+    """Re-index every plan (backfill / repair). Returns plans indexed."""
+    with _conn() as conn:
+        return _rebuild_plan_search(conn)
+
+
+# ---------- plan cache (persistent tier for services.plan_cache) ----------
+
+@_timed
+def get_cached_plan(key: str) -> Optional[Dict]:
+    with _conn() as conn:
+        row = conn.execute(
+            "SELECT key, output_json, created_at FROM plan_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        return dict(row) if row else None
+
+@_timed
+def put_cached_plan(key: str, output_json: str, created_at: float) -> None:
+    with _conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO plan_cache(key, output_json, created_at) VALUES (?,?,?)",
+            (key, output_json, created_at),
+        )
+
+@_timed
+def delete_cached_plan(key: Optional[str] = None) -> int:
+    """Drop one cache entry, or every entry when key is None."""
+    with _conn() as conn:
+        if key is None:
+            cur = conn.execute("DELETE FROM plan_cache")
+        else:
+            cur = conn.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+        return cur.rowcount
+
+@_timed
+def get_explanation(fingerprint: str) -> Optional[str]:
+    with _conn() as conn:
+        row = conn.execute(
+            "SELECT explanation FROM explanations WHERE fingerprint = ?",
+            (fingerprint,),
+        ).fetchone()
+        return row["explanation"] if row else None
+
+@_timed
+def put_explanation(fingerprint: str, model: str, explanation: str, created_at: float) -> None:
+    with _conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO explanations(fingerprint, model, explanation, created_at) VALUES (?,?,?,?)",
+            (fingerprint, model, explanation, created_at),
+        )
+
+@_timed
+def explanation_fingerprints() -> set:
+    """Every stored fingerprint (the prewarm command skips these)."""
+    with _conn() as conn:
+        return {r[0] for r in conn.execute("SELECT fingerprint FROM explanations")}
+
+
+# ---------- plan generation jobs ----------
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+_JOB_COLUMNS = "id, status, request_json, plan_id, error, attempts, created_at, started_at, finished_at, not_before"
+
+@_timed
+def create_job(request_json: str) -> Dict:
+    with _conn() as conn:
+        row = conn.execute(
+            f"INSERT INTO plan_jobs(request_json, created_at) VALUES (?, ?) RETURNING {_JOB_COLUMNS}",
+            (request_json, time.time()),
+        ).fetchone()
+        return dict(row)
+
+@_timed
+def get_job(job_id: int) -> Optional[Dict]:
+    with _conn() as conn:
+        row = conn.execute(f"SELECT {_JOB_COLUMNS} FROM plan_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+@_timed
+def claim_job(lease_s: float) -> Optional[Dict]:
+    """
+    Atomically take the oldest runnable job: queued (and past its
+    not_before), or running with an expired lease (its worker crashed or the
+    process restarted).
+    """
+    now = time.time()
+    with _conn() as conn:
+        row = conn.execute(
+            f"""
+            UPDATE plan_jobs
+            SET status = 'running', started_at = ?, lease_until = ?, attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM plan_jobs
+                WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?))
+                   OR (status = 'running' AND lease_until < ?)
+                ORDER BY id
+                LIMIT 1
+            )
+            RETURNING {_JOB_COLUMNS}
             """,
-            (plan_id,),
+            (now, now + lease_s, now, now),
         ).fetchone()
         return dict(row) if row else None
 
+class _LeaseLost(Exception):
+    pass
+
+
+@_timed
+def complete_job(job_id: int, attempt: int, title: str, input_json: str, output_json: str) -> Optional[Dict]:
+    """
+    Save the job's plan and mark it succeeded in one transaction; returns the
+    plan row. `attempt` is the claim's attempt number: if the lease expired
+    and another worker has re-claimed the job since, nothing is saved and
+    None is returned.
+    """
+    def save(conn: sqlite3.Connection) -> Dict:
+        plan = _insert_plan(conn, title, input_json, output_json)
+        cur = conn.execute(
+            "UPDATE plan_jobs SET status = 'succeeded', plan_id = ?, error = NULL, finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND status = 'running' AND attempts = ?",
+            (plan["id"], time.time(), job_id, attempt),
+        )
+        if cur.rowcount == 0:
+            raise _LeaseLost()  # rolls back the plan insert (and its search row)
+        return plan
+
+    try:
+        return _write(save)
+    except _LeaseLost:
+        return None
+
+# with an `attempt`, only the worker holding that claim may fail or release
+# the job (a worker whose lease expired must not undo the new owner's work)
+_OWNER_CHECK = " AND status = 'running' AND attempts = ?"
+
+@_timed
+def fail_job(job_id: int, error: str, attempt: Optional[int] = None) -> None:
+    with _conn() as conn:
+        conn.execute(
+            "UPDATE plan_jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL WHERE id = ?"
+            + (_OWNER_CHECK if attempt is not None else ""),
+            (error, time.time(), job_id) + ((attempt,) if attempt is not None else ()),
+        )
+
+@_timed
+def release_job(job_id: int, attempt: Optional[int] = None) -> None:
+    """Put a running job back in the queue (its worker is shutting down)."""
+    with _conn() as conn:
+        conn.execute(
+            "UPDATE plan_jobs SET status = 'queued', started_at = NULL, lease_until = NULL "
+            "WHERE id = ? AND status = 'running'" + (" AND attempts = ?" if attempt is not None else ""),
+            (job_id,) + ((attempt,) if attempt is not None else ()),
+        )
+
+@_timed
+def retry_job(job_id: int, attempt: int, delay_s: float, error: str) -> None:
+    """Put a running job back in the queue, claimable again after `delay_s` (an upstream fault)."""
+    with _conn() as conn:
+        conn.execute(
+            "UPDATE plan_jobs SET status = 'queued', error = ?, not_before = ?, started_at = NULL, "
+            "lease_until = NULL WHERE id = ?" + _OWNER_CHECK,
+            (error, time.time() + delay_s, job_id, attempt),
+        )
+
+@_timed
+def active_job_counts() -> Dict[str, int]:
+    """Queued and running jobs; an index range scan, so finished history doesn't slow it."""
+    with _conn() as conn:
+        counts = dict(
+            conn.execute(
+                "SELECT status, COUNT(*) FROM plan_jobs WHERE status IN ('queued', 'running') GROUP BY status"
+            ).fetchall()
+        )
+    return {"queued": counts.get("queued", 0), "running": counts.get("running", 0)}
+
+@_timed
+def oldest_queued_job_at() -> Optional[float]:
+    with _conn() as conn:
+        row = conn.execute(
+            "SELECT created_at FROM plan_jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
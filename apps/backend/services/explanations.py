@@ -0,0 +1,170 @@
+# apps/backend/services/explanations.py
+"""
+Fingerprint cache for llm.explain_workout.
+
+An explanation depends only on what the prompt shows the model: focus,
+equipment, and each exercise's name, sets, reps and weight_delta. Those are
+hashed canonically (together with the model and prompt version), so two plans
+that read the same share one explanation, whatever their date or origin.
+
+Plans from planner.build_workout_plan come from a small space (3 focuses x
+3 equipment modes x 3 weight deltas per exercise x the soreness patterns),
+so reachable_plans() can enumerate all of it and `manage.py
+prewarm-explanations` can fill the store offline.
+
+Two tiers, like plan_cache: an in-process LRU and the SQLite
+`explanations` table.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from services import db, metrics, planner
+
+MAX_ENTRIES = int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", "4096"))
+
+# every weight_delta the planner can produce (no history, hard, moderate, easy)
+WEIGHT_DELTAS = tuple(sorted({planner.overload_for_avg_rir(r) for r in (None, 0, 1, 2)}))
+
+LOOKUPS = metrics.REGISTRY.counter(
+    "gymgpt_explanation_cache_total", "Workout explanation lookups by result.", ("result",)
+)
+
+
+def canonical_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a plan the explanation prompt uses, in a stable form."""
+    return {
+        "focus": plan.get("focus", "full body"),
+        "equipment": plan.get("equipment", "gym"),
+        "exercises": [
+            [ex["name"], ex["sets"], ex["reps"], float(ex.get("weight_delta", 0) or 0)]
+            for ex in plan.get("exercises", [])
+        ],
+    }
+
+
+def fingerprint(plan: Dict[str, Any], namespace: str = "") -> str:
+    canonical = json.dumps({"ns": namespace, "plan": canonical_plan(plan)}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ExplanationCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+        if text is not None:
+            LOOKUPS.inc(result="memory_hit")
+            return text
+        text = db.get_explanation(key)
+        if text is None:
+            LOOKUPS.inc(result="miss")
+            return None
+        self._remember(key, text)
+        LOOKUPS.inc(result="persistent_hit")
+        return text
+
+    def put(self, key: str, model: str, text: str) -> None:
+        self._remember(key, text)
+        db.put_explanation(key, model, text, time.time())
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+explanation_cache = ExplanationCache()
+
+
+def _soreness_variants(names) -> List[frozenset]:
+    """One sore-muscle set per distinct pattern of lightened exercises."""
+    muscles = sorted(set().union(*(planner.EXERCISE_MUSCLES.get(n, frozenset()) for n in names)))
+    seen, out = set(), []
+    for k in range(len(muscles) + 1):
+        for subset in itertools.combinations(muscles, k):
+            sore = frozenset(subset)
+            pattern = tuple(not planner.EXERCISE_MUSCLES.get(n, frozenset()).isdisjoint(sore) for n in names)
+            if pattern not in seen:
+                seen.add(pattern)
+                out.append(sore)
+    return out
+
+
+def reachable_plans() -> Iterator[Dict[str, Any]]:
+    """Every distinct day build_workout_plan can return for the standard equipment modes."""
+    for (focus, mode), template in planner.BLOCK_TEMPLATES.items():
+        names = [name for name, _, _ in template]
+        for sore in _soreness_variants(names):
+            for deltas in itertools.product(WEIGHT_DELTAS, repeat=len(template)):
+                rows = planner._compiled_day(focus, mode, deltas, sore)
+                yield {
+                    "focus": focus,
+                    "equipment": mode,
+                    "exercises": [
+                        {"name": n, "sets": s, "reps": r, "weight_delta": d} for n, s, r, d in rows
+                    ],
+                }
+
+
+def prewarm(
+    explain: Callable[[Dict[str, Any]], str],
+    namespace: str,
+    concurrency: int = 4,
+    limit: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Explain every reachable plan that is not stored yet.
+
+    `explain` is llm.explain_workout (which stores what it generates);
+    `namespace` must be the one it fingerprints with, so stored plans are
+    skipped without an upstream call.
+    """
+    stored = db.explanation_fingerprints()
+    todo, total = [], 0
+    for plan in reachable_plans():
+        total += 1
+        if fingerprint(plan, namespace) not in stored:
+            todo.append(plan)
+    missing = len(todo)
+    if limit is not None:
+        todo = todo[:limit]
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for fut in [pool.submit(explain, plan) for plan in todo]:
+            try:
+                fut.result()
+                done += 1
+            except Exception:
+                failed += 1
+            if on_progress is not None:
+                on_progress(done + failed, len(todo))
+    return {
+        "reachable": total,
+        "already_stored": total - missing,
+        "generated": done,
+        "failed": failed,
+        "remaining": missing - done,
+    }
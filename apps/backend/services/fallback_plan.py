@@ -0,0 +1,146 @@
+# apps/backend/services/fallback_plan.py
+"""
+Deterministic local plans for when the LLM is slow, failing, or not configured.
+
+build_local_plan turns a GeneratePlanRequest payload into a dict shaped like
+GeneratePlanResponse using only planner.build_week_plan (the BASE_EXERCISES
+templates, equipment substitutions and soreness adjustments) plus the
+maintained per-exercise stats for weight progression. No network, no
+randomness: the same request and log history always give the same plan.
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from services import planner
+from services.nlp import parse_soreness
+
+# GeneratePlanRequest.equipment -> planner equipment mode
+EQUIPMENT = {"full_gym": "gym", "dumbbells": "dumbbells", "bodyweight": "bodyweight"}
+
+# goal -> ((reps, rpe, rest_seconds) for main lifts, same for accessories)
+GOAL_PRESCRIPTION = {
+    "strength":    (("3-5", 8, 180), ("6-10", 8, 120)),
+    "hypertrophy": (("6-10", 8, 120), ("10-15", 8, 75)),
+    "fat_loss":    (("8-12", 7, 75), ("12-15", 7, 45)),
+    "endurance":   (("12-15", 7, 60), ("15-20", 7, 45)),
+}
+
+EXPERIENCE_SET_OFFSET = {"beginner": -1, "intermediate": 0, "advanced": 1}
+
+# why the AI coach's plan was not used, by fallback reason (FallbackStats)
+REASON_TEXT = {
+    "budget": "the AI coach did not answer in time",
+    "timeout": "the AI coach did not answer in time",
+    "error": "the AI coach could not build a plan just now",
+    "circuit_open": "the AI coach is temporarily unavailable",
+    "no_api_key": "the AI coach is not configured on this server",
+}
+
+FOCUS_LABELS = {"upper": "Upper", "lower": "Lower", "full": "Full body"}
+
+MAIN_LIFTS = 2            # first N template exercises are the main lifts
+MINUTES_PER_EXERCISE = 12  # rough time per exercise incl. rest, caps the day
+
+WARMUP = ["5 min easy cardio", "Dynamic mobility for the day's main joints"]
+COOLDOWN = ["5 min light stretching"]
+
+PROGRESSION_NOTES = [
+    "Weeks 1-2: stay at the listed RPE and learn the movements.",
+    "Weeks 3-4: add load when every set reaches the top of the rep range.",
+]
+
+
+def _item(block: dict, sets: int, prescription: tuple) -> Dict[str, Any]:
+    reps, rpe, rest = prescription
+    delta = block.get("weight_delta") or 0.0
+    notes = f"Add {delta:g} kg if last session felt easy." if delta else ""
+    return {
+        "name": block["name"],
+        "sets": max(1, min(10, sets)),
+        "reps": reps,
+        "rpe": rpe,
+        "rest_seconds": rest,
+        "notes": notes,
+    }
+
+
+def build_local_plan(
+    payload: Dict[str, Any], stats_by_ex: Optional[Dict[str, dict]] = None, reason: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    A GeneratePlanResponse-shaped dict for a GeneratePlanRequest payload.
+
+    `stats_by_ex` is db.get_exercise_stats() output; without it every weight
+    delta is 0 (no history). `reason` (a REASON_TEXT key) picks the summary's
+    explanation of why the plan was built locally.
+    """
+    goal = payload.get("goal", "hypertrophy")
+    days = int(payload.get("days_per_week", 4))
+    main_rx, accessory_rx = GOAL_PRESCRIPTION.get(goal, GOAL_PRESCRIPTION["hypertrophy"])
+    set_offset = EXPERIENCE_SET_OFFSET.get(payload.get("experience", "intermediate"), 0)
+    per_day = max(MAIN_LIFTS, int(payload.get("session_minutes", 60)) // MINUTES_PER_EXERCISE)
+
+    week = planner.build_week_plan(
+        days,
+        soreness=parse_soreness(payload.get("soreness_notes") or ""),
+        equipment=EQUIPMENT.get(payload.get("equipment", "full_gym"), "gym"),
+        stats_by_ex=stats_by_ex or {},
+    )
+
+    split = []
+    for day in week["plans"]:
+        blocks = day["exercises"][:per_day]
+        split.append(
+            {
+                "day": f"Day {day['day']}",
+                "focus": FOCUS_LABELS.get(day["focus"], day["focus"].title()),
+                "warmup": list(WARMUP),
+                "main": [_item(b, b["sets"] + set_offset, main_rx) for b in blocks[:MAIN_LIFTS]],
+                "accessories": [_item(b, b["sets"] + set_offset, accessory_rx) for b in blocks[MAIN_LIFTS:]],
+                "finisher": [],
+                "cooldown": list(COOLDOWN),
+            }
+        )
+
+    safety = ["Stop any movement that causes sharp or joint pain."]
+    constraints = (payload.get("constraints") or "").strip()
+    if constraints:
+        safety.append(f"Check every exercise against your constraints: {constraints}")
+
+    return {
+        "title": f"{days}-Day {goal.replace('_', ' ').title()} Plan",
+        "summary": "Built from the standard GymGPT templates and your logged sets"
+        + (f" because {REASON_TEXT[reason]}." if reason in REASON_TEXT else "."),
+        "weekly_split": split,
+        "progression_notes": list(PROGRESSION_NOTES),
+        "safety_notes": safety,
+    }
+
+
+class FallbackStats:
+    """Counts of locally served plans by reason (budget, timeout, circuit_open, error, no_api_key)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reasons: Counter = Counter()
+        self._upgrades = 0
+
+    def served(self, reason: str) -> None:
+        with self._lock:
+            self._reasons[reason] += 1
+
+    def upgraded(self) -> None:
+        with self._lock:
+            self._upgrades += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reasons = dict(sorted(self._reasons.items()))
+            upgrades = self._upgrades
+        return {"served": sum(reasons.values()), "by_reason": reasons, "background_upgrades": upgrades}
+
+
+fallback_stats = FallbackStats()
@@ -0,0 +1,179 @@
+# apps/backend/services/jobs.py
+"""
+Bounded pool of asyncio workers draining a persistent job table.
+
+The pool knows nothing about what a job is. It is given blocking callables
+that talk to the store (claim the next job, mark one failed, hand one back)
+and an async `run(job)` that does the work and records the result. At most
+`concurrency` jobs run at once per process; anything beyond that waits in
+the table, which is what makes the queue survive restarts and gives
+backpressure a number to look at.
+
+Idle workers sleep on an event that notify() sets when a job is enqueued
+(with a poll interval as the fallback for jobs enqueued by other processes),
+and wait_for() lets request handlers long-poll a job in this process.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_WAIT_SECONDS = metrics.REGISTRY.histogram(
+    "gymgpt_job_queue_wait_seconds", "Time jobs spent queued before a worker picked them up.", ("queue",)
+)
+JOB_RUN_SECONDS = metrics.REGISTRY.histogram(
+    "gymgpt_job_run_duration_seconds", "Job execution time by outcome.", ("queue", "outcome")
+)
+JOBS_REJECTED = metrics.REGISTRY.counter(
+    "gymgpt_jobs_rejected_total", "Enqueue attempts refused because the queue was full.", ("queue",)
+)
+
+Job = Dict[str, Any]
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        name: str,
+        claim: Callable[[], Optional[Job]],
+        run: Callable[[Job], Awaitable[None]],
+        fail: Callable[[Job, BaseException], None],
+        release: Callable[[Job], None],
+        concurrency: int = 4,
+        poll_interval_s: float = 1.0,
+    ):
+        """
+        claim():          blocking; atomically take the next job or return None
+        run(job):         async; do the work and persist the result
+        fail(job, exc):   blocking; record that run() raised
+        release(job):     blocking; put a job back (the pool is stopping)
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.name = name
+        self.concurrency = concurrency
+        self.poll_interval_s = poll_interval_s
+        self._claim, self._run, self._fail, self._release = claim, run, fail, release
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._waiters: Dict[int, list] = {}  # job id -> [event, waiting callers]
+        self.busy = 0
+        self._finished = 0
+        self._run_s_total = 0.0
+
+    def ensure_started(self) -> None:
+        """Start the workers on the running loop (again, if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        # tasks from a previous (closed) loop are gone with it
+        self._loop, self._tasks, self._waiters = loop, [], {}
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running are released back to the queue."""
+        tasks, self._tasks = self._tasks, []
+        if not tasks or self._loop is not asyncio.get_running_loop():
+            return
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """A job was enqueued: wake idle workers instead of waiting for the next poll."""
+        if self._wake is not None and self._loop is asyncio.get_running_loop():
+            self._wake.set()
+
+    async def wait_for(self, job_id: int, timeout: float) -> None:
+        """Sleep until this process finishes `job_id` or `timeout` passes."""
+        entry = self._waiters.setdefault(job_id, [asyncio.Event(), 0])
+        entry[1] += 1
+        try:
+            await asyncio.wait_for(entry[0].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and self._waiters.get(job_id) is entry:
+                del self._waiters[job_id]
+
+    def estimated_wait_s(self, queued: int, default_run_s: float = 5.0) -> int:
+        """Seconds until `queued` jobs drain, from this pool's average run time."""
+        avg = self._run_s_total / self._finished if self._finished else default_run_s
+        return max(1, math.ceil(math.ceil(queued / self.concurrency) * avg))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": sum(not t.done() for t in self._tasks),
+            "busy": self.busy,
+            "finished": self._finished,
+            "avg_run_s": round(self._run_s_total / self._finished, 3) if self._finished else None,
+        }
+
+    def reject(self) -> None:
+        JOBS_REJECTED.inc(queue=self.name)
+
+    async def _worker(self) -> None:
+        while True:
+            # clear before claiming: a notify() racing with an empty claim
+            # then leaves the event set and the wait below returns at once
+            self._wake.clear()
+            try:
+                job = await run_in_threadpool(self._claim)
+            except Exception:
+                logger.exception("%s: claiming a job failed", self.name)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run_one(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # one bad job must not take a worker down for good
+                logger.exception("%s: handling job %s failed", self.name, job.get("id"))
+
+    async def _run_one(self, job: Job) -> None:
+        JOB_QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - job["created_at"]), queue=self.name)
+        self.busy += 1
+        start = time.perf_counter()
+        outcome = "succeeded"
+        try:
+            await self._run(job)
+        except asyncio.CancelledError:
+            outcome = "released"
+            await asyncio.shield(run_in_threadpool(self._release, job))
+            raise
+        except Exception as e:
+            outcome = "failed"
+            logger.warning("%s: job %s failed: %s", self.name, job["id"], e)
+            try:
+                await run_in_threadpool(self._fail, job, e)
+            except Exception:
+                # the job stays running and is re-claimed when its lease expires
+                logger.exception("%s: recording the failure of job %s failed", self.name, job["id"])
+        finally:
+            self.busy -= 1
+            elapsed = time.perf_counter() - start
+            JOB_RUN_SECONDS.observe(elapsed, queue=self.name, outcome=outcome)
+            if outcome != "released":
+                self._finished += 1
+                self._run_s_total += elapsed
+            entry = self._waiters.pop(job["id"], None)
+            if entry is not None:
+                entry[0].set()
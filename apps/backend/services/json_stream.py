@@ -0,0 +1,78 @@
+# apps/backend/services/json_stream.py
+"""
+Incremental extraction of array items from a streamed JSON object.
+
+The LLM streams a GeneratePlanResponse token by token. ArrayItemStream
+watches for one top-level key (e.g. "weekly_split") and hands back the raw
+text of each element of that array as soon as its closing brace arrives, so
+callers can validate and forward days long before the whole object is done.
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+
+class ArrayItemStream:
+    def __init__(self, key: str):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._last_str: Optional[str] = None  # last string seen at depth 1 (a key, once ':' follows)
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.done = False  # the target array has been closed
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far (the full document once the stream ends)."""
+        return self._text
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume a chunk; return raw JSON for every array item completed by it."""
+        self._text += chunk
+        text = self._text
+        items: List[str] = []
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._last_str = text[self._str_start + 1 : i]
+                continue
+
+            if ch == '"':
+                self._in_str = True
+                self._str_start = i
+            elif ch == "{" or ch == "[":
+                if (
+                    ch == "["
+                    and self._depth == 1
+                    and not self.done
+                    and self._array_depth is None
+                    and self._last_str == self.key
+                ):
+                    self._array_depth = 2
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = i
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if self._array_depth is None:
+                    continue
+                if ch == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    items.append(text[self._item_start : i + 1])
+                    self._item_start = None
+                elif ch == "]" and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self.done = True
+        self._pos = len(text)
+        return items
@@ -5,22 +5,291 @@ This module wraps OpenAI so the rest of the codebase doesn't have to know
 about API details. If you ever swap models, change it here.
 """
 
+import asyncio
+import logging
 import os
-from typing import List, Dict, Any
+import threading
+import time
+from contextlib import aclosing, contextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator
 
-from openai import OpenAI
+from services import metrics
+from services.explanations import explanation_cache, fingerprint
+from services.resilience import (  # noqa: F401  (llm.CircuitOpenError)
+    CallPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    SlotTimeoutError,
+)
 
-# Expect OPENAI_API_KEY in environment
-_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# openai and httpx are imported where the clients are built: they are the
+# bulk of the app's import time and read-only processes never need them.
+# Expect OPENAI_API_KEY in environment (read on first use, not at import).
+_client = None
+_client_lock = threading.Lock()
 
 DEFAULT_MODEL = "gpt-4.1-mini"
 
+# Async pipeline limits (env overridable)
+LLM_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", str(LLM_MAX_CONCURRENCY)))
+
+# Call policy (services/resilience.py). LLM_TIMEOUT_S is the deadline of a
+# whole call, retries and hedges included; the SDK's own retries are off.
+LLM_MAX_ATTEMPTS = int(os.getenv("OPENAI_MAX_ATTEMPTS", "3"))
+LLM_HEDGING = os.getenv("OPENAI_HEDGING", "1").lower() in ("1", "true", "yes")
+LLM_HEDGE_MIN_S = float(os.getenv("OPENAI_HEDGE_MIN_MS", "100")) / 1000
+LLM_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_S = float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+
+# (event loop, client, semaphore) -- httpx pools and asyncio primitives are
+# tied to the loop that created them, so rebuild if the loop changes
+# (e.g. a second TestClient or a restarted server).
+_async_state: Optional[tuple] = None
+
+
+def _new_policy() -> CallPolicy:
+    return CallPolicy(
+        CircuitBreaker("openai", LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_S),
+        max_attempts=LLM_MAX_ATTEMPTS,
+        hedge=LLM_HEDGING,
+        hedge_min_s=LLM_HEDGE_MIN_S,
+    )
+
+
+# shared by every operation: they all depend on the same upstream
+policy = _new_policy()
+
+
+def get_client():
+    """The process-wide synchronous OpenAI client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=LLM_TIMEOUT_S, max_retries=0)
+    return _client
+
+
+def _async_llm() -> tuple:
+    global _async_state
+    loop = asyncio.get_running_loop()
+    if _async_state is None or _async_state[0] is not loop:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT_S, connect=5.0),
+        )
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=http_client,
+            timeout=LLM_TIMEOUT_S,
+            max_retries=0,
+        )
+        _async_state = (loop, client, asyncio.Semaphore(LLM_MAX_CONCURRENCY))
+    return _async_state[1], _async_state[2]
+
+
+@contextmanager
+def _instrumented(operation: str, model: str):
+    """Record latency (by outcome) and errors of one upstream call."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        metrics.LLM_ERRORS.inc(operation=operation, model=model, error="timeout")
+        raise
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        outcome = "error"
+        metrics.LLM_ERRORS.inc(operation=operation, model=model, error=type(e).__name__)
+        raise
+    finally:
+        metrics.LLM_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, operation=operation, model=model, outcome=outcome
+        )
+
+
+async def _acquire_slot(slots: asyncio.Semaphore, deadline: float) -> None:
+    try:
+        await asyncio.wait_for(slots.acquire(), max(0.0, deadline - asyncio.get_running_loop().time()))
+    except asyncio.TimeoutError:
+        raise SlotTimeoutError("no LLM concurrency slot free within the deadline") from None
+
+
+async def _chat_attempt(deadline: float, kwargs: Dict[str, Any]):
+    client, slots = _async_llm()
+    loop = asyncio.get_running_loop()
+    model = kwargs.get("model", "")
+    # the slot wait counts against the deadline: a call that queued past it
+    # must not go upstream at all
+    await _acquire_slot(slots, deadline)
+    try:
+        # timed from slot acquisition: queueing for a slot is not upstream latency
+        with _instrumented("chat", model):
+            resp = await asyncio.wait_for(client.chat.completions.create(**kwargs), deadline - loop.time())
+    finally:
+        slots.release()
+    metrics.record_llm_usage("chat", model, getattr(resp, "usage", None))
+    return resp
+
+
+async def create_chat_completion(timeout: Optional[float] = None, **kwargs):
+    """
+    Async chat completion through the shared client and call policy.
+
+    At most LLM_MAX_CONCURRENCY attempts are in flight per process; extra
+    callers wait for a slot without holding a worker thread. `timeout` is the
+    deadline for the whole call, slot waits, retries and hedges included;
+    past it asyncio.TimeoutError is raised (SlotTimeoutError, which the
+    breaker ignores, if no slot freed up in time). Raises CircuitOpenError at
+    once while the upstream is considered down.
+    """
+    return await policy.call("chat", lambda deadline: _chat_attempt(deadline, kwargs), timeout or LLM_TIMEOUT_S)
+
+
+async def stream_chat_completion(timeout: Optional[float] = None, **kwargs) -> AsyncIterator[str]:
+    """
+    Like create_chat_completion, but yields content deltas as they arrive.
+
+    The concurrency slot is held until the stream is exhausted or closed;
+    `timeout` bounds the whole stream, not each chunk. A stream is never
+    retried or hedged (its deltas may already be on their way to a client),
+    but it does respect and feed the circuit breaker.
+    """
+    policy.breaker.allow("chat_stream")
+    try:
+        # aclosing: closing this generator must close the upstream stream now
+        async with aclosing(_stream_attempt(timeout, kwargs)) as deltas:
+            async for delta in deltas:
+                yield delta
+    except Exception as e:
+        policy.record_outcome(e)
+        raise
+    except BaseException:  # closed or cancelled mid-stream: no verdict
+        policy.breaker.abandon()
+        raise
+    policy.record_outcome(None)
+
+
+async def _stream_attempt(timeout: Optional[float], kwargs: Dict[str, Any]) -> AsyncIterator[str]:
+    client, slots = _async_llm()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (timeout or LLM_TIMEOUT_S)
+    model = kwargs.get("model", "")
+    await _acquire_slot(slots, deadline)
+    try:
+        with _instrumented("chat_stream", model):
+            stream = await asyncio.wait_for(
+                # the final chunk then carries `usage` (and no choices)
+                client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs),
+                deadline - loop.time(),
+            )
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    if getattr(chunk, "usage", None) is not None:
+                        metrics.record_llm_usage("chat_stream", model, chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+    finally:
+        slots.release()
+
+
+async def aclose() -> None:
+    """Close the shared clients' HTTP pools (called on app shutdown)."""
+    global _async_state, _client
+    state, _async_state = _async_state, None
+    if state is not None and state[0] is asyncio.get_running_loop():
+        await state[1].close()
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+    policy.close()
+
+
+# after fork() the parent's clients (and their sockets, TLS state and pool
+# locks) must not be used or closed by the child: keep them referenced so
+# they are never collected there, and build fresh clients on first use
+_inherited_clients: List[Any] = []
+
 
-def explain_workout(plan: Dict[str, Any]) -> str:
+def _reset_after_fork() -> None:
+    global _client, _client_lock, _async_state, policy
+    _inherited_clients.extend(c for c in (_client, _async_state) if c is not None)
+    _client, _async_state = None, None
+    _client_lock = threading.Lock()
+    # its locks and hedge threads are the parent's; its health view starts fresh
+    policy = _new_policy()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _complete_text(operation: str, prompt: str) -> str:
+    """A one-message chat completion through the sync client and the call policy."""
+
+    def attempt(deadline: float) -> str:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError(f"{operation} deadline exceeded")
+        with _instrumented(operation, DEFAULT_MODEL):
+            resp = get_client().chat.completions.create(
+                model=DEFAULT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=timeout,
+            )
+        metrics.record_llm_usage(operation, DEFAULT_MODEL, getattr(resp, "usage", None))
+        return resp.choices[0].message.content.strip()
+
+    return policy.call_sync(operation, attempt, LLM_TIMEOUT_S)
+
+
+# bump when the explain_workout prompt changes: it is part of the cache key
+EXPLAIN_PROMPT_VERSION = 1
+
+
+def explain_cache_namespace() -> str:
+    return f"{DEFAULT_MODEL}:explain-v{EXPLAIN_PROMPT_VERSION}"
+
+
+def explain_workout(plan: Dict[str, Any], use_cache: bool = True) -> str:
     """
     Take a structured workout plan (from build_workout_plan) and return
     a natural-language explanation for the user.
+
+    Explanations are cached by a fingerprint of what the prompt shows the
+    model (services/explanations.py), so repeated or prewarmed plans are
+    answered locally; use_cache=False always asks the model (and stores
+    nothing).
     """
+    key = fingerprint(plan, explain_cache_namespace()) if use_cache else None
+    if key is not None:
+        cached = explanation_cache.get(key)
+        if cached is not None:
+            return cached
+
     focus = plan.get("focus", "full body")
     equipment = plan.get("equipment", "gym")
     exercises = plan.get("exercises", [])
@@ -52,17 +321,16 @@ Keep it to about 2–3 short paragraphs.
 """
 
     try:
-        resp = _client.responses.create(
-            model=DEFAULT_MODEL,
-            input=prompt,
-        )
-        # New Responses API shape
-        return resp.output[0].content[0].text.strip()
+        text = _complete_text("explain", prompt)
     except Exception as e:
-        print("LLM error in explain_workout:", e)
+        logger.warning("LLM error in explain_workout: %s", e)
         # Let the caller decide how to handle None
         raise
 
+    if key is not None:
+        explanation_cache.put(key, DEFAULT_MODEL, text)
+    return text
+
 
 def coach_reply(user_message: str, logs_summary: str = "") -> str:
     """
@@ -81,11 +349,7 @@ Respond with clear, actionable advice. Avoid fluff.
 """
 
     try:
-        resp = _client.responses.create(
-            model=DEFAULT_MODEL,
-            input=prompt,
-        )
-        return resp.output[0].content[0].text.strip()
+        return _complete_text("coach", prompt)
     except Exception as e:
-        print("LLM error in coach_reply:", e)
+        logger.warning("LLM error in coach_reply: %s", e)
         raise
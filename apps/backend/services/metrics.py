@@ -0,0 +1,355 @@
+# apps/backend/services/metrics.py
+"""
+In-process metrics with a Prometheus text exposition (GET /metrics).
+
+Small hand-rolled Counter / Gauge / Histogram types (no client library):
+each metric keeps one value (or bucket array) per label set behind a lock,
+and REGISTRY.render() writes the text format scraped by Prometheus.
+
+What is recorded:
+- HTTP: latency histogram and in-flight gauge per route template, via
+  MetricsMiddleware (the route template, never the raw path, is the label)
+- DB: call latency and errors per services/db.py function, via @timed
+- LLM: call latency, token usage from `usage`, and errors by kind
+- anything registered with REGISTRY.collector() (plan cache, coalescing,
+  fallback and pool stats) is read at scrape time
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.routing import Match
+
+# seconds; covers sub-ms SQLite reads through multi-second LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", _format_labels(self.label_names, k), v) for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        out = []
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                out.append(
+                    ("_bucket", _format_labels(self.label_names + ("le",), key + (_format_value(bound),)), cumulative)
+                )
+            out.append(("_sum", _format_labels(self.label_names, key), total))
+            out.append(("_count", _format_labels(self.label_names, key), n))
+        return out
+
+
+# collector() callbacks return these: (name, kind, help, [(labels dict, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[Family]]) -> Callable[[], Iterable[Family]]:
+        """Register a callback that reports values owned elsewhere; usable as a decorator."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        blocks = [m.render() for m in metrics]
+        for fn in collectors:
+            for name, kind, help, samples in fn():
+                lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+                blocks.append("\n".join(lines))
+        return "\n".join(blocks) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ---------- application metrics ----------
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "gymgpt_http_request_duration_seconds",
+    "HTTP request latency, until the last body byte is sent.",
+    ("method", "route", "status"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "gymgpt_http_requests_in_flight", "HTTP requests currently being served.", ("method", "route")
+)
+DB_CALL_SECONDS = REGISTRY.histogram(
+    "gymgpt_db_call_duration_seconds", "Latency of services.db functions.", ("function",)
+)
+DB_ERRORS = REGISTRY.counter("gymgpt_db_errors_total", "services.db calls that raised.", ("function", "error"))
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "gymgpt_llm_request_duration_seconds", "Upstream LLM call latency.", ("operation", "model", "outcome")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "gymgpt_llm_tokens_total", "Tokens reported in the upstream `usage` block.", ("operation", "model", "type")
+)
+LLM_ERRORS = REGISTRY.counter("gymgpt_llm_errors_total", "Failed upstream LLM calls.", ("operation", "model", "error"))
+
+
+def timed(histogram: Histogram, errors: Optional[Counter] = None, label: str = "function"):
+    """
+    Decorator: observe the wrapped function's wall time under its own name.
+
+    Generator functions are timed until they are exhausted or closed, so a
+    streaming query counts the whole iteration, not just its creation.
+    """
+
+    def decorate(fn):
+        name = fn.__name__
+
+        def record(start: float, exc: Optional[BaseException]) -> None:
+            histogram.observe(time.perf_counter() - start, **{label: name})
+            if exc is not None and errors is not None:
+                errors.inc(**{label: name, "error": type(exc).__name__})
+
+        if inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                exc = None
+                try:
+                    yield from fn(*args, **kwargs)
+                except BaseException as e:
+                    if not isinstance(e, GeneratorExit):
+                        exc = e
+                    raise
+                finally:
+                    record(start, exc)
+
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            exc = None
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                exc = e
+                raise
+            finally:
+                record(start, exc)
+
+        return wrapper
+
+    return decorate
+
+
+def record_llm_usage(operation: str, model: str, usage: Any) -> None:
+    """Count prompt/completion tokens from a chat.completions or responses `usage` object."""
+    if usage is None:
+        return
+    for kind, attrs in (("prompt", ("prompt_tokens", "input_tokens")), ("completion", ("completion_tokens", "output_tokens"))):
+        for attr in attrs:
+            n = getattr(usage, attr, None)
+            if n:
+                LLM_TOKENS.inc(n, operation=operation, model=model, type=kind)
+                break
+
+
+# ---------- HTTP middleware ----------
+
+# per-request profiling is opt-in per deployment, then per request by header
+PROFILING_ENABLED = os.getenv("GYMGPT_PROFILING", "0").lower() in ("1", "true", "yes")
+PROFILE_HEADER = "x-profile"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request by route template.
+
+    The route is resolved up front against `router` (the app's APIRouter,
+    read per request so routers included later are seen), so the in-flight
+    gauge covers the whole request, including time spent waiting on the LLM.
+    Requests matching no route are reported as route="unmatched".
+
+    With GYMGPT_PROFILING=1, a request carrying `X-Profile: 1` runs under the
+    sampling profiler and gets an `X-Profile-Id` header; the folded stacks are
+    served by GET /debug/profiles/{id}.
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    def _route(self, scope) -> str:
+        partial = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match is Match.FULL:
+                return route.path
+            if match is Match.PARTIAL and partial is None:
+                partial = route.path  # path matched, method did not (405)
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = self._route(scope)
+        status = ["500"]
+        profile = None
+        if PROFILING_ENABLED and _wants_profile(scope):
+            from services.profiler import SamplingProfiler
+
+            profile = SamplingProfiler().start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+                if profile is not None:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method, route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=route, status=status[0])
+            HTTP_IN_FLIGHT.dec(method=method, route=route)
+            if profile is not None:
+                profile.stop(label=f"{method} {route}")
+
+
+def _wants_profile(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER.encode() and value.strip() in (b"1", b"true"):
+            return True
+    return False
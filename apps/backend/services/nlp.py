@@ -1,5 +1,6 @@
 # apps/backend/services/nlp.py
 import re
+from functools import lru_cache
 
 # Dictionary mapping common gym slang/abbreviations to standardized muscle names
 # Example: "tris" -> "triceps", "delts" -> "shoulders"
@@ -15,6 +16,43 @@ MUSCLES = {
     "back","shoulders","rear_delts","calves"
 }
 
+def _normalize_term(term: str) -> str:
+    return re.sub(r"[\s_]+", " ", term)
+
+def _compile_matcher():
+    lookup = {_normalize_term(m): m for m in MUSCLES}
+    lookup.update({_normalize_term(k): v for k, v in ALIASES.items()})
+    # longest first so "triceps" wins over "tris" wins over "tri";
+    # "rear delts" also matches "rear_delts" / "rear   delts"
+    terms = sorted(lookup, key=len, reverse=True)
+    alternation = "|".join(r"[\s_]+".join(re.escape(w) for w in t.split(" ")) for t in terms)
+    pattern = re.compile(r"(?<![a-z])(" + alternation + r")(?![a-z])(?:\s*[:=]?\s*(\d{1,2})(?!\d))?")
+    lookup.update({m: m for m in MUSCLES})
+    lookup.update(ALIASES)
+    return pattern, lookup
+
+# One alternation over every muscle name and alias, compiled at import.
+# A single left-to-right scan resolves aliases and the optional level, and
+# never rewrites the text (the old per-alias str.replace turned the "tri"
+# inside "triceps" into "triceps" again).
+_MATCHER, _CANONICAL = _compile_matcher()
+
+@lru_cache(maxsize=4096)
+def _parse_normalized(t: str) -> tuple:
+    explicit = {}
+    mentioned = []
+    for term, level in _MATCHER.findall(t):
+        # exact surface forms are a plain dict hit; only odd spacing needs normalizing
+        muscle = _CANONICAL.get(term) or _CANONICAL[_normalize_term(term)]
+        if level:
+            explicit[muscle] = max(1, min(5, int(level)))
+        else:
+            mentioned.append(muscle)
+    out = dict(explicit)
+    for muscle in mentioned:
+        out.setdefault(muscle, 3)
+    return tuple(out.items())
+
 def parse_soreness(text: str) -> dict:
     """Process natural language soreness descriptions into structured data.
     
@@ -30,23 +68,15 @@ def parse_soreness(text: str) -> dict:
     - Converts common aliases to standard names (e.g., "tris" -> "triceps")
     - Clamps soreness levels to 1-5 range
     - Default level 3 for muscles mentioned without a number
+    - An explicit level wins over a bare mention; the last explicit level wins
     - Ignores unrecognized muscle names
+    - Results are LRU-cached per normalized text
     """
     if not text:
         return {}
-    t = text.lower()
-    for k, v in ALIASES.items():
-        t = t.replace(k, v)
-
-    out = {}
-    # e.g., "muscle 3", "muscle:3", "muscle = 4"
-    for raw_muscle, level in re.findall(r'([a-z_ ]+?)\s*[:=\s]\s*([1-5])', t):
-        m = raw_muscle.strip().replace(" ", "_")
-        if m in MUSCLES:
-            out[m] = max(1, min(5, int(level)))
-
-    # pick up lone mentions
-    for m in MUSCLES:
-        if m in t and m not in out:
-            out[m] = 3
-    return out
+    return dict(_parse_normalized(text.lower()))
+
+def parse_soreness_batch(texts) -> list:
+    """parse_soreness over many notes (e.g. analytics jobs); repeated notes hit the cache."""
+    parse = _parse_normalized
+    return [dict(parse(t.lower())) if t else {} for t in texts]
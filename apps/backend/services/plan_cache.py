@@ -0,0 +1,147 @@
+# apps/backend/services/plan_cache.py
+"""
+Content-addressed cache for generated plans.
+
+Requests are normalized (free text lowercased and whitespace-collapsed) and
+hashed, so identical GeneratePlanRequests share one cached LLM output.
+
+Two tiers:
+- an in-process LRU with a TTL (fast, per worker)
+- a persistent SQLite table next to `plans` (shared, survives restarts)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from services import db
+
+MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024"))
+TTL_S = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+PERSIST_TTL_S = float(os.getenv("PLAN_CACHE_PERSIST_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# fields that are free text; everything else is an enum/int already
+_TEXT_FIELDS = ("soreness_notes", "constraints")
+
+
+def normalize_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(payload)
+    for f in _TEXT_FIELDS:
+        out[f] = " ".join((out.get(f) or "").lower().split())
+    return out
+
+
+def make_key(payload: Dict[str, Any], namespace: str = "") -> str:
+    """Canonical sha256 of the normalized request (plus e.g. the model name)."""
+    canonical = json.dumps(
+        {"ns": namespace, "req": normalize_request(payload)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        ttl_s: float = TTL_S,
+        persist_ttl_s: float = PERSIST_TTL_S,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.persist_ttl_s = persist_ttl_s
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (output_json, stored_at)
+        self._stats = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "bypasses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    def get_local(self, key: str) -> Optional[str]:
+        """Memory tier only; safe to call from the event loop."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            output_json, stored_at = entry
+            if now - stored_at > self.ttl_s:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return output_json
+
+    def get_persistent(self, key: str) -> Optional[str]:
+        """SQLite tier; promotes hits into memory. Blocking -- run in a thread."""
+        row = db.get_cached_plan(key)
+        if row is None:
+            self._count("misses")
+            return None
+        if time.time() - row["created_at"] > self.persist_ttl_s:
+            db.delete_cached_plan(key)
+            self._count("expirations")
+            self._count("misses")
+            return None
+        self._remember(key, row["output_json"], row["created_at"])
+        self._count("persistent_hits")
+        return row["output_json"]
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_local(key) or self.get_persistent(key)
+
+    def _remember(self, key: str, output_json: str, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (output_json, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def put(self, key: str, output_json: str) -> None:
+        now = time.time()
+        self._remember(key, output_json, now)
+        db.put_cached_plan(key, output_json, now)
+        self._count("stores")
+
+    def note_bypass(self) -> None:
+        self._count("bypasses")
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one key from both tiers, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._stats["invalidations"] += 1
+        db.delete_cached_plan(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["memory_entries"] = len(self._entries)
+        hits = out["memory_hits"] + out["persistent_hits"]
+        lookups = hits + out["misses"]
+        out["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return out
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,96 @@
+# apps/backend/services/plan_codec.py
+"""
+Storage encoding for the `plans` table's input_json / output_json.
+
+Generated plans repeat the same keys, exercise names, rep ranges, warmups
+and cooldowns in every row, and each row is too small (2-6 KB) for plain
+compression to find much of that repetition on its own. So payloads are
+raw DEFLATE streams primed with a preset dictionary (zlib's zdict) of the
+vocabulary plans are made of: the first occurrence of "Romanian Deadlift"
+in a row is already a back-reference.
+
+Each row records its codec, so rows written before compression (codec 0,
+plain TEXT) keep reading, and `python manage.py compress-plans` migrates
+them in place. A dictionary is part of the on-disk format: never edit one,
+add a new codec id with a new dictionary instead.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Dict, Union
+
+PLAIN = 0
+DEFLATE_V1 = 1
+
+# Fragments for the v1 dictionary. DEFLATE prefers short distances, so the
+# most common material goes last. FROZEN: rows encoded with codec 1 depend
+# on these exact bytes.
+_V1_FRAGMENTS = (
+    # request fields (input_json)
+    '{"goal":"strength","goal":"fat_loss","goal":"endurance","experience":"beginner","experience":"advanced",'
+    '"equipment":"dumbbells","equipment":"bodyweight","soreness_notes":"","constraints":""}',
+    '{"goal":"hypertrophy","experience":"intermediate","days_per_week":4,"session_minutes":60,'
+    '"soreness_notes":"","equipment":"full_gym","constraints":""}',
+    # less common exercises and notes
+    "Incline Dumbbell Press, Dumbbell Shoulder Press, Seated Cable Row, Chest-Supported Row, Face Pull, "
+    "Lateral Raise, Triceps Pushdown, Dumbbell Curl, Hammer Curl, Bulgarian Split Squat, Walking Lunge, "
+    "Goblet Squat, Hip Thrust, Leg Curl, Leg Extension, Plank, Dead Bug, Push-Up, Pull-Up, Chin-Up, Dip, "
+    "Farmer's Carry, Glute Bridge, Step-Up, Kettlebell Swing, Cable Fly, Machine Chest Press, Hack Squat, ",
+    '"notes":"Keep 1-2 reps in reserve","notes":"Control the eccentric","notes":"Pause at the bottom",'
+    '"notes":"Reduce load if sore","notes":"Focus on form","notes":"Superset with the next exercise",',
+    '"finisher":["10 min incline walk"],"finisher":["Sled push"],"finisher":["Bike intervals"],'
+    '"cooldown":["5 min light stretching"],"cooldown":["Foam rolling"],"cooldown":["Light stretching"],'
+    '"warmup":["5 min easy cardio","Dynamic mobility for the day\'s main joints"],'
+    '"warmup":["5 min bike","Band pull-aparts","Ramp-up sets"],',
+    '"progression_notes":["Add a rep each week.","Add load when every set reaches the top of the rep range.",'
+    '"Weeks 1-2: stay at the listed RPE and learn the movements.","Deload in week 5."],'
+    '"safety_notes":["Stop if anything hurts.","Warm up thoroughly.","Use a spotter on heavy sets."]}',
+    '"focus":"Upper","focus":"Lower","focus":"Full Body","focus":"Push","focus":"Pull","focus":"Legs",'
+    '"focus":"Upper (push emphasis)","focus":"Lower (posterior chain)",',
+    # the core of every plan
+    '{"title":"4-Day Hypertrophy Plan","summary":"","weekly_split":[{"day":"Day 1","focus":"Upper",'
+    '"warmup":[],"main":[{"name":"Barbell Bench Press","sets":3,"reps":"6-8","rpe":8,"rest_seconds":120,'
+    '"notes":""},{"name":"Barbell Row","sets":4,"reps":"8-10","rpe":7,"rest_seconds":90,"notes":""},'
+    '{"name":"Overhead Press","sets":3,"reps":"10-12","rpe":null,"rest_seconds":75,"notes":""},'
+    '{"name":"Lat Pulldown","sets":3,"reps":"12-15","rpe":9,"rest_seconds":60,"notes":""}],'
+    '"accessories":[{"name":"Back Squat","sets":3,"reps":"5-8","rpe":8,"rest_seconds":150,"notes":""},'
+    '{"name":"Romanian Deadlift","sets":3,"reps":"10-15","rpe":8,"rest_seconds":90,"notes":""},'
+    '{"name":"Leg Press","sets":3,"reps":"10-12","rpe":8,"rest_seconds":90,"notes":""},'
+    '{"name":"Calf Raise","sets":3,"reps":"12-15","rpe":8,"rest_seconds":60,"notes":""}],'
+    '"finisher":[],"cooldown":[]},{"day":"Day 2","focus":"Lower","warmup":[',
+)
+
+_DICTIONARIES: Dict[int, bytes] = {
+    DEFLATE_V1: "".join(_V1_FRAGMENTS).encode("utf-8"),
+}
+
+# codec for newly written rows; 0 stores plain TEXT (e.g. to inspect with sqlite3)
+CURRENT = int(os.getenv("GYMGPT_PLAN_CODEC", str(DEFLATE_V1)))
+LEVEL = 6
+_WBITS = -15  # raw DEFLATE: no zlib header/checksum, the row is its own framing
+
+Stored = Union[str, bytes]
+
+
+def _dictionary(codec: int) -> bytes:
+    try:
+        return _DICTIONARIES[codec]
+    except KeyError:
+        raise ValueError(f"unknown plan codec {codec}") from None
+
+
+def encode(text: str, codec: int = CURRENT) -> Stored:
+    """Encode a JSON string for storage under `codec` (TEXT for PLAIN, else a BLOB)."""
+    if codec == PLAIN:
+        return text
+    comp = zlib.compressobj(LEVEL, zlib.DEFLATED, _WBITS, zdict=_dictionary(codec))
+    return comp.compress(text.encode("utf-8")) + comp.flush()
+
+
+def decode(value: Stored, codec: int) -> str:
+    """Inverse of encode(); `codec` is the one stored alongside the value."""
+    if codec == PLAIN:
+        return value
+    dec = zlib.decompressobj(_WBITS, zdict=_dictionary(codec))
+    return (dec.decompress(value) + dec.flush()).decode("utf-8")
@@ -11,6 +11,7 @@ This module handles the core logic for generating workout plans, including:
 """
 
 from datetime import date
+from functools import lru_cache
 
 # Template workouts for different body focuses
 # Each exercise includes default sets/reps based on common strength training protocols
@@ -86,6 +87,17 @@ def progressive_overload(last_sets):
     if not last_sets:
         return 0.0
     avg_rir = sum(max(0, s.get("rir", 0)) for s in last_sets) / len(last_sets)
+    return overload_for_avg_rir(avg_rir)
+
+def overload_for_avg_rir(avg_rir):
+    """Same thresholds as progressive_overload, from a precomputed average RIR.
+
+    Use with db.get_exercise_stats(), whose avg_rir is maintained per
+    exercise on every logged set, so no raw set history is needed here.
+    None (no sets logged yet) means no increase.
+    """
+    if avg_rir is None:
+        return 0.0
     if avg_rir >= 2: return 2.5  # Significant increase - exercise was too easy
     if avg_rir <= 0: return 0.0  # No increase - exercise was challenging enough
     return 1.0  # Moderate increase - appropriate progression
@@ -103,14 +115,49 @@ def _apply_equipment(blocks, equipment: str):
         out.append({**b, "name": alt})
     return out
 
+# ---------- compiled catalog (built once at import) ----------
+# Everything below is derived from the tables above, so the hot path does
+# dict lookups instead of rescanning SORENESS_MAP lists and alt tables.
+
+EQUIPMENT_MODES = ("gym", "dumbbells", "bodyweight")
+
+# exercise name -> muscles whose soreness aggravates it (inverse of SORENESS_MAP)
+EXERCISE_MUSCLES = {}
+for _muscle, _exercises in SORENESS_MAP.items():
+    for _ex in _exercises:
+        EXERCISE_MUSCLES.setdefault(_ex, set()).add(_muscle)
+EXERCISE_MUSCLES = {ex: frozenset(ms) for ex, ms in EXERCISE_MUSCLES.items()}
+
+# (focus, equipment mode) -> ((name, sets, reps), ...) after substitution
+BLOCK_TEMPLATES = {
+    (focus, mode): tuple((b["name"], b["sets"], b["reps"]) for b in _apply_equipment(blocks, mode))
+    for focus, blocks in BASE_EXERCISES.items()
+    for mode in EQUIPMENT_MODES
+}
+
+_NO_MUSCLES = frozenset()
+
+def _equipment_mode(equipment: str) -> str:
+    # anything that isn't a gym or dumbbells gets the band/bodyweight alternatives
+    return equipment if equipment in ("gym", "dumbbells") else "bodyweight"
+
+def _sore_muscles(soreness) -> frozenset:
+    """Muscles at soreness >= 3, the threshold that lightens an exercise."""
+    if not soreness:
+        return _NO_MUSCLES
+    return frozenset(m for m, lvl in soreness.items() if lvl >= 3)
+
+def _light_name(name: str) -> str:
+    return f"Light {name} (reduce load 20%)"
+
 def adjust_for_soreness(blocks, soreness):
     if not soreness:
         return blocks
+    sore = _sore_muscles(soreness)
     out = []
     for b in blocks:
-        aggravated = any(b["name"] in SORENESS_MAP.get(m, []) and lvl >= 3
-                         for m, lvl in soreness.items())
-        out.append({**b, "name": f"Light {b['name']} (reduce load 20%)"} if aggravated else b)
+        aggravated = not EXERCISE_MUSCLES.get(b["name"], _NO_MUSCLES).isdisjoint(sore)
+        out.append({**b, "name": _light_name(b["name"])} if aggravated else b)
     return out
 
 def select_blocks(focus: str):
@@ -123,21 +170,54 @@ def focus_sequence_for_days(days_per_week: int):
     if days_per_week == 5: return ["upper","lower","full","upper","lower"]
     return ["upper","lower","upper","lower","upper","lower"]
 
-def build_workout_plan(focus, last_log_by_ex, soreness=None, equipment="gym"):
-    base = _apply_equipment(select_blocks(focus), equipment)
-    planned = []
-    for b in base:
-        last = last_log_by_ex.get(b["name"], [])
-        delta = progressive_overload(last)
-        planned.append({**b, "weight_delta": delta})
-    planned = adjust_for_soreness(planned, soreness)
+def _weight_delta(name, last_log_by_ex, stats_by_ex):
+    if stats_by_ex is not None:
+        stats = stats_by_ex.get(name)
+        return overload_for_avg_rir(stats["avg_rir"] if stats else None)
+    return progressive_overload(last_log_by_ex.get(name, []))
+
+@lru_cache(maxsize=4096)
+def _compiled_day(focus, mode, deltas, sore):
+    """Final (name, sets, reps, weight_delta) rows for one day; memoized.
+
+    Every argument is hashable: `deltas` lines up with the template's blocks
+    and `sore` is the frozenset from _sore_muscles.
+    """
+    rows = []
+    for (name, sets, reps), delta in zip(BLOCK_TEMPLATES[(focus, mode)], deltas):
+        if not EXERCISE_MUSCLES.get(name, _NO_MUSCLES).isdisjoint(sore):
+            name = _light_name(name)
+        rows.append((name, sets, reps, delta))
+    return tuple(rows)
+
+def build_workout_plan(focus, last_log_by_ex=None, soreness=None, equipment="gym", stats_by_ex=None):
+    """Build one day's plan.
+
+    Pass either raw recent sets (`last_log_by_ex`, {name: [set, ...]}) or
+    precomputed per-exercise stats (`stats_by_ex`, {name: {"avg_rir": ...}},
+    as returned by db.get_exercise_stats). With stats the work per plan is
+    O(exercises) regardless of how much history has been logged.
+
+    The day itself comes from _compiled_day, keyed on (focus, equipment,
+    weight deltas, sore muscles), so identical inputs are assembled once and
+    each call only builds fresh dicts from the cached rows.
+    """
+    last_log_by_ex = last_log_by_ex or {}
+    mode = _equipment_mode(equipment)
+    template = BLOCK_TEMPLATES.get((focus, mode), ())
+    deltas = tuple(_weight_delta(name, last_log_by_ex, stats_by_ex) for name, _, _ in template)
+    rows = _compiled_day(focus, mode, deltas, _sore_muscles(soreness)) if template else ()
+    planned = [
+        {"name": name, "sets": sets, "reps": reps, "weight_delta": delta}
+        for name, sets, reps, delta in rows
+    ]
     return {"date": str(date.today()), "focus": focus, "equipment": equipment, "exercises": planned}
 
-def build_week_plan(days_per_week, last_log_by_ex, soreness=None, equipment="gym"):
+def build_week_plan(days_per_week, last_log_by_ex=None, soreness=None, equipment="gym", stats_by_ex=None):
     seq = focus_sequence_for_days(days_per_week)
     week = []
     for day_idx, focus in enumerate(seq, start=1):
-        d = build_workout_plan(focus, last_log_by_ex, soreness, equipment)
+        d = build_workout_plan(focus, last_log_by_ex, soreness, equipment, stats_by_ex)
         d["day"] = day_idx
         week.append(d)
     return {"days": days_per_week, "schedule": seq, "plans": week}
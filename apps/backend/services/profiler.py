@@ -0,0 +1,95 @@
+# apps/backend/services/profiler.py
+"""
+Minimal wall-clock sampling profiler for one request at a time.
+
+A background thread wakes every `interval` seconds, grabs every other
+thread's current stack (sys._current_frames) and counts it in folded form
+("outer;inner;leaf count"), the input format of flamegraph.pl and speedscope.
+All threads are sampled because a request's work is split between the event
+loop and the threadpool; with concurrent traffic the profile therefore also
+contains other requests' stacks.
+
+Finished profiles are kept in a small in-memory ring (latest N).
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+SAMPLE_INTERVAL_S = float(os.getenv("GYMGPT_PROFILE_INTERVAL", "0.001"))
+MAX_PROFILES = int(os.getenv("GYMGPT_PROFILE_KEEP", "20"))
+MAX_DEPTH = 64
+
+_ids = itertools.count(1)
+_profiles: "OrderedDict[str, dict]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def _fold(frame) -> str:
+    parts = []
+    while frame is not None and len(parts) < MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    self._stacks[_fold(frame)] += 1
+            self.samples += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, label: str = "") -> dict:
+        """Stop sampling and store the profile; returns it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        profile = {
+            "id": self.id,
+            "label": label,
+            "duration_s": round(time.perf_counter() - self._started, 6),
+            "samples": self.samples,
+            "interval_s": self.interval,
+            "folded": "\n".join(f"{stack} {n}" for stack, n in self._stacks.most_common()),
+        }
+        with _profiles_lock:
+            _profiles[self.id] = profile
+            while len(_profiles) > MAX_PROFILES:
+                _profiles.popitem(last=False)
+        return profile
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles() -> Dict[str, dict]:
+    with _profiles_lock:
+        return {
+            pid: {k: v for k, v in p.items() if k != "folded"} for pid, p in reversed(_profiles.items())
+        }
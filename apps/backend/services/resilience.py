@@ -0,0 +1,405 @@
+# apps/backend/services/resilience.py
+"""
+Deadlines, retries, hedging and a circuit breaker for upstream calls.
+
+CallPolicy runs one logical call as one or more attempts, all inside a
+single deadline:
+
+- Retries: an attempt that fails with an upstream fault (timeout,
+  connection error, 429 or 5xx) is retried after a full-jitter backoff, but
+  only while the backoff still fits in the remaining budget. Other errors
+  (a 400, bad credentials) are the caller's and raise at once.
+- Hedging: when an attempt has run longer than the operation's recent p95
+  latency, a second identical attempt starts and the first answer wins; the
+  loser is cancelled. At p95 this costs about 5% extra upstream calls and
+  cuts the slow tail. No hedging until enough latencies are seen, or while
+  the breaker is not closed.
+- Circuit breaker: after `failure_threshold` consecutive faulty attempts
+  the breaker opens and calls fail fast with CircuitOpenError instead of
+  waiting out their deadline. After `reset_after_s` one probe call is let
+  through (half-open); its outcome closes or re-opens the breaker.
+
+Attempts are functions of the call's absolute deadline (loop.time() for
+`call`, time.monotonic() for `call_sync`) and must give up (raise a
+timeout) when it passes, including while they queue for local resources.
+A deadline that runs out in such a queue should raise SlotTimeoutError: the
+upstream was never asked, so it is neither retried nor held against it.
+`call` is for coroutines; `call_sync` runs blocking attempts (hedges on a
+small thread pool, since a blocking call can't be cancelled, only abandoned
+to its own timeout).
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from services import metrics
+
+LLM_RETRIES = metrics.REGISTRY.counter(
+    "gymgpt_llm_retries_total", "Upstream LLM attempts retried after a fault.", ("operation",)
+)
+LLM_HEDGES = metrics.REGISTRY.counter(
+    "gymgpt_llm_hedges_total",
+    "Hedged second attempts started, by which attempt answered first (or none).",
+    ("operation", "winner"),
+)
+LLM_CIRCUIT_STATE = metrics.REGISTRY.gauge(
+    "gymgpt_llm_circuit_state", "Upstream circuit breaker: 0 closed, 1 half-open, 2 open.", ("upstream",)
+)
+LLM_CIRCUIT_REJECTIONS = metrics.REGISTRY.counter(
+    "gymgpt_llm_circuit_rejections_total", "Calls failed fast by an open circuit breaker.", ("operation",)
+)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# 408 request timeout, 409 conflict (OpenAI's own retry list), 429 rate limit
+RETRY_STATUSES = frozenset({408, 409, 429})
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered down; the call was not attempted."""
+
+    def __init__(self, upstream: str, retry_after_s: float):
+        super().__init__(f"{upstream} circuit is open; retry in {retry_after_s:.0f}s")
+        self.retry_after_s = retry_after_s
+
+
+class SlotTimeoutError(asyncio.TimeoutError):
+    """The deadline passed while the attempt queued for a local resource; the upstream was never asked."""
+
+
+def is_upstream_fault(exc: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx: worth a retry, and evidence the upstream is unhealthy."""
+    if isinstance(exc, SlotTimeoutError):
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    # the OpenAI SDK's errors, matched by shape so this module doesn't import it
+    if type(exc).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status in RETRY_STATUSES or status >= 500)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_after_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejections = 0
+        LLM_CIRCUIT_STATE.set(0, upstream=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_after_s:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        LLM_CIRCUIT_STATE.set(_STATE_VALUES[state], upstream=self.name)
+
+    def allow(self, operation: str = "") -> None:
+        """Raise CircuitOpenError unless a call may go upstream now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True  # one probe at a time
+                return
+            self.rejections += 1
+            retry_after = max(0.0, self._opened_at + self.reset_after_s - self._clock())
+        LLM_CIRCUIT_REJECTIONS.inc(operation=operation)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def abandon(self) -> None:
+        """The call was cancelled before an outcome: let another call probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            probe_failed, self._probing = self._probing, False
+            if probe_failed or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "rejections": self.rejections,
+            }
+
+
+class LatencyWindow:
+    """The last `size` successful attempt latencies of one operation."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CallPolicy:
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_attempts: int = 3,
+        backoff_s: float = 0.2,
+        max_backoff_s: float = 2.0,
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        hedge_min_s: float = 0.1,
+        hedge_threads: int = 16,
+    ):
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_s = hedge_min_s
+        self.hedge_threads = hedge_threads
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def latencies(self, operation: str) -> LatencyWindow:
+        with self._lock:
+            window = self._latencies.get(operation)
+            if window is None:
+                window = self._latencies[operation] = LatencyWindow()
+            return window
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        """Seconds after which a hedge starts, or None for no hedging."""
+        if not self.hedge or self.breaker.state != CLOSED:
+            return None
+        q = self.latencies(operation).quantile(self.hedge_quantile)
+        return None if q is None else max(q, self.hedge_min_s)
+
+    def _backoff(self, retry: int) -> float:
+        # "full jitter": retries from many callers don't arrive in lockstep
+        return random.uniform(0, min(self.max_backoff_s, self.backoff_s * 2 ** (retry - 1)))
+
+    def _admit(self, operation: str, retry: int, remaining: float, last: BaseException) -> float:
+        """Backoff before retry number `retry`; raises `last` when there is no retry to make."""
+        if retry >= self.max_attempts:
+            raise last
+        delay = self._backoff(retry)
+        if delay >= remaining:
+            raise last
+        try:
+            self.breaker.allow(operation)
+        except CircuitOpenError:
+            raise last from None
+        LLM_RETRIES.inc(operation=operation)
+        return delay
+
+    def record_outcome(self, exc: Optional[BaseException]) -> None:
+        """Feed the breaker one call's result: None for success, else its exception."""
+        if isinstance(exc, SlotTimeoutError):
+            # local congestion says nothing about the upstream either way
+            self.breaker.abandon()
+        elif exc is not None and is_upstream_fault(exc):
+            self.breaker.record_failure()
+        else:
+            # any answer, even a 400, shows the upstream is up
+            self.breaker.record_success()
+
+    # ---------- coroutines ----------
+
+    async def call(self, operation: str, attempt: Callable[[float], Awaitable[Any]], deadline_s: float) -> Any:
+        """Run `attempt(deadline)` until it succeeds, the budget runs out or the error is final."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_s
+        self.breaker.allow(operation)
+        retry = 0
+        while True:
+            try:
+                result = await self._hedged(operation, attempt, deadline)
+            except BaseException as e:
+                if not isinstance(e, Exception):  # cancelled: no verdict on the upstream
+                    self.breaker.abandon()
+                    raise
+                self.record_outcome(e)
+                if not is_upstream_fault(e):
+                    raise
+                retry += 1
+                await asyncio.sleep(self._admit(operation, retry, deadline - loop.time(), e))
+                continue
+            self.record_outcome(None)
+            return result
+
+    async def _hedged(self, operation: str, attempt, deadline: float) -> Any:
+        loop = asyncio.get_running_loop()
+        started: Dict[asyncio.Future, float] = {}
+
+        def start() -> asyncio.Future:
+            started_at = loop.time()
+            # the attempt enforces the deadline itself, so a timeout is
+            # reported (and instrumented) as one rather than as a cancellation
+            task = asyncio.ensure_future(attempt(deadline))
+            # a losing attempt may still fail after the call has returned
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            started[task] = started_at
+            return task
+
+        primary = start()
+        delay = self.hedge_delay(operation)
+        hedge_at = None if delay is None or started[primary] + delay >= deadline else started[primary] + delay
+        pending = {primary}
+        last: Optional[BaseException] = None
+        try:
+            while pending:
+                wait_s = None if hedge_at is None else hedge_at - loop.time()
+                done, pending = await asyncio.wait(pending, timeout=wait_s, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies(operation).observe(loop.time() - started[task])
+                        if len(started) > 1:
+                            LLM_HEDGES.inc(operation=operation, winner="primary" if task is primary else "hedge")
+                        return task.result()
+                    last = task.exception()
+                    if not is_upstream_fault(last):
+                        raise last
+                if pending and hedge_at is not None and loop.time() >= hedge_at:
+                    hedge_at = None
+                    pending.add(start())
+            if len(started) > 1:
+                LLM_HEDGES.inc(operation=operation, winner="none")
+            raise last
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ---------- blocking calls ----------
+
+    def call_sync(self, operation: str, attempt: Callable[[float], Any], deadline_s: float) -> Any:
+        """call() for a blocking `attempt(deadline)`; it must honour that deadline itself."""
+        deadline = time.monotonic() + deadline_s
+        self.breaker.allow(operation)
+        retry = 0
+        while True:
+            try:
+                result = self._hedged_sync(operation, attempt, deadline)
+            except BaseException as e:
+                if not isinstance(e, Exception):  # cancelled: no verdict on the upstream
+                    self.breaker.abandon()
+                    raise
+                self.record_outcome(e)
+                if not is_upstream_fault(e):
+                    raise
+                retry += 1
+                time.sleep(self._admit(operation, retry, deadline - time.monotonic(), e))
+                continue
+            self.record_outcome(None)
+            return result
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.hedge_threads, thread_name_prefix="hedge")
+            return self._executor
+
+    def _hedged_sync(self, operation: str, attempt, deadline: float) -> Any:
+        delay = self.hedge_delay(operation)
+        if delay is None:
+            # nothing to race against: run in the caller's thread
+            t0 = time.monotonic()
+            result = attempt(deadline)
+            self.latencies(operation).observe(time.monotonic() - t0)
+            return result
+
+        pool = self._pool()
+        started: Dict[concurrent.futures.Future, float] = {}
+
+        def start() -> concurrent.futures.Future:
+            t0 = time.monotonic()
+            future = pool.submit(attempt, deadline)
+            started[future] = t0
+            return future
+
+        primary = start()
+        hedge_at = None if started[primary] + delay >= deadline else started[primary] + delay
+        pending = {primary}
+        last: Optional[BaseException] = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                raise TimeoutError(f"{operation} deadline exceeded")
+            wait_s = deadline - now if hedge_at is None else min(deadline, hedge_at) - now
+            done, pending = concurrent.futures.wait(pending, timeout=wait_s, return_when="FIRST_COMPLETED")
+            for future in done:
+                if future.exception() is None:
+                    self.latencies(operation).observe(time.monotonic() - started[future])
+                    if len(started) > 1:
+                        LLM_HEDGES.inc(operation=operation, winner="primary" if future is primary else "hedge")
+                    return future.result()
+                last = future.exception()
+                if not is_upstream_fault(last):
+                    raise last
+            if pending and hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                pending.add(start())
+        if len(started) > 1:
+            LLM_HEDGES.inc(operation=operation, winner="none")
+        raise last
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = list(self._latencies)
+        return {
+            "breaker": self.breaker.stats(),
+            "hedge_after_s": {op: self.hedge_delay(op) for op in operations},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
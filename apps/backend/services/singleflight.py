@@ -0,0 +1,76 @@
+# apps/backend/services/singleflight.py
+"""
+Single-flight coalescing for async work.
+
+Concurrent callers that ask for the same key while a call is already in
+flight wait on that call instead of starting their own, and all of them get
+its result (or its exception). The shared call runs as its own task, so a
+caller that disconnects does not cancel the upstream request for the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.callers = 1
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()  # guards the counters, read from other threads
+        self._callers_per_call: Counter = Counter()
+        self._upstream_calls = 0
+        self._callers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `fn()` once per key among concurrent callers.
+
+        Returns (result, shared) where shared is True for callers that
+        piggybacked on someone else's call.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if shared:
+            call.callers += 1
+        else:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._finish(k, c))
+        return await asyncio.shield(call.task), shared
+
+    def _finish(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()  # mark retrieved even if every caller went away
+        with self._lock:
+            self._upstream_calls += 1
+            self._callers += call.callers
+            self._callers_per_call[call.callers] += 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, callers = self._upstream_calls, self._callers
+            per_call = dict(sorted(self._callers_per_call.items()))
+        return {
+            "upstream_calls": calls,
+            "callers": callers,
+            "coalesced_callers": callers - calls,
+            "avg_callers_per_call": round(callers / calls, 3) if calls else 0.0,
+            "max_callers_per_call": max(per_call, default=0),
+            "callers_per_call": per_call,
+            "in_flight": self.in_flight(),
+        }
@@ -0,0 +1,178 @@
+# apps/backend/services/writer.py
+"""
+Group commit for SQLite writes.
+
+Every commit in WAL mode with synchronous=FULL ends in an fsync, so writing
+rows one transaction at a time caps inserts at the disk's sync rate, and
+concurrent writers queue on SQLite's single write lock (busy_timeout
+retries, or "database is locked" once that runs out).
+
+GroupCommitWriter owns one connection and one thread. Callers hand it a
+function of a connection; the thread runs everything queued in one
+transaction, each function inside its own SAVEPOINT (so one failing write
+rolls back alone and raises only in its caller), commits once, and then
+hands every caller its result. Batches are bounded by size (`max_batch`)
+and time (`max_wait_s` after the first write of a batch); under load they
+also form naturally from whatever queued up during the previous commit.
+Callers only get a result after the commit that made it durable.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = metrics.REGISTRY.histogram(
+    "gymgpt_db_write_batch_size",
+    "Writes committed per group-commit transaction.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+WRITE_COMMIT_SECONDS = metrics.REGISTRY.histogram(
+    "gymgpt_db_write_commit_seconds", "Duration of one group-commit transaction, BEGIN to COMMIT."
+)
+WRITE_QUEUE_SECONDS = metrics.REGISTRY.histogram(
+    "gymgpt_db_write_queue_seconds", "Time writes waited for the writer thread."
+)
+
+WriteFn = Callable[[sqlite3.Connection], Any]
+_STOP = object()
+
+
+class GroupCommitWriter:
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        max_batch: int = 64,
+        max_wait_s: float = 0.002,
+        max_queued: int = 10_000,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self._connect = connect
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+
+    def submit(self, fn: WriteFn) -> Future:
+        """Queue `fn(conn)`; the future resolves after its batch commits."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((fn, future, time.perf_counter()))
+        return future
+
+    def run(self, fn: WriteFn) -> Any:
+        """submit() and wait; a write issued from the writer thread itself runs inline."""
+        if threading.current_thread() is self._thread:
+            return fn(self._conn)
+        return self.submit(fn).result()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Commit what is queued, then stop the thread and close the connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "avg_batch": round(self.writes / self.batches, 2) if self.batches else None,
+            "queued": self._queue.qsize(),
+        }
+
+    # ---------- writer thread ----------
+
+    def _collect(self, first) -> Tuple[List[tuple], bool]:
+        batch, stop = [first], False
+        deadline = time.perf_counter() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.perf_counter()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _run(self) -> None:
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch, stop = self._collect(first)
+                self._commit(batch)
+                if stop:
+                    return
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+
+    def _commit(self, batch: List[tuple]) -> None:
+        start = time.perf_counter()
+        results: List[Tuple[Future, bool, Any]] = []
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+                self._conn.isolation_level = None  # explicit BEGIN/SAVEPOINT/COMMIT below
+            self._conn.execute("BEGIN IMMEDIATE")
+            for fn, future, queued_at in batch:
+                WRITE_QUEUE_SECONDS.observe(start - queued_at)
+                self._conn.execute("SAVEPOINT write")
+                try:
+                    results.append((future, True, fn(self._conn)))
+                    self._conn.execute("RELEASE write")
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO write")
+                    self._conn.execute("RELEASE write")
+                    results.append((future, False, e))
+            self._conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN or COMMIT failed (e.g. the lock wait ran out): nothing
+            # in this batch was written
+            logger.warning("group commit of %d writes failed: %s", len(batch), e)
+            try:
+                if self._conn is not None and self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                self._conn.close()
+                self._conn = None  # reconnect for the next batch
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        WRITE_COMMIT_SECONDS.observe(time.perf_counter() - start)
+        WRITE_BATCH_SIZE.observe(len(batch))
+        self.batches += 1
+        self.writes += len(batch)
+        for future, ok, value in results:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Ensure backend root is on the Python path so tests can import main/services
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_ROOT = os.path.dirname(CURRENT_DIR)
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+# Point the app at a throwaway database so tests never touch data/gymgpt.db.
+# This must happen before services.db is imported anywhere.
+_TMP_DIR = tempfile.mkdtemp(prefix="gymgpt-tests-")
+os.environ.setdefault("GYMGPT_DB_PATH", os.path.join(_TMP_DIR, "gymgpt.db"))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_llm_policy(monkeypatch):
+    # circuit breaker state and hedging latencies must not leak between tests
+    from services import llm
+
+    monkeypatch.setattr(llm, "policy", llm._new_policy())
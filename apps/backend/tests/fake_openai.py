@@ -0,0 +1,301 @@
+"""
+Local stand-in for the OpenAI HTTP API.
+
+Serves just enough of `/v1/chat/completions` (and `/v1/responses`) for the
+backend to run end to end without network access or an API key. Latency is
+configurable so tests and benchmarks can reproduce a slow upstream, and
+faults can be injected to reproduce a flaky or failing one:
+
+    with FakeOpenAI(latency=0.5) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        fake.inject(status=503, count=2)   # the next two calls fail
+        fake.inject(delay=2.0)             # the one after that is very slow
+        fake.error_rate = 0.1              # then 10% of calls fail at random
+
+Chat completions with a response_format answer with a plan; without one
+(explanations, coaching) they answer with a short text.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+
+def sample_plan(days: int = 3) -> Dict[str, Any]:
+    """A schema-valid GeneratePlanResponse payload with `days` days."""
+    split = []
+    for i in range(1, days + 1):
+        split.append(
+            {
+                "day": f"Day {i}",
+                "focus": "Upper" if i % 2 else "Lower",
+                "warmup": ["5 min bike", "Band pull-aparts"],
+                "main": [
+                    {
+                        "name": "Barbell Bench Press" if i % 2 else "Back Squat",
+                        "sets": 3,
+                        "reps": "6-8",
+                        "rpe": 8,
+                        "rest_seconds": 150,
+                        "notes": "",
+                    }
+                ],
+                "accessories": [
+                    {
+                        "name": "Lat Pulldown" if i % 2 else "Romanian Deadlift",
+                        "sets": 3,
+                        "reps": "10-12",
+                        "rpe": None,
+                        "rest_seconds": 90,
+                        "notes": "",
+                    }
+                ],
+                "finisher": [],
+                "cooldown": ["Light stretching"],
+            }
+        )
+    return {
+        "title": f"{days}-Day Test Plan",
+        "summary": "Deterministic plan served by the fake OpenAI server.",
+        "weekly_split": split,
+        "progression_notes": ["Add a rep each week."],
+        "safety_notes": ["Stop if anything hurts."],
+    }
+
+
+def _days_from_messages(messages: List[Dict[str, Any]]) -> int:
+    for m in messages:
+        found = re.search(r"Generate a (\d+)-day", str(m.get("content", "")))
+        if found:
+            return int(found.group(1))
+    return 3
+
+
+class FakeOpenAI:
+    """Runs the fake API on a background uvicorn server bound to 127.0.0.1."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, plan: Optional[Dict[str, Any]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.plan = plan
+        self.stream_chunk_chars = 40
+        # random faults: share of calls answered with `error_status`, and
+        # share delayed by an extra `slow_latency` seconds
+        self.error_rate = 0.0
+        self.error_status = 500
+        self.slow_rate = 0.0
+        self.slow_latency = 1.0
+        self._faults: Deque[Tuple[Optional[int], float]] = deque()
+        self.faults_served = 0
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.port: Optional[int] = None
+        self.app = Starlette(
+            routes=[
+                Route("/v1/chat/completions", self._chat_completions, methods=["POST"]),
+                Route("/v1/responses", self._responses, methods=["POST"]),
+            ]
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def inject(self, status: Optional[int] = None, delay: float = 0.0, count: int = 1) -> None:
+        """Make the next `count` calls fail with `status` and/or take `delay` extra seconds."""
+        with self._lock:
+            self._faults.extend([(status, delay)] * count)
+
+    def _next_fault(self) -> Tuple[Optional[int], float]:
+        with self._lock:
+            if self._faults:
+                self.faults_served += 1
+                return self._faults.popleft()
+        status = self.error_status if self.error_rate and random.random() < self.error_rate else None
+        delay = self.slow_latency if self.slow_rate and random.random() < self.slow_rate else 0.0
+        return status, delay
+
+    async def _delay(self, extra: float = 0.0) -> None:
+        delay = extra + self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _error(status: int) -> Response:
+        return JSONResponse(
+            {"error": {"message": f"injected fault ({status})", "type": "server_error", "code": None}},
+            status_code=status,
+        )
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def _chat_completions(self, request: Request):
+        try:
+            body = await request.json()
+        except ClientDisconnect:  # e.g. a hedged request cancelled mid-upload
+            return Response(status_code=499)
+        if body.get("stream"):
+            status, extra = self._next_fault()
+            if status is not None:
+                return self._error(status)
+            return StreamingResponse(self._stream_chunks(body, extra), media_type="text/event-stream")
+        self._enter()
+        try:
+            status, extra = self._next_fault()
+            await self._delay(extra)
+            if status is not None:
+                return self._error(status)
+            if body.get("response_format"):
+                content = json.dumps(self.plan or sample_plan(_days_from_messages(body.get("messages", []))))
+            else:
+                content = "This is a fake coaching explanation."
+            return JSONResponse(
+                {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 200,
+                        "completion_tokens": len(content) // 4,
+                        "total_tokens": 200 + len(content) // 4,
+                    },
+                }
+            )
+        finally:
+            self._exit()
+
+    async def _stream_chunks(self, body: Dict[str, Any], extra: float = 0.0):
+        """SSE chunks in the OpenAI streaming format; latency is spread across them."""
+        self._enter()
+        try:
+            if extra:
+                await asyncio.sleep(extra)
+            plan = self.plan or sample_plan(_days_from_messages(body.get("messages", [])))
+            content = json.dumps(plan)
+            size = self.stream_chunk_chars
+            pieces = [content[i : i + size] for i in range(0, len(content), size)]
+            delay = self.latency / max(1, len(pieces))
+            for piece in pieces:
+                if delay:
+                    await asyncio.sleep(delay)
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            self._exit()
+
+    async def _responses(self, request: Request):
+        body = await request.json()
+        self._enter()
+        try:
+            status, extra = self._next_fault()
+            await self._delay(extra)
+            if status is not None:
+                return self._error(status)
+            text = "This is a fake coaching explanation."
+            return JSONResponse(
+                {
+                    "id": "resp-fake",
+                    "object": "response",
+                    "created_at": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "status": "completed",
+                    "output": [
+                        {
+                            "type": "message",
+                            "id": "msg-fake",
+                            "role": "assistant",
+                            "status": "completed",
+                            "content": [{"type": "output_text", "text": text, "annotations": []}],
+                        }
+                    ],
+                    "usage": {"input_tokens": 100, "output_tokens": 10, "total_tokens": 110},
+                }
+            )
+        finally:
+            self._exit()
+
+    def start(self) -> "FakeOpenAI":
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        sock.close()
+        config = uvicorn.Config(
+            self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off", ws="none"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake OpenAI server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = None
+
+    def __enter__(self) -> "FakeOpenAI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Run the fake OpenAI API locally.")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with a 500")
+    ap.add_argument("--slow-rate", type=float, default=0.0, help="share of calls delayed by --slow-latency")
+    ap.add_argument("--slow-latency", type=float, default=1.0)
+    args = ap.parse_args()
+    fake = FakeOpenAI(latency=args.latency, jitter=args.jitter)
+    fake.error_rate, fake.slow_rate, fake.slow_latency = args.error_rate, args.slow_rate, args.slow_latency
+    uvicorn.run(fake.app, host="127.0.0.1", port=args.port)
@@ -17,54 +17,71 @@ client = TestClient(app)
 def test_health():
     resp = client.get("/health")
     assert resp.status_code == 200
-    assert resp.json() == {"ok": True}
+    assert resp.json() == {"status": "ok"}
 
 
-def test_generate_workout_basic():
+def test_generate_plan_without_upstream(monkeypatch):
+    # no API key: the endpoint answers with the locally built plan
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
     payload = {
-        "focus": "upper",
-        "equipment": "gym",
-        "soreness_text": "no soreness anywhere",
-        "use_db_logs": False,
+        "goal": "hypertrophy",
+        "days_per_week": 4,
+        "equipment": "full_gym",
+        "soreness_notes": "no soreness anywhere",
     }
-    resp = client.post("/plans/workout", json=payload)
+    resp = client.post("/plans/generate", json=payload)
     data = resp.json()
 
     assert resp.status_code == 200
-    assert data["focus"] == "upper"
-    assert data["equipment"] == "gym"
-    assert isinstance(data["exercises"], list)
-    assert len(data["exercises"]) > 0
-    # explanation should be a non-empty string now
-    assert isinstance(data["explanation"], str)
-    assert data["explanation"].strip() != ""
+    assert data["source"] == "fallback"
+    assert [d["focus"] for d in data["weekly_split"]] == ["Upper", "Lower", "Upper", "Lower"]
+    assert all(len(d["main"]) > 0 for d in data["weekly_split"])
+
+    # the plan was saved and reads back by id
+    saved = client.get(f"/plans/{data['id']}")
+    assert saved.status_code == 200
+    assert saved.json()["output"]["title"] == data["title"]
+
 
+def test_log_and_use_db(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
 
-def test_log_and_use_db():
     # 1) log a set
     log_payload = {
-        "name": "Barbell Bench Press",
+        "name": "Barbell Row",
         "reps": 8,
         "weight_kg": 70,
-        "rir": 1,
+        "rir": 3,
         "focus": "upper",
     }
     resp_log = client.post("/logs/", json=log_payload)
     assert resp_log.status_code == 200
     added = resp_log.json()["added"]
-    assert added["name"] == "Barbell Bench Press"
+    assert added["name"] == "Barbell Row"
 
-    # 2) generate a plan that can (optionally) use DB logs
-    workout_payload = {
-        "focus": "upper",
-        "equipment": "gym",
-        "soreness_text": "no soreness",
-        "use_db_logs": True,
-    }
-    resp_plan = client.post("/plans/workout", json=workout_payload)
+    listed = client.get("/logs/", params={"focus": "upper"}).json()["items"]
+    assert any(row["id"] == added["id"] for row in listed)
+
+    # 2) the local plan progresses the logged exercise (avg RIR >= 2 -> +2.5 kg)
+    resp_plan = client.post("/plans/generate", json={"days_per_week": 2, "equipment": "full_gym"})
     data = resp_plan.json()
 
     assert resp_plan.status_code == 200
-    assert data["focus"] == "upper"
-    assert isinstance(data["exercises"], list)
-    assert len(data["exercises"]) > 0
\ No newline at end of file
+    upper = data["weekly_split"][0]
+    row = next(e for e in upper["main"] if e["name"] == "Barbell Row")
+    assert "2.5 kg" in row["notes"]
+
+
+def test_import_has_no_side_effects(tmp_path):
+    import subprocess
+
+    db_path = tmp_path / "fresh" / "gymgpt.db"
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    env["GYMGPT_DB_PATH"] = str(db_path)
+    code = "import sys, main; print('openai' in sys.modules, 'httpx' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_ROOT, env=env, capture_output=True, text=True)
+
+    # no API key needed, no heavy LLM client imported, no database touched
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split() == ["False", "False"]
+    assert not db_path.parent.exists()
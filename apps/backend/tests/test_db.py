@@ -0,0 +1,198 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from services import db, plan_codec
+from services.writer import GroupCommitWriter
+
+
+def setup_module(module):
+    db.init_db()
+
+
+def test_pool_reuses_connections():
+    db.close_pool()
+    first = db.add_log("Barbell Row", 8, 60.0, 2, "upper")
+    pool = db.get_pool()
+    # the insert went through the writer's own connection
+    assert pool.health()["open"] == 0
+    db.get_plan(1)
+    assert pool.health()["open"] == 1
+
+    for _ in range(20):
+        db.get_plan(1)
+        db.list_plans()
+    assert pool.health()["open"] == 1
+
+    row = db.get_logs("upper")[0]
+    assert row["id"] == first["id"]
+
+
+def test_pool_is_bounded_across_threads():
+    db.close_pool()
+    errors = []
+
+    def work():
+        try:
+            for _ in range(25):
+                db.add_log("Lat Pulldown", 10, 45.0, 1, "upper")
+                db.list_plans(limit=5)
+        except Exception as e:  # pragma: no cover - surfaced via assert below
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(db.POOL_SIZE * 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    health = db.get_pool().health()
+    assert health["open"] <= db.POOL_SIZE
+    assert health["idle"] == health["open"]
+
+
+def test_failed_write_rolls_back_and_connection_survives():
+    db.close_pool()
+    before = len(db.get_logs())
+    try:
+        with db._conn() as conn:
+            conn.execute(
+                "INSERT INTO logs(name, reps, weight_kg, rir) VALUES (?,?,?,?)",
+                ("Row", 8, 50.0, 2),
+            )
+            conn.execute("INSERT INTO logs(name) VALUES (NULL)")  # NOT NULL violation
+    except Exception:
+        pass
+    assert len(db.get_logs()) == before
+    assert db.get_pool().health()["open"] == 1
+
+
+def test_close_pool_then_reopen():
+    db.add_log("Row", 8, 50.0, 2)
+    pool = db.get_pool()
+    db.close_pool()
+    assert pool.health() == {"size": pool.size, "open": 0, "idle": 0, "closed": True}
+    # next call transparently builds a fresh pool
+    assert db.get_logs()
+
+
+def test_latest_sets_track_inserts_and_match_full_scan():
+    rows = [("Hip Thrust", 10, 60.0 + i, i % 3, "lower", f"2024-03-{1 + i:02d} 09:00:00") for i in range(9)]
+    # an old imported set must not displace newer ones
+    rows.append(("Hip Thrust", 10, 1.0, 0, "lower", "2020-01-01 00:00:00"))
+    db.add_logs_bulk(rows)
+    db.add_log("Hip Thrust", 8, 100.0, 1, "lower")  # CURRENT_TIMESTAMP: the newest
+
+    latest = db.get_latest_by_exercise(3, names=["Hip Thrust"])["Hip Thrust"]
+    assert [s["weight_kg"] for s in latest] == [100.0, 68.0, 67.0]
+    assert latest == db._latest_by_exercise_scan(3, ["Hip Thrust"])["Hip Thrust"]
+
+    with db._conn() as conn:
+        kept = conn.execute("SELECT COUNT(*) FROM latest_sets WHERE name = ?", ("Hip Thrust",)).fetchone()[0]
+    assert kept == db.LATEST_SETS_PER_EXERCISE
+
+
+def test_bulk_import_suspends_the_trigger_without_schema_changes():
+    db.init_db()
+    with db._conn() as conn:
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    db.add_logs_bulk([("Cable Fly", 12, 20.0 + i, 2, "upper", None) for i in range(3)])
+    db.add_log("Cable Fly", 12, 30.0, 1, "upper")  # the trigger still runs afterwards
+
+    with db._conn() as conn:
+        assert conn.execute("PRAGMA schema_version").fetchone()[0] == version
+        assert conn.execute("SELECT COUNT(*) FROM bulk_load_guard").fetchone()[0] == 0
+        # re-running the schema setup leaves an unchanged trigger alone
+        db._create_schema(conn)
+        assert conn.execute("PRAGMA schema_version").fetchone()[0] == version
+    assert db.get_latest_by_exercise(1, names=["Cable Fly"])["Cable Fly"][0]["weight_kg"] == 30.0
+
+
+def test_rebuild_latest_sets_matches_trigger_state():
+    before = db.get_latest_by_exercise(db.LATEST_SETS_PER_EXERCISE)
+    db.rebuild_latest_sets()
+    assert db.get_latest_by_exercise(db.LATEST_SETS_PER_EXERCISE) == before
+    assert db.get_latest_by_exercise(db.LATEST_SETS_PER_EXERCISE) == db._latest_by_exercise_scan(
+        db.LATEST_SETS_PER_EXERCISE
+    )
+
+
+def test_plans_are_stored_compressed_and_read_back_as_text():
+    output_json = json.dumps({"title": "Stored plan", "weekly_split": [{"day": "Day 1", "main": []}]})
+    saved = db.add_plan("Stored plan", '{"goal":"strength"}', output_json)
+    assert saved["output_json"] == output_json
+
+    with db._conn() as conn:
+        raw = conn.execute("SELECT output_json, codec FROM plans WHERE id = ?", (saved["id"],)).fetchone()
+    assert raw["codec"] == plan_codec.CURRENT == plan_codec.DEFLATE_V1
+    assert isinstance(raw["output_json"], bytes) and len(raw["output_json"]) < len(output_json)
+
+    plan = db.get_plan(saved["id"])
+    assert plan == saved
+
+
+def test_recompress_plans_migrates_plain_rows():
+    with db._conn() as conn:
+        plan_id = conn.execute(
+            "INSERT INTO plans(title, input_json, output_json) VALUES ('Old plan', '{}', '{\"title\": \"Old plan\"}')"
+        ).lastrowid
+    assert db.get_plan(plan_id)["output_json"] == '{"title": "Old plan"}'
+
+    assert db.recompress_plans() >= 1
+    assert db.recompress_plans() == 0
+    assert db.get_plan(plan_id)["output_json"] == '{"title": "Old plan"}'
+    assert set(db.plan_storage_stats()) == {plan_codec.CURRENT}
+
+
+def test_schema_migration_adds_codec_column(tmp_path):
+    conn = db._open_connection(tmp_path / "old.db")
+    conn.execute("CREATE TABLE plans(id INTEGER PRIMARY KEY, created_at DATETIME, title TEXT, input_json TEXT, output_json TEXT)")
+    conn.execute("INSERT INTO plans(title, input_json, output_json) VALUES ('Old', '{}', '{}')")
+    db._create_schema(conn)
+    assert conn.execute("SELECT codec FROM plans").fetchone()["codec"] == plan_codec.PLAIN
+    conn.close()
+
+
+def test_group_commit_returns_each_callers_row():
+    results, errors = [], []
+
+    def work(i):
+        try:
+            results.append((i, db.add_log(f"Group {i % 3}", i, 20.0 + i, 1, "full")))
+        except Exception as e:  # pragma: no cover - surfaced via assert below
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len({row["id"] for _, row in results}) == 40
+    for i, row in results:
+        assert (row["name"], row["reps"], row["weight_kg"]) == (f"Group {i % 3}", i, 20.0 + i)
+        assert row["timestamp"]
+        assert db.get_logs("full", limit=1, before_id=row["id"] + 1)[0] == row
+
+
+def test_failed_write_in_a_batch_rolls_back_alone(tmp_path):
+    conn_path = tmp_path / "writer.db"
+    writer = GroupCommitWriter(lambda: db._open_connection(conn_path), max_wait_s=0.05)
+    writer.run(lambda conn: conn.execute("CREATE TABLE t(x INTEGER UNIQUE)"))
+
+    def insert(x):
+        return lambda conn: conn.execute("INSERT INTO t(x) VALUES (?) RETURNING x", (x,)).fetchone()[0]
+
+    futures = [writer.submit(insert(x)) for x in (1, 2, 2, 3)]
+    assert [f.result() for f in (futures[0], futures[1], futures[3])] == [1, 2, 3]
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[2].result()
+    assert writer.stats()["writes"] == 5
+    assert writer.run(lambda conn: [r[0] for r in conn.execute("SELECT x FROM t ORDER BY x")]) == [1, 2, 3]
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(insert(4))
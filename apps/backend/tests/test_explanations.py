@@ -0,0 +1,91 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from services import db, explanations, llm, planner
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, messages, timeout):
+        self.calls += 1
+        text = f"explanation #{self.calls}"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"  {text}  "))],
+            usage=SimpleNamespace(prompt_tokens=50, completion_tokens=20),
+        )
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    db.init_db()
+    completions = FakeCompletions()
+    monkeypatch.setattr(llm, "get_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(llm, "EXPLAIN_PROMPT_VERSION", random.randrange(10**9))  # fresh namespace per test
+    explanations.explanation_cache.clear_local()
+    return completions
+
+
+def test_every_planner_day_is_reachable():
+    namespace = "reach"
+    reachable = {explanations.fingerprint(p, namespace) for p in explanations.reachable_plans()}
+    rng = random.Random(4)
+    names = sorted({n for tpl in planner.BLOCK_TEMPLATES.values() for n, _, _ in tpl})
+    for _ in range(500):
+        last = {n: [{"rir": rng.randint(-1, 4)}] for n in rng.sample(names, 6)}
+        sore = {m: rng.randint(1, 5) for m in rng.sample(list(planner.SORENESS_MAP) + ["calves"], 2)}
+        plan = planner.build_workout_plan(
+            rng.choice(["upper", "lower", "full"]), last, sore, rng.choice(planner.EQUIPMENT_MODES)
+        )
+        assert explanations.fingerprint(plan, namespace) in reachable
+
+
+def test_fingerprint_ignores_date_and_key_order():
+    plan = planner.build_workout_plan("upper", soreness={"chest": 4})
+    reordered = {
+        "exercises": [dict(reversed(list(e.items()))) for e in plan["exercises"]],
+        "equipment": plan["equipment"],
+        "focus": plan["focus"],
+        "date": "1999-01-01",
+    }
+    assert explanations.fingerprint(plan, "ns") == explanations.fingerprint(reordered, "ns")
+    assert explanations.fingerprint(plan, "ns") != explanations.fingerprint(plan, "other-model")
+
+
+def test_explain_workout_is_served_from_cache(fake_llm):
+    plan = planner.build_workout_plan("lower", equipment="dumbbells")
+    first = llm.explain_workout(plan)
+    assert first == "explanation #1"
+    assert llm.explain_workout(dict(plan, date="2030-01-01")) == first
+    assert fake_llm.calls == 1
+
+    # persistent tier survives a cold in-process cache
+    explanations.explanation_cache.clear_local()
+    assert llm.explain_workout(plan) == first
+    assert fake_llm.calls == 1
+
+    assert llm.explain_workout(plan, use_cache=False) == "explanation #2"
+    assert llm.explain_workout(plan) == first
+
+
+def test_prewarm_fills_store_and_resumes(fake_llm):
+    namespace = llm.explain_cache_namespace()
+    first = explanations.prewarm(llm.explain_workout, namespace, concurrency=4, limit=25)
+    assert first["generated"] == 25 and first["failed"] == 0
+    assert first["remaining"] == first["reachable"] - 25
+
+    second = explanations.prewarm(llm.explain_workout, namespace, limit=5)
+    assert second["already_stored"] == 25
+    assert fake_llm.calls == 30
+
+    # a prewarmed plan never reaches the upstream
+    stored = next(
+        p for p in explanations.reachable_plans()
+        if explanations.fingerprint(p, namespace) in db.explanation_fingerprints()
+    )
+    explanations.explanation_cache.clear_local()
+    llm.explain_workout(stored)
+    assert fake_llm.calls == 30
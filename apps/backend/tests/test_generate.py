@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from main import app
+from routes import plans
+from services import llm
+from services.fallback_plan import build_local_plan
+from tests.fake_openai import FakeOpenAI
+
+PAYLOAD = {"goal": "strength", "days_per_week": 3, "equipment": "dumbbells"}
+# every call here must reach the (fake) upstream
+NO_CACHE = {"cache": "bypass"}
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    with FakeOpenAI(latency=0.3) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        yield fake
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_generate_plan_saves_and_returns_plan(fake_openai):
+    async def go():
+        async with _client() as c:
+            return await c.post("/plans/generate", json=PAYLOAD, params=NO_CACHE)
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data["weekly_split"]) == 3
+    assert data["id"] > 0
+
+
+def test_slow_generations_do_not_block_reads(fake_openai):
+    async def go():
+        async with _client() as c:
+            gens = [asyncio.create_task(c.post("/plans/generate", json=PAYLOAD, params=NO_CACHE)) for _ in range(20)]
+            await asyncio.sleep(0.05)
+            t0 = time.perf_counter()
+            health = await c.get("/health")
+            listing = await c.get("/plans")
+            read_latency = time.perf_counter() - t0
+            return await asyncio.gather(*gens), health, listing, read_latency
+
+    gens, health, listing, read_latency = asyncio.run(go())
+    assert all(r.status_code == 200 for r in gens)
+    assert health.status_code == 200 and listing.status_code == 200
+    assert read_latency < fake_openai.latency
+
+
+def test_concurrency_limit_is_enforced(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_MAX_CONCURRENCY", 2)
+
+    async def go():
+        async with _client() as c:
+            return await asyncio.gather(*(c.post("/plans/generate", json=PAYLOAD, params=NO_CACHE) for _ in range(6)))
+
+    assert all(r.status_code == 200 for r in asyncio.run(go()))
+    assert fake_openai.max_in_flight <= 2
+
+
+def test_upstream_timeout_maps_to_504(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_TIMEOUT_S", 0.05)
+
+    async def go():
+        async with _client() as c:
+            return await c.post("/plans/generate", json=PAYLOAD, params={**NO_CACHE, "fallback": "false"})
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 504
+
+
+def test_upstream_timeout_falls_back_to_local_plan(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_TIMEOUT_S", 0.05)
+
+    async def go():
+        async with _client() as c:
+            return await c.post("/plans/generate", json=PAYLOAD, params=NO_CACHE)
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 200
+    assert resp.headers["X-Plan-Source"] == "fallback"
+    assert resp.headers["X-Plan-Fallback-Reason"] == "timeout"
+    assert resp.json()["summary"].endswith("because the AI coach did not answer in time.")
+    data = resp.json()
+    assert data["source"] == "fallback"
+    assert len(data["weekly_split"]) == 3
+    assert data["weekly_split"][0]["main"][0]["name"] == "Goblet Squat"
+
+
+def test_latency_budget_caps_response_time_and_upgrades_cache(fake_openai, monkeypatch):
+    monkeypatch.setattr(plans, "LATENCY_BUDGET_S", 0.05)
+    payload = {**PAYLOAD, "constraints": "budget test"}
+
+    async def go():
+        async with _client() as c:
+            t0 = time.perf_counter()
+            first = await c.post("/plans/generate", json=payload)
+            elapsed = time.perf_counter() - t0
+            await asyncio.gather(*plans._background_upgrades)
+            second = await c.post("/plans/generate", json=payload)
+            return first, elapsed, second
+
+    first, elapsed, second = asyncio.run(go())
+    assert elapsed < fake_openai.latency
+    assert first.json()["source"] == "fallback"
+    assert first.headers["X-Plan-Upgrade"] == "pending"
+    # the upstream call kept running and its plan now serves from the cache
+    assert second.headers["X-Plan-Cache"] == "hit"
+    assert second.json()["source"] == "llm"
+    assert fake_openai.calls == 1
+
+
+def test_missing_api_key_serves_local_plan(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY")
+
+    async def go():
+        async with _client() as c:
+            return (
+                await c.post("/plans/generate", json={**PAYLOAD, "days_per_week": 6}),
+                await c.post("/plans/generate", json=PAYLOAD, params={"fallback": "false"}),
+            )
+
+    local, strict = asyncio.run(go())
+    assert local.status_code == 200 and local.headers["X-Plan-Fallback-Reason"] == "no_api_key"
+    assert len(local.json()["weekly_split"]) == 6
+    assert local.json()["summary"].endswith("because the AI coach is not configured on this server.")
+    assert strict.status_code == 500
+
+
+@pytest.mark.parametrize("goal", ["strength", "hypertrophy", "fat_loss", "endurance"])
+@pytest.mark.parametrize("equipment", ["full_gym", "dumbbells", "bodyweight"])
+def test_local_plan_validates_for_every_request_shape(goal, equipment):
+    for days in range(1, 7):
+        for minutes in (20, 60, 120):
+            req = plans.GeneratePlanRequest(
+                goal=goal, equipment=equipment, days_per_week=days, session_minutes=minutes,
+                experience="beginner", soreness_notes="tris 4, quads", constraints="bad knee",
+            )
+            plan = plans.GeneratePlanResponse.model_validate(build_local_plan(req.model_dump()))
+            assert len(plan.weekly_split) == days
+            assert all(day.main for day in plan.weekly_split)
@@ -0,0 +1,183 @@
+import asyncio
+
+import httpx
+import pytest
+
+from main import app
+from routes import plans
+from services import db, llm
+from services.jobs import WorkerPool
+from tests.fake_openai import FakeOpenAI
+
+PAYLOAD = {"goal": "hypertrophy", "days_per_week": 4, "equipment": "full_gym"}
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    with FakeOpenAI(latency=0.05) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        yield fake
+
+
+def _run(go):
+    async def wrapper():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+                return await go(c)
+        finally:
+            await plans.job_workers.stop()
+
+    return asyncio.run(wrapper())
+
+
+def test_job_is_accepted_and_long_poll_returns_the_saved_plan(fake_openai):
+    async def go(c):
+        created = await c.post("/plans/jobs", json=PAYLOAD)
+        polled = await c.get(created.headers["location"], params={"wait": 10})
+        saved = await c.get(f"/plans/{polled.json()['plan_id']}")
+        return created, polled, saved
+
+    created, polled, saved = _run(go)
+    assert created.status_code == 202
+    assert created.json()["status"] == "queued"
+    assert created.headers["location"] == f"/plans/jobs/{created.json()['id']}"
+
+    job = polled.json()
+    assert polled.status_code == 200
+    assert job["status"] == "succeeded" and job["attempts"] == 1
+    assert job["plan"]["id"] == job["plan_id"]
+    assert len(job["plan"]["weekly_split"]) == 4
+    assert saved.status_code == 200
+
+
+def test_pending_job_asks_client_to_retry(fake_openai):
+    fake_openai.latency = 0.5
+
+    async def go(c):
+        created = await c.post("/plans/jobs", json={**PAYLOAD, "days_per_week": 2})
+        pending = await c.get(created.headers["location"])
+        done = await c.get(created.headers["location"], params={"wait": 10})
+        return pending, done
+
+    pending, done = _run(go)
+    assert pending.json()["status"] in ("queued", "running")
+    assert pending.headers["retry-after"] == "1"
+    assert done.json()["status"] == "succeeded"
+    assert "retry-after" not in done.headers
+
+
+def test_full_queue_is_rejected_with_retry_after(monkeypatch):
+    monkeypatch.setattr(plans, "JOB_MAX_QUEUED", 0)
+
+    async def go(c):
+        return await c.post("/plans/jobs", json=PAYLOAD)
+
+    resp = _run(go)
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 1
+
+
+def test_failed_generation_is_recorded(monkeypatch):
+    with FakeOpenAI(plan={"title": "missing everything else"}) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+
+        async def go(c):
+            created = await c.post("/plans/jobs", json={**PAYLOAD, "days_per_week": 5})
+            return await c.get(created.headers["location"], params={"wait": 10})
+
+        resp = _run(go)
+    job = resp.json()
+    assert job["status"] == "failed"
+    assert job["error"].startswith("Plan generation failed")
+    assert job["plan_id"] is None
+
+
+def test_unknown_job_is_404():
+    resp = _run(lambda c: c.get("/plans/jobs/999999"))
+    assert resp.status_code == 404
+
+
+def test_job_with_expired_lease_is_claimed_again():
+    job = db.create_job('{"goal": "strength"}')
+    first = db.claim_job(lease_s=-1)  # worker "dies" holding an already expired lease
+    assert first["id"] == job["id"] and first["status"] == "running"
+
+    again = db.claim_job(lease_s=60)
+    assert again["id"] == job["id"] and again["attempts"] == 2
+    assert db.claim_job(lease_s=60) is None
+
+    db.release_job(job["id"])
+    assert db.get_job(job["id"])["status"] == "queued"
+    db.fail_job(job["id"], "test cleanup")
+
+
+def test_worker_survives_a_failure_it_cannot_record():
+    queue = [{"id": i, "created_at": 0} for i in range(4)]
+    ran = []
+
+    async def run(job):
+        ran.append(job["id"])
+        if job["id"] == 0:
+            raise RuntimeError("bad job")
+
+    def fail(job, exc):
+        raise RuntimeError("database is locked")
+
+    pool = WorkerPool(
+        "test", claim=lambda: queue.pop(0) if queue else None, run=run, fail=fail,
+        release=lambda job: None, concurrency=1, poll_interval_s=0.01,
+    )
+
+    async def go():
+        pool.ensure_started()
+        for _ in range(100):
+            if len(ran) == 4:
+                break
+            await asyncio.sleep(0.01)
+        stats = pool.stats()
+        await pool.stop()
+        return stats
+
+    stats = asyncio.run(go())
+    assert ran == [0, 1, 2, 3]
+    assert stats["workers"] == 1
+
+
+def test_stale_worker_cannot_complete_a_reclaimed_job():
+    job = db.create_job('{"goal": "strength"}')
+    stale = db.claim_job(lease_s=-1)
+    owner = db.claim_job(lease_s=60)
+    plans_before = db.max_plan_id()
+
+    assert db.complete_job(job["id"], stale["attempts"], "Stale", "{}", '{"title": "Stale"}') is None
+    assert db.max_plan_id() == plans_before  # the stale plan insert was rolled back
+    db.fail_job(job["id"], "stale failure", stale["attempts"])
+    assert db.get_job(job["id"])["status"] == "running"
+
+    saved = db.complete_job(job["id"], owner["attempts"], "Owner", "{}", '{"title": "Owner"}')
+    done = db.get_job(job["id"])
+    assert done["status"] == "succeeded" and done["plan_id"] == saved["id"]
+    assert not db.search_plans("Stale")
+
+
+def test_job_waits_out_an_open_circuit_instead_of_failing(fake_openai, monkeypatch):
+    from services.resilience import CallPolicy, CircuitBreaker
+
+    breaker = CircuitBreaker("openai", failure_threshold=1, reset_after_s=0.5)
+    breaker.record_failure()
+    monkeypatch.setattr(llm, "policy", CallPolicy(breaker))
+
+    async def go(c):
+        created = await c.post("/plans/jobs", json={**PAYLOAD, "constraints": "circuit test"})
+        await asyncio.sleep(0.2)
+        waiting = await c.get(created.headers["location"])
+        done = await c.get(created.headers["location"], params={"wait": 10})
+        return waiting.json(), done.json()
+
+    waiting, done = _run(go)
+    assert waiting["status"] == "queued" and "circuit is open" in waiting["error"]
+    assert waiting["not_before"] > waiting["created_at"]
+    assert done["status"] == "succeeded" and done["attempts"] == 2 and done["error"] is None
+    assert fake_openai.calls == 1  # only the probe after the reset reached the upstream
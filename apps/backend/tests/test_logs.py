@@ -0,0 +1,115 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+from routes import logs
+from services import db
+
+client = TestClient(app)
+
+
+def test_single_log_endpoint_is_mounted():
+    resp = client.post("/logs/", json={"name": "Calf Raise", "reps": 12, "weight_kg": 40, "rir": 2})
+    assert resp.status_code == 200
+    assert resp.json()["added"]["name"] == "Calf Raise"
+
+
+def test_bulk_json_array():
+    rows = [
+        {"name": "Back Squat", "reps": 5, "weight_kg": 100, "rir": 2, "focus": "lower",
+         "timestamp": "2024-01-02T10:00:00Z"},
+        {"name": "Back Squat", "reps": 5, "weight_kg": 102.5, "rir": 1, "focus": "lower"},
+        {"name": "Back Squat", "reps": "five", "weight_kg": 100, "rir": 2},
+    ]
+    resp = client.post("/logs/bulk", json=rows)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["received"] == 3 and body["inserted"] == 2 and body["rejected"] == 1
+    assert body["errors"][0]["row"] == 3
+    assert "reps" in body["errors"][0]["error"]
+
+    imported = [r for r in db.get_logs("lower") if r["weight_kg"] == 100]
+    assert imported[0]["timestamp"] == "2024-01-02 10:00:00"
+
+
+def test_bulk_ndjson_stream_reports_line_numbers():
+    lines = [json.dumps({"name": "Row", "reps": 8, "weight_kg": 60, "rir": 2, "focus": "nd"}) for _ in range(12_000)]
+    lines[10] = "{not json"
+    lines.insert(500, "")  # blank lines are skipped but still counted
+    payload = ("\n".join(lines)).encode()
+
+    def chunks():
+        for i in range(0, len(payload), 7_919):
+            yield payload[i : i + 7_919]
+
+    resp = client.post("/logs/bulk", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body == {"received": 12_000, "inserted": 11_999, "rejected": 1, "errors": body["errors"]}
+    assert body["errors"][0]["row"] == 11
+    assert len(db.get_logs("nd")) == 11_999
+
+
+def test_bulk_all_or_nothing_rejects_everything():
+    before = len(db.get_logs())
+    rows = [{"name": "Dips", "reps": 10, "weight_kg": 0, "rir": 1}, {"name": "Dips"}]
+    resp = client.post("/logs/bulk", json=rows, params={"all_or_nothing": True})
+    assert resp.status_code == 422
+    assert len(db.get_logs()) == before
+
+
+def test_bulk_rejects_non_array():
+    assert client.post("/logs/bulk", json={"name": "Dips"}).status_code == 400
+
+
+def test_bulk_rejects_imports_over_the_row_cap(monkeypatch):
+    monkeypatch.setattr(logs, "BULK_MAX_ROWS", 10)
+    before = len(db.get_logs())
+    rows = [{"name": "Dips", "reps": 10, "weight_kg": 0, "rir": 1} for _ in range(11)]
+    resp = client.post("/logs/bulk", json=rows)
+    assert resp.status_code == 413
+    assert len(db.get_logs()) == before
+
+
+def test_logs_are_cursor_paginated_per_focus():
+    client.post("/logs/bulk", json=[
+        {"name": "Pull-up", "reps": 8, "weight_kg": 0, "rir": 2, "focus": "paged"} for _ in range(25)
+    ])
+    ids, cursor = [], None
+    while True:
+        params = {"focus": "paged", "limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/logs/", params=params).json()
+        ids.extend(r["id"] for r in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(ids) == 25
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_export_streams_ndjson_and_csv():
+    client.post("/logs/bulk", json=[
+        {"name": "Chin-up", "reps": 6, "weight_kg": 0, "rir": 1, "focus": "exported"} for _ in range(25)
+    ])
+    nd = client.get("/logs/export", params={"focus": "exported"})
+    assert nd.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in nd.text.splitlines()]
+    assert len(rows) == 25 and rows[0]["name"] == "Chin-up"
+
+    csv_resp = client.get("/logs/export", params={"focus": "exported", "format": "csv"})
+    lines = csv_resp.text.strip().splitlines()
+    assert lines[0] == "id,name,reps,weight_kg,rir,focus,timestamp"
+    assert len(lines) == 26
+
+
+def test_focus_pages_use_composite_index():
+    # explain the statement get_logs actually runs, not a copy of it
+    sql, params = db._logs_query("upper", 10)
+    with db._conn() as conn:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql} LIMIT ?", [*params, 10]).fetchall()
+    detail = " ".join(r["detail"] for r in plan)
+    assert "idx_logs_focus_id" in detail
+    assert "TEMP B-TREE" not in detail
@@ -0,0 +1,114 @@
+import asyncio
+import re
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services import db, llm, metrics
+from tests.fake_openai import FakeOpenAI
+
+client = TestClient(app)
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Value of one exposed sample, matched on a subset of its labels."""
+    for line in text.splitlines():
+        if not line.startswith(name + "{") and not line.startswith(name + " "):
+            continue
+        if all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} {labels} not exposed")
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = metrics.Registry()
+    h = reg.histogram("t_seconds", "test", ("op",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 2.0):
+        h.observe(v, op="x")
+    text = reg.render()
+    assert _sample(text, "t_seconds_bucket", op="x", le="0.1") == 2
+    assert _sample(text, "t_seconds_bucket", op="x", le="1") == 3
+    assert _sample(text, "t_seconds_bucket", op="x", le="+Inf") == 4
+    assert _sample(text, "t_seconds_count", op="x") == 4
+    assert _sample(text, "t_seconds_sum", op="x") == pytest.approx(2.65)
+    with pytest.raises(ValueError):
+        h.observe(1.0)
+
+
+def test_timed_generator_covers_whole_iteration():
+    reg = metrics.Registry()
+    h = reg.histogram("g_seconds", "test", ("function",))
+    errors = reg.counter("g_errors_total", "test", ("function", "error"))
+
+    @metrics.timed(h, errors)
+    def rows():
+        yield 1
+        raise KeyError("boom")
+
+    it = rows()
+    assert next(it) == 1
+    assert h.count(function="rows") == 0
+    with pytest.raises(KeyError):
+        next(it)
+    assert h.count(function="rows") == 1
+    assert errors.value(function="rows", error="KeyError") == 1
+
+
+def test_metrics_endpoint_reports_routes_and_db_calls():
+    created = client.post("/logs/", json={"name": "Row", "reps": 8, "weight_kg": 50, "rir": 2}).json()["added"]
+    assert client.get("/plans/999999").status_code == 404
+    client.get("/no/such/route")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = resp.text
+    # route templates, never raw ids
+    assert _sample(text, "gymgpt_http_request_duration_seconds_count", route="/plans/{plan_id}", status="404") >= 1
+    assert _sample(text, "gymgpt_http_request_duration_seconds_count", route="unmatched", status="404") >= 1
+    assert "/plans/999999" not in text
+    assert _sample(text, "gymgpt_http_requests_in_flight", method="GET", route="/metrics") == 1
+    assert _sample(text, "gymgpt_db_call_duration_seconds_count", function="add_log") >= 1
+    assert _sample(text, "gymgpt_db_pool_size") == db.POOL_SIZE
+    assert _sample(text, "gymgpt_plan_cache_events_total", event="misses") >= 0
+    assert created["id"] > 0
+
+
+def test_llm_latency_and_tokens_are_recorded(monkeypatch):
+    model = "metrics-test-model"
+    monkeypatch.setenv("OPENAI_MODEL", model)
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            ok = await c.post("/plans/generate", json={"days_per_week": 2}, params={"cache": "bypass"})
+            monkeypatch.setattr(llm, "LLM_TIMEOUT_S", 0.01)
+            slow = await c.post("/plans/generate", json={"days_per_week": 2}, params={"cache": "bypass"})
+            return ok, slow
+
+    with FakeOpenAI(latency=0.1) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        ok, slow = asyncio.run(go())
+
+    assert ok.json()["source"] == "llm" and slow.json()["source"] == "fallback"
+    assert metrics.LLM_REQUEST_SECONDS.count(operation="chat", model=model, outcome="ok") == 1
+    assert metrics.LLM_REQUEST_SECONDS.count(operation="chat", model=model, outcome="timeout") == 1
+    assert metrics.LLM_TOKENS.value(operation="chat", model=model, type="prompt") == 200
+    assert metrics.LLM_ERRORS.value(operation="chat", model=model, error="timeout") == 1
+
+
+def test_profiling_is_opt_in_per_request(monkeypatch):
+    assert "x-profile-id" not in client.get("/health", headers={"X-Profile": "1"}).headers
+
+    monkeypatch.setattr(metrics, "PROFILING_ENABLED", True)
+    assert "x-profile-id" not in client.get("/health").headers
+    resp = client.get("/plans", headers={"X-Profile": "1"})
+    profile_id = resp.headers["x-profile-id"]
+
+    listed = client.get("/debug/profiles").json()
+    assert listed[profile_id]["label"] == "GET /plans"
+    folded = client.get(f"/debug/profiles/{profile_id}").text
+    assert all(re.fullmatch(r".+ \d+", line) for line in folded.splitlines())
+    assert client.get("/debug/profiles/nope").status_code == 404
@@ -0,0 +1,55 @@
+import pytest
+
+from services.nlp import parse_soreness, parse_soreness_batch
+
+# (note, expected) -- the correctness corpus for the soreness parser
+CORPUS = [
+    ("", {}),
+    ("feeling great", {}),
+    ("triceps 3, quads 2", {"triceps": 3, "quads": 2}),
+    ("triceps are sore", {"triceps": 3}),
+    ("Triceps: 4", {"triceps": 4}),
+    ("quads=5 glutes = 1", {"quads": 5, "glutes": 1}),
+    ("tri 4", {"triceps": 4}),
+    ("tris 2", {"triceps": 2}),
+    ("tris sore, tri 5", {"triceps": 5}),
+    ("bi 2 and hams 4", {"biceps": 2, "hamstrings": 4}),
+    ("delts 3", {"shoulders": 3}),
+    ("rear delts 4", {"rear_delts": 4}),
+    ("rear_delts 2, delts 1", {"rear_delts": 2, "shoulders": 1}),
+    ("REAR   DELTS", {"rear_delts": 3}),
+    ("calf 2", {"calves": 2}),
+    ("calves killing me", {"calves": 3}),
+    ("chest 9", {"chest": 5}),
+    ("back 0", {"back": 1}),
+    ("chest 135 bench yesterday", {"chest": 3}),
+    ("triceps3 quads4", {"triceps": 3, "quads": 4}),
+    ("quads sore, quads 2", {"quads": 2}),
+    ("quads 4 then later quads 2", {"quads": 2}),
+    # words that merely contain a muscle name are not mentions
+    ("backache from the tribunal", {}),
+    ("bicycle ride, trip to the beach", {}),
+    ("sore triceps 3", {"triceps": 3}),
+    ("chest, back, shoulders", {"chest": 3, "back": 3, "shoulders": 3}),
+]
+
+
+@pytest.mark.parametrize("text,expected", CORPUS)
+def test_corpus(text, expected):
+    assert parse_soreness(text) == expected
+
+
+def test_alias_expansion_does_not_corrupt_triceps():
+    # the old str.replace chain rewrote the "tri" inside "triceps"
+    assert parse_soreness("triceps 2") == {"triceps": 2}
+
+
+def test_results_are_independent_copies():
+    first = parse_soreness("quads 2")
+    first["quads"] = 5
+    assert parse_soreness("quads 2") == {"quads": 2}
+
+
+def test_batch_matches_scalar():
+    texts = [t for t, _ in CORPUS] * 50 + [None]
+    assert parse_soreness_batch(texts) == [parse_soreness(t) for t in texts]
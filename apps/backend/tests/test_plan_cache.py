@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+
+from main import app
+from services import db, llm
+from services.plan_cache import PlanCache, make_key
+from tests.fake_openai import FakeOpenAI
+
+
+def setup_module(module):
+    db.init_db()
+
+
+def test_key_ignores_case_and_whitespace_in_notes():
+    a = {"goal": "strength", "soreness_notes": "  Sore  Quads ", "constraints": None}
+    b = {"goal": "strength", "soreness_notes": "sore quads", "constraints": ""}
+    assert make_key(a, "m") == make_key(b, "m")
+    assert make_key(a, "m") != make_key(a, "other-model")
+    assert make_key(a, "m") != make_key({**a, "goal": "hypertrophy"}, "m")
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = PlanCache(max_entries=2, ttl_s=60, persist_ttl_s=60)
+    cache.put("k1", "{}")
+    cache.put("k2", "{}")
+    cache.get_local("k1")  # k1 is now most recent
+    cache.put("k3", "{}")
+    assert cache.get_local("k2") is None
+    assert cache.stats()["evictions"] == 1
+
+    # the persistent tier still has k2 and promotes it back into memory
+    assert cache.get_persistent("k2") == "{}"
+    assert cache.get_local("k2") == "{}"
+
+    cache.ttl_s = -1
+    assert cache.get_local("k2") is None
+    assert cache.stats()["expirations"] == 1
+    cache.invalidate()
+
+
+def test_generate_is_served_from_cache(monkeypatch):
+    payload = {"goal": "endurance", "days_per_week": 2, "equipment": "bodyweight"}
+
+    async def go(c, **params):
+        return await c.post("/plans/generate", json=payload, params=params)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            first = await go(c)
+            second = await go(c)
+            bypass = await go(c, cache="bypass")
+            return first, second, bypass
+
+    with FakeOpenAI() as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        first, second, bypass = asyncio.run(scenario())
+        assert fake.calls == 2
+
+    assert first.headers["X-Plan-Cache"] == "miss"
+    assert second.headers["X-Plan-Cache"] == "hit"
+    assert bypass.headers["X-Plan-Cache"] == "bypass"
+    assert second.json()["id"] != first.json()["id"]
+    assert second.json()["weekly_split"] == first.json()["weekly_split"]
+
+
+def test_identical_concurrent_generations_share_one_upstream_call(monkeypatch):
+    from routes.plans import inflight_generations
+
+    payload = {"goal": "fat_loss", "days_per_week": 4, "equipment": "dumbbells"}
+    before = inflight_generations.stats()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await asyncio.gather(
+                *(c.post("/plans/generate", json=payload, params={"cache": "refresh"}) for _ in range(10))
+            )
+
+    with FakeOpenAI(latency=0.3) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        responses = asyncio.run(scenario())
+        assert fake.calls == 1
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["id"] for r in responses}) == 10
+    assert sum(r.headers.get("X-Plan-Coalesced") == "true" for r in responses) == 9
+
+    after = inflight_generations.stats()
+    assert after["upstream_calls"] - before["upstream_calls"] == 1
+    assert after["coalesced_callers"] - before["coalesced_callers"] == 9
+    assert after["callers_per_call"].get(10) == 1
@@ -0,0 +1,152 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services import db
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    db.init_db()
+    for i in range(7):
+        db.add_plan(f"Read plan {i}", "{}", '{"title": "Read plan"}')
+
+
+def test_cursor_pagination_walks_every_plan_once():
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/plans", params=params).json()
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [p["id"] for p in db.list_plans(limit=1_000_000)]
+
+
+def test_invalid_cursor_is_400():
+    assert client.get("/plans", params={"cursor": "not-a-cursor!"}).status_code == 400
+    # checked before the ETag, so even a wildcard If-None-Match can't turn it into a 304
+    resp = client.get("/plans", params={"cursor": "not-a-cursor!"}, headers={"If-None-Match": "*"})
+    assert resp.status_code == 400
+
+
+def test_listing_etag_and_304():
+    first = client.get("/plans")
+    etag = first.headers["ETag"]
+    again = client.get("/plans", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    db.add_plan("Newer plan", "{}", "{}")
+    changed = client.get("/plans", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["items"][0]["title"] == "Newer plan"
+
+
+def test_get_plan_splices_stored_json_and_is_immutable():
+    output = {"title": "Spliced", "weekly_split": [], "summary": "ünïcode ✓"}
+    saved = db.add_plan("Spliced \"quoted\"", '{"goal": "strength"}', json.dumps(output))
+
+    resp = client.get(f"/plans/{saved['id']}")
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "id": saved["id"],
+        "created_at": saved["created_at"],
+        "title": 'Spliced "quoted"',
+        "input": {"goal": "strength"},
+        "output": output,
+    }
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert not resp.headers["ETag"].startswith("W/")
+
+    cached = client.get(f"/plans/{saved['id']}", headers={"If-None-Match": resp.headers["ETag"]})
+    assert cached.status_code == 304
+    assert client.get("/plans/999999999").status_code == 404
+
+
+def _searchable_plan(title, exercises, summary="", equipment="full_gym"):
+    output = {
+        "title": title,
+        "summary": summary,
+        "weekly_split": [{"day": "Day 1", "focus": "Lower", "main": [{"name": n} for n in exercises]}],
+    }
+    return db.add_plan(title, json.dumps({"goal": "strength", "equipment": equipment}), json.dumps(output))
+
+
+def test_search_ranks_title_matches_first_and_stems_words():
+    in_exercises = _searchable_plan("Quokka leg day", ["Zercher Squat", "Nordic Curl"])
+    in_title = _searchable_plan("Zercher Squats block", ["Leg Press"])
+    _searchable_plan("Quokka upper day", ["Bench Press"])
+
+    resp = client.get("/plans/search", params={"q": "zercher squat"})
+    assert resp.status_code == 200
+    ids = [item["id"] for item in resp.json()["items"]]
+    assert ids == [in_title["id"], in_exercises["id"]]
+    assert resp.json()["items"][0]["score"] > resp.json()["items"][1]["score"]
+
+    phrase = client.get("/plans/search", params={"q": '"nordic curl" quokka'}).json()["items"]
+    assert [item["id"] for item in phrase] == [in_exercises["id"]]
+    assert {item["id"] for item in client.get("/plans/search", params={"q": "quok*"}).json()["items"]} >= {
+        in_exercises["id"]
+    }
+
+
+def test_search_matches_request_fields_and_paginates():
+    saved = [_searchable_plan(f"Wombat plan {i}", ["Goblet Squat"], equipment="dumbbells") for i in range(5)]
+    _searchable_plan("Wombat plan gym", ["Goblet Squat"])
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "wombat dumbbells", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/plans/search", params=params).json()
+        seen.extend(item["id"] for item in body["items"])
+        assert body["truncated"] is False
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(p["id"] for p in saved)
+
+
+def test_search_pages_stop_at_the_ranked_window(monkeypatch):
+    saved = [_searchable_plan(f"Numbat plan {i}", ["Hack Squat"]) for i in range(5)]
+    monkeypatch.setattr(db, "PLAN_SEARCH_WINDOW", 3)
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "numbat", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/plans/search", params=params).json()
+        seen.extend(item["id"] for item in body["items"])
+        assert body["truncated"] is True
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    # only the newest three are ranked, and no cursor points past them
+    assert sorted(seen) == sorted(p["id"] for p in saved[-3:])
+    assert client.get("/plans/search", params={"q": "numbat", "limit": 3}).json()["next_cursor"] is None
+
+
+def test_search_rejects_empty_queries_and_survives_fts_syntax():
+    assert client.get("/plans/search", params={"q": "*"}).status_code == 400
+    assert client.get("/plans/search", params={"q": ""}).status_code == 422
+    resp = client.get("/plans/search", params={"q": 'NEAR( "unbalanced OR'})
+    assert resp.status_code == 200 and resp.json()["items"] == []
+
+
+def test_rebuild_search_index_matches_incremental_index():
+    _searchable_plan("Axolotl rebuild", ["Sumo Deadlift"])
+    before = [p["id"] for p in db.search_plans("axolotl sumo")]
+    with db._conn() as conn:
+        plans = conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+    assert db.rebuild_search_index() == plans
+    assert [p["id"] for p in db.search_plans("axolotl sumo")] == before != []
@@ -0,0 +1,121 @@
+import pytest
+
+from services import db, planner
+
+
+def setup_module(module):
+    db.init_db()
+    rows = []
+    # Barbell Row: recent sets easy (rir 3), Lat Pulldown: mixed, Overhead Press: grinders
+    for i, rir in enumerate([0, 0, 3, 3, 3]):
+        rows.append(("Barbell Row", 8, 60.0 + i, rir, "upper", f"2024-05-0{1 + i} 10:00:00"))
+    for i, rir in enumerate([4, 1, 2, 0]):
+        rows.append(("Lat Pulldown", 10, 50.0, rir, "upper", f"2024-05-0{1 + i} 10:00:00"))
+    for i, rir in enumerate([-1, 0, 0]):
+        rows.append(("Overhead Press", 5, 40.0 + 2.5 * i, rir, "upper", f"2024-05-0{1 + i} 10:00:00"))
+    db.add_logs_bulk(rows)
+
+
+@pytest.mark.parametrize("window", db.STATS_WINDOWS)
+def test_stats_match_raw_recent_sets(window):
+    stats = db.get_exercise_stats(window)
+    raw = db.get_latest_by_exercise(window)
+    for name, sets in raw.items():
+        s = stats[name]
+        assert s["sets"] == len(sets)
+        assert s["avg_rir"] == pytest.approx(sum(max(0, x["rir"]) for x in sets) / len(sets))
+        assert s["avg_volume"] == pytest.approx(sum(x["reps"] * x["weight_kg"] for x in sets) / len(sets))
+        top = max(sets, key=lambda x: (x["weight_kg"], x["reps"]))
+        assert (s["top_weight_kg"], s["top_reps"]) == (top["weight_kg"], top["reps"])
+
+
+def test_stats_update_on_each_insert():
+    before = db.get_exercise_stats(3, names=["Overhead Press"])["Overhead Press"]
+    db.add_log("Overhead Press", 5, 50.0, 4, "upper")
+    after = db.get_exercise_stats(3, names=["Overhead Press"])["Overhead Press"]
+    assert after["top_weight_kg"] == 50.0
+    assert after["avg_rir"] > before["avg_rir"]
+
+
+def test_week_plan_from_stats_matches_raw_rows():
+    raw = planner.build_week_plan(4, db.get_latest_by_exercise(3), {"triceps": 4}, "gym")
+    fast = planner.build_week_plan(4, soreness={"triceps": 4}, equipment="gym", stats_by_ex=db.get_exercise_stats(3))
+    assert fast == raw
+    deltas = {e["name"]: e["weight_delta"] for e in fast["plans"][0]["exercises"]}
+    assert deltas["Barbell Row"] == 2.5
+
+
+def test_get_exercise_stats_rejects_unmaintained_window():
+    with pytest.raises(ValueError):
+        db.get_exercise_stats(window=7)
+
+
+def test_batch_planner_matches_scalar_path():
+    import numpy as np
+
+    from services import batch_planner
+
+    rng = np.random.default_rng(3)
+    names = sorted(
+        {b["name"] for blocks in planner.BASE_EXERCISES.values() for b in blocks}
+        | set(planner.DUMBBELL_ALTS.values())
+        | set(planner.BAND_OR_BW_ALTS.values())
+    )
+    users = 300
+    rir = rng.integers(-1, 4, size=(users, len(names))).astype(float)
+    rir[rng.random(rir.shape) < 0.3] = np.nan
+    muscles = list(batch_planner.DEFAULT_MUSCLES)
+    soreness = rng.integers(0, 6, size=(users, len(muscles)))
+    soreness[rng.random(users) < 0.3] = 0
+    equipment = rng.integers(0, 3, size=users)
+    days = rng.integers(1, 7, size=users)
+
+    batch = batch_planner.build_week_plans(days, rir, names, soreness, equipment, muscles)
+    plans = batch.to_plans()
+
+    for u in range(users):
+        last = {n: [{"rir": rir[u, j]}] for j, n in enumerate(names) if not np.isnan(rir[u, j])}
+        sore = {m: int(soreness[u, k]) for k, m in enumerate(muscles) if soreness[u, k]}
+        expected = planner.build_week_plan(
+            int(days[u]), last, sore, batch_planner.EQUIPMENT_CODES[equipment[u]]
+        )
+        assert plans[u] == expected
+
+
+def _reference_day(focus, last_log_by_ex, soreness, equipment):
+    # the pre-catalog implementation, kept here as an oracle
+    base = planner._apply_equipment(planner.select_blocks(focus), equipment)
+    planned = [{**b, "weight_delta": planner.progressive_overload(last_log_by_ex.get(b["name"], []))} for b in base]
+    if not soreness:
+        return planned
+    out = []
+    for b in planned:
+        aggravated = any(b["name"] in planner.SORENESS_MAP.get(m, []) and lvl >= 3 for m, lvl in soreness.items())
+        out.append({**b, "name": f"Light {b['name']} (reduce load 20%)"} if aggravated else b)
+    return out
+
+
+@pytest.mark.parametrize("equipment", ["gym", "dumbbells", "bodyweight", "bands"])
+@pytest.mark.parametrize("soreness", [None, {}, {"triceps": 4}, {"chest": 2, "quads": 3}, {"calves": 5}])
+def test_compiled_catalog_matches_reference(equipment, soreness):
+    last = {"Barbell Row": [{"rir": 3}], "Goblet Squat": [{"rir": 1}], "Push-ups": [{"rir": 0}]}
+    for focus in ("upper", "lower", "full", "unknown"):
+        day = planner.build_workout_plan(focus, last, soreness, equipment)
+        assert day["exercises"] == _reference_day(focus, last, soreness, equipment)
+        assert day["equipment"] == equipment
+
+
+def test_exercise_muscles_inverts_soreness_map():
+    assert planner.EXERCISE_MUSCLES["Bench Press"] == {"triceps", "chest"}
+    for muscle, exercises in planner.SORENESS_MAP.items():
+        for ex in exercises:
+            assert muscle in planner.EXERCISE_MUSCLES[ex]
+
+
+def test_memoized_plans_return_fresh_dicts():
+    planner._compiled_day.cache_clear()
+    first = planner.build_workout_plan("upper", soreness={"triceps": 5})
+    first["exercises"][0]["name"] = "mutated"
+    second = planner.build_workout_plan("upper", soreness={"triceps": 5})
+    assert second["exercises"][0]["name"] == "Barbell Bench Press"
+    assert planner._compiled_day.cache_info().hits == 1
@@ -0,0 +1,177 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from main import app
+from services import llm
+from services.resilience import LLM_RETRIES, CallPolicy, CircuitBreaker, CircuitOpenError
+from tests.fake_openai import FakeOpenAI
+
+PAYLOAD = {"goal": "endurance", "days_per_week": 2, "equipment": "bodyweight"}
+NO_CACHE = {"cache": "bypass"}
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    with FakeOpenAI(latency=0.02) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        monkeypatch.setattr(llm, "_client", None)
+        llm.policy.backoff_s = 0.01
+        yield fake
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_upstream_faults_are_retried_within_the_deadline(fake_openai):
+    fake_openai.inject(status=503, count=2)
+    retries = LLM_RETRIES.value(operation="chat")
+
+    async def go():
+        async with _client() as c:
+            return await c.post("/plans/generate", json=PAYLOAD, params={**NO_CACHE, "fallback": "false"})
+
+    resp = asyncio.run(go())
+    assert resp.status_code == 200 and resp.json()["source"] == "llm"
+    assert fake_openai.calls == 3
+    assert LLM_RETRIES.value(operation="chat") == retries + 2
+    assert llm.policy.breaker.state == "closed"
+
+
+def test_client_errors_and_exhausted_budgets_are_not_retried(fake_openai, monkeypatch):
+    fake_openai.inject(status=400)
+
+    async def go():
+        async with _client() as c:
+            return await c.post("/plans/generate", json=PAYLOAD, params={**NO_CACHE, "fallback": "false"})
+
+    assert asyncio.run(go()).status_code == 500
+    assert fake_openai.calls == 1
+
+    # a slow answer uses up the whole deadline: no time left to retry it
+    monkeypatch.setattr(llm, "LLM_TIMEOUT_S", 0.2)
+    fake_openai.inject(delay=1.0)
+    assert asyncio.run(go()).status_code == 504
+    assert fake_openai.calls == 2
+
+
+def test_open_circuit_fails_fast_then_probes(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm, "policy", CallPolicy(CircuitBreaker("openai", 3, reset_after_s=0.3), backoff_s=0.01))
+    fake_openai.inject(status=500, count=3)
+
+    async def go(**params):
+        async with _client() as c:
+            return await c.post("/plans/generate", json=PAYLOAD, params={**NO_CACHE, **params})
+
+    # three failed attempts (one call and its two retries) open the breaker ...
+    assert asyncio.run(go(fallback="false")).status_code == 500
+    assert llm.policy.breaker.state == "open" and fake_openai.calls == 3
+
+    # ... and from then on nothing reaches the upstream
+    t0 = time.perf_counter()
+    rejected = asyncio.run(go(fallback="false"))
+    assert rejected.status_code == 503 and int(rejected.headers["Retry-After"]) >= 1
+    fallback = asyncio.run(go())
+    assert fallback.headers["X-Plan-Fallback-Reason"] == "circuit_open"
+    assert time.perf_counter() - t0 < 0.3
+    assert fake_openai.calls == 3
+
+    # after reset_after_s one probe goes through and closes it again
+    time.sleep(0.35)
+    assert llm.policy.breaker.state == "half_open"
+    assert asyncio.run(go()).json()["source"] == "llm"
+    assert llm.policy.breaker.state == "closed" and fake_openai.calls == 4
+
+
+def test_slow_attempt_is_hedged_at_p95():
+    policy = CallPolicy(CircuitBreaker("test"), hedge_min_s=0.01)
+    for _ in range(50):
+        policy.latencies("op").observe(0.02)
+    calls = []
+
+    async def attempt(deadline):
+        calls.append(deadline)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.02)
+        return len(calls)
+
+    t0 = time.perf_counter()
+    winner = asyncio.run(policy.call("op", attempt, deadline_s=5))
+    assert winner == 2 and len(calls) == 2
+    assert time.perf_counter() - t0 < 0.5
+    # the hedge runs against the same deadline, not a fresh one
+    assert calls[0] == calls[1]
+
+
+def test_deadline_covers_the_wait_for_a_concurrency_slot(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_MAX_CONCURRENCY", 1)
+
+    async def go():
+        _, slots = llm._async_llm()
+        await slots.acquire()  # every slot busy for longer than the deadline
+        asyncio.get_running_loop().call_later(1.0, slots.release)
+        t0 = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await llm.create_chat_completion(timeout=0.3, model="m", messages=[{"role": "user", "content": "hi"}])
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(0.8)  # the slot frees up after the caller gave up
+        return elapsed
+
+    elapsed = asyncio.run(go())
+    assert 0.3 <= elapsed < 0.6
+    assert fake_openai.calls == 0
+
+
+def test_slot_starvation_does_not_open_the_breaker(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_MAX_CONCURRENCY", 1)
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def go():
+        _, slots = llm._async_llm()
+        await slots.acquire()
+        for _ in range(llm.policy.breaker.failure_threshold + 1):
+            with pytest.raises(llm.SlotTimeoutError):
+                await llm.create_chat_completion(timeout=0.05, model="m", messages=messages)
+        with pytest.raises(llm.SlotTimeoutError):
+            async for _ in llm.stream_chat_completion(timeout=0.05, model="m", messages=messages):
+                pass
+        assert llm.policy.breaker.stats()["consecutive_failures"] == 0
+        slots.release()
+        return await llm.create_chat_completion(timeout=1.0, model="m", messages=messages)
+
+    # the upstream was never asked, so it is still trusted once a slot frees up
+    assert asyncio.run(go()).choices
+    assert llm.policy.breaker.state == "closed"
+    assert fake_openai.calls == 1
+
+
+def test_breaker_counts_consecutive_faults_only():
+    now = [0.0]
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_after_s=10, clock=lambda: now[0])
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    now[0] = 10.0
+    breaker.allow()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # only one at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_explain_and_coach_use_chat_completions_with_retries(fake_openai):
+    fake_openai.inject(status=502)
+    plan = {"focus": "upper", "equipment": "dumbbells", "exercises": []}
+    assert llm.explain_workout(plan, use_cache=False) == "This is a fake coaching explanation."
+    assert llm.coach_reply("My knees hurt after squats") == "This is a fake coaching explanation."
+    assert fake_openai.calls == 3
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+import serve
+from main import app
+from services import db, llm
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_build_config_defaults_and_env_overrides():
+    defaults = serve.build_config({})
+    assert defaults["host"] == "127.0.0.1" and defaults["port"] == 8000
+    assert defaults["workers"] >= 1
+    assert defaults["loop"] == "uvloop" and defaults["http"] == "httptools"
+    assert defaults["proxy_headers"] is False and defaults["access_log"] is False
+
+    config = serve.build_config(
+        {
+            "GYMGPT_HOST": "0.0.0.0",
+            "GYMGPT_PORT": "9000",
+            "GYMGPT_WORKERS": "3",
+            "GYMGPT_GRACEFUL_TIMEOUT": "5",
+            "GYMGPT_FORWARDED_ALLOW_IPS": "10.0.0.1",
+            "GYMGPT_ACCESS_LOG": "true",
+        }
+    )
+    assert (config["host"], config["port"], config["workers"]) == ("0.0.0.0", 9000, 3)
+    assert config["timeout_graceful_shutdown"] == 5
+    assert config["proxy_headers"] is True and config["forwarded_allow_ips"] == "10.0.0.1"
+    assert config["access_log"] is True
+
+
+def test_default_cors_allows_local_frontend_only():
+    client = TestClient(app)
+    preflight = {"Access-Control-Request-Method": "GET"}
+    ok = client.options("/plans", headers={"Origin": "http://localhost:3000", **preflight})
+    assert ok.headers["access-control-allow-origin"] == "http://localhost:3000"
+    denied = client.options("/plans", headers={"Origin": "https://evil.example", **preflight})
+    assert "access-control-allow-origin" not in denied.headers
+
+
+def test_cors_origins_from_environment():
+    env = dict(os.environ, GYMGPT_CORS_ORIGINS="https://gym.example/, https://admin.gym.example")
+    code = "import main; print(main.CORS_ORIGINS)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_ROOT, env=env, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "['https://gym.example', 'https://admin.gym.example']"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_gets_its_own_pool_and_clients():
+    db.init_db()
+    db.list_plans()
+    parent_pool = db.get_pool()
+    saved_client, llm._client = llm._client, object()  # stands in for a client built before the fork
+
+    pid = os.fork()
+    if pid == 0:  # child: report through the exit code, never return into pytest
+        ok = db._pool is None and llm._client is None and parent_pool in db._inherited_pools
+        try:
+            ok = ok and isinstance(db.list_plans(), list) and db.get_pool() is not parent_pool
+        except Exception:
+            ok = False
+        os._exit(0 if ok else 1)
+
+    llm._client = saved_client
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    # the parent's pool is untouched
+    assert db.get_pool() is parent_pool
+    assert isinstance(db.list_plans(), list)
@@ -0,0 +1,110 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services import llm
+from services.json_stream import ArrayItemStream
+from tests.fake_openai import FakeOpenAI, sample_plan
+
+
+def _feed_all(doc: str, step: int):
+    scanner = ArrayItemStream("weekly_split")
+    items = []
+    for i in range(0, len(doc), step):
+        items.extend(scanner.feed(doc[i : i + step]))
+    return scanner, items
+
+
+@pytest.mark.parametrize("step", [1, 3, 17, 10_000])
+def test_scanner_yields_each_day_regardless_of_chunking(step):
+    plan = sample_plan(4)
+    doc = json.dumps(plan, indent=1)
+    scanner, items = _feed_all(doc, step)
+    assert [json.loads(i) for i in items] == plan["weekly_split"]
+    assert scanner.done
+    assert json.loads(scanner.text) == plan
+
+
+def test_scanner_ignores_braces_in_strings_and_other_arrays():
+    plan = sample_plan(2)
+    plan["title"] = 'Tricky "weekly_split": [{ } ] title'
+    plan["weekly_split"][0]["notes_like"] = "}{\\\"]"
+    plan["progression_notes"] = ["{not a day}"]
+    doc = json.dumps(plan)
+    _, items = _feed_all(doc, 5)
+    assert [json.loads(i) for i in items] == plan["weekly_split"]
+
+
+def _events(body: str):
+    out = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def test_stream_endpoint_emits_days_then_done(monkeypatch):
+    with FakeOpenAI(latency=0.2) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+        with TestClient(app) as client:
+            resp = client.post(
+                "/plans/generate/stream",
+                json={"goal": "strength", "days_per_week": 3},
+                params={"cache": "bypass"},
+            )
+            assert resp.status_code == 200
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            events = _events(resp.text)
+            assert [e for e, _ in events] == ["day", "day", "day", "done"]
+            assert [d["day"] for _, d in events[:3]] == ["Day 1", "Day 2", "Day 3"]
+
+            plan_id = events[-1][1]["id"]
+            saved = client.get(f"/plans/{plan_id}").json()
+            assert [d["day"] for d in saved["output"]["weekly_split"]] == ["Day 1", "Day 2", "Day 3"]
+
+
+def test_first_day_arrives_before_generation_finishes(monkeypatch):
+    import threading
+    import socket
+
+    import httpx
+    import uvicorn
+
+    with FakeOpenAI(latency=1.0) as fake:
+        fake.stream_chunk_chars = 20
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.base_url)
+        monkeypatch.setattr(llm, "_async_state", None)
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws="none"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        try:
+            t0 = time.perf_counter()
+            first_day_at = None
+            with httpx.stream(
+                "POST",
+                f"http://127.0.0.1:{port}/plans/generate/stream",
+                params={"cache": "bypass"},
+                json={"days_per_week": 4},
+                timeout=10,
+            ) as resp:
+                for line in resp.iter_lines():
+                    if line == "event: day" and first_day_at is None:
+                        first_day_at = time.perf_counter() - t0
+            total = time.perf_counter() - t0
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    assert first_day_at is not None
+    assert first_day_at < total * 0.5